@@ -9,9 +9,18 @@ if __name__ == "__main__":
     import asyncio
     from src.tools.base import ToolCall
 
-    from src.tools.bash.bash_tool import BashTool
+    from src.tools.bash.bash_tool import BashTool, BashJobTool
     from src.tools.text.view_tool import ViewTool
-    from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+    from src.tools.text.edit_tool import (
+        CreateFileTool,
+        EditFileTool,
+        InsertFileTool,
+        ReplaceFileTool,
+    )
+    from src.tools.text.search_tool import SearchTool
+    from src.tools.code.symbol_tool import SymbolGraphTool
+    from src.tools.memory.graph_tool import MemoryGraphTool
+    from src.tools.memory.recall_tool import RecallTool
     from src.tools.help.ask_human import AskHumanForHelpTool
 
     from src.llms.anthropic import (
@@ -52,14 +61,21 @@ if __name__ == "__main__":
                 with open(skill_file, "r") as f:
                     skill_content = f.read()
 
+                bash_tool = BashTool(cwd=proj)
                 tool_registry = ToolRegistry(
                     [
                         # BashTool(cwd="C:\\Users\\hylnb\\Workspace\\deploy\\valuecell"),
-                        BashTool(cwd=proj),
+                        bash_tool,
+                        BashJobTool(bash_tool),
                         ViewTool(),
                         CreateFileTool(),
                         InsertFileTool(),
                         ReplaceFileTool(),
+                        EditFileTool(),
+                        SearchTool(root=proj),
+                        SymbolGraphTool(root=proj),
+                        MemoryGraphTool(),
+                        RecallTool(),
                         AskHumanForHelpTool(),
                     ],
                     include_mcp_tools=False,
@@ -1,42 +1,147 @@
+import time
+import contextlib
 from src.llms.agent import Agent
+from src.config.config import DefaultConfig
 from src.utils.log import logger
 from src.tools.registry import ToolRegistry
+from src.tools.policy import ExecutionPolicy, run_with_policy
 from src.tools.text.view_tool import ViewTool
-from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+from src.tools.text.edit_tool import (
+    CreateFileTool,
+    EditFileTool,
+    InsertFileTool,
+    ReplaceFileTool,
+)
 from src.tools.compact.short_term_memory import ShortTermMemoryManager
+from src.memory.retrieval.notes import format_snippets, get_note_index
+from src.utils.metrics import REACT_STEP_SECONDS, start_metrics_server
+from src.utils.tracing import tracer, setup_tracing
+from src.utils.profiler import StepProfiler, profile_phase
+from opentelemetry import trace
 
 
 class ReAct:
 
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Agent, recall_tokens: int = 1000, recall_k: int = 5):
         self.agent = agent
         self.memory_manager = ShortTermMemoryManager(agent)
+        # Notes of earlier sessions added to each new user message, 0 to disable
+        self.recall_tokens = recall_tokens
+        self.recall_k = recall_k
+        self._recalled_message = None
+        # The keys of the snippets appended to each user message
+        self._recalled_keys = []
+        if DefaultConfig.metrics_port:
+            start_metrics_server(DefaultConfig.metrics_port)
+        if DefaultConfig.tracing_exporter:
+            setup_tracing(DefaultConfig.tracing_exporter, DefaultConfig.tracing_path)
 
-    async def solve(self, debug=False, max_input_tokens=64 * 1024, feedback=False):
+    def recall_memory(self):
+        """
+        Append the snippets of the memory notes relevant to the latest user message to it,
+        once per message and without repeating snippets already recalled.
+        """
+        if not self.recall_tokens:
+            return
+        message = next(
+            (m for m in reversed(self.agent.messages) if m["role"] == "user"), None
+        )
+        if message is None or message is self._recalled_message:
+            return
+        self._recalled_message = message
+        if not isinstance(message.get("content"), str) or not message["content"]:
+            return
+        snippets = get_note_index().recall(
+            message["content"],
+            k=self.recall_k,
+            max_tokens=self.recall_tokens,
+            exclude={key for _, keys in self._recalled_keys for key in keys},
+        )
+        if not snippets:
+            return
+        self._recalled_keys.append((message, {snippet.key for snippet in snippets}))
+        message["content"] += (
+            "\n\n<recalled_memory>\nNotes from earlier work that may be relevant:\n\n"
+            + format_snippets(snippets)
+            + "\n</recalled_memory>"
+        )
+        logger.info(f"Recalled {len(snippets)} snippets of memory notes")
 
-        while True:
+    async def step(self, debug=False, max_input_tokens=64 * 1024):
+        step_start = time.perf_counter()
+        with profile_phase("recall"):
+            # Reads and may re-index the notes on disk
+            await run_with_policy(ExecutionPolicy.THREAD, self.recall_memory)
+        REACT_STEP_SECONDS.labels(phase="recall").observe(
+            time.perf_counter() - step_start
+        )
+
+        start = time.perf_counter()
+        with profile_phase("count_tokens"):
             token_nums = self.agent.calc_token_nums()
-            if token_nums > max_input_tokens:
-                logger.warning(
-                    f"Token nums {token_nums} exceeds max input tokens {max_input_tokens}"
-                )
-                await self.memory_manager.summarize()
+        REACT_STEP_SECONDS.labels(phase="count_tokens").observe(
+            time.perf_counter() - start
+        )
+        trace.get_current_span().set_attribute("react.token_nums", token_nums)
+        if token_nums > max_input_tokens:
+            logger.warning(
+                f"Token nums {token_nums} exceeds max input tokens {max_input_tokens}"
+            )
+            await self.memory_manager.summarize()
+            # Snippets may be recalled again once the message they were appended to is dropped
+            self._recalled_keys = [
+                (message, keys)
+                for message, keys in self._recalled_keys
+                if any(message is m for m in self.agent.messages)
+            ]
 
+        start = time.perf_counter()
+        with profile_phase("print_history"):
             self.agent.print_history()
             logger.info(f"Token nums: {token_nums}")
+        REACT_STEP_SECONDS.labels(phase="print_history").observe(
+            time.perf_counter() - start
+        )
 
-            if debug:
-                input("Press Enter to continue...")
+        if debug:
+            input("Press Enter to continue...")
 
+        start = time.perf_counter()
+        with profile_phase("invoke"):
             _, tool_calls, content = await self.agent.invoke()
-            if not tool_calls:
-                logger.info(f"Final answer: {content}")
-                if feedback:
-                    res = input("Please provide feedback: ").strip()
-                    if res:
-                        self.agent.append_user_message(res)
-                        continue
-                return content
+        REACT_STEP_SECONDS.labels(phase="invoke").observe(time.perf_counter() - start)
+        REACT_STEP_SECONDS.labels(phase="step").observe(
+            time.perf_counter() - step_start
+        )
+        return tool_calls, content
+
+    async def solve(
+        self,
+        debug=False,
+        max_input_tokens=64 * 1024,
+        feedback=False,
+        profiler: StepProfiler = None,
+    ):
+
+        profiling = profiler.activate() if profiler else contextlib.nullcontext()
+        with tracer.start_as_current_span("react.solve") as span, profiling:
+            step = 0
+            while True:
+                step += 1
+                span.set_attribute("react.steps", step)
+                with tracer.start_as_current_span("react.step") as step_span:
+                    step_span.set_attribute("react.step", step)
+                    with profiler.step(step) if profiler else contextlib.nullcontext():
+                        tool_calls, content = await self.step(debug, max_input_tokens)
+
+                if not tool_calls:
+                    logger.info(f"Final answer: {content}")
+                    if feedback:
+                        res = input("Please provide feedback: ").strip()
+                        if res:
+                            self.agent.append_user_message(res)
+                            continue
+                    return content
 
 
 if __name__ == "__main__":
@@ -45,7 +150,16 @@ if __name__ == "__main__":
 
     from src.tools.bash.bash_tool import BashTool
     from src.tools.text.view_tool import ViewTool
-    from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+    from src.tools.text.edit_tool import (
+        CreateFileTool,
+        EditFileTool,
+        InsertFileTool,
+        ReplaceFileTool,
+    )
+    from src.tools.text.search_tool import SearchTool
+    from src.tools.code.symbol_tool import SymbolGraphTool
+    from src.tools.memory.graph_tool import MemoryGraphTool
+    from src.tools.memory.recall_tool import RecallTool
     from src.tools.plan.todo_tool import TodoTool
 
     from src.llms.anthropic import (
@@ -65,6 +179,11 @@ if __name__ == "__main__":
                 CreateFileTool(),
                 InsertFileTool(),
                 ReplaceFileTool(),
+                EditFileTool(),
+                SearchTool(root="C:\\Users\\hylnb\\Workspace\\deploy\\valuecell"),
+                SymbolGraphTool(root="C:\\Users\\hylnb\\Workspace\\deploy\\valuecell"),
+                MemoryGraphTool(),
+                RecallTool(),
                 TodoTool(session_id=uuid.uuid4().hex),
             ],
             include_mcp_tools=False,
@@ -3,7 +3,12 @@ from src.agents.react import ReAct
 from src.llms.agent import Agent
 from src.tools.registry import ToolRegistry
 from src.tools.text.view_tool import ViewTool
-from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+from src.tools.text.edit_tool import (
+    CreateFileTool,
+    EditFileTool,
+    InsertFileTool,
+    ReplaceFileTool,
+)
 from src.llms.anthropic import (
     get_anthropic_client,
     get_anthropic_response_with_cache,
@@ -44,6 +49,7 @@ async def meta_learn(experience_file: str, skill_file: str):
             CreateFileTool(),
             InsertFileTool(),
             ReplaceFileTool(),
+            EditFileTool(),
         ],
         include_mcp_tools=False,
     )
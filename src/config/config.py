@@ -22,6 +22,11 @@ class Config(ConfigParser):
             "providers", "anthropic", "reasoning_model"
         )
         self.mcp_servers = self.get("mcpServers")
+        self.metrics_port = self.get("metrics", "port")
+        self.tracing_exporter = self.get("tracing", "exporter")
+        self.tracing_path = self.get(
+            "tracing", "path", default=os.path.join(".cache", "trace", "spans.jsonl")
+        )
 
 
 DefaultConfig = Config()
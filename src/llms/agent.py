@@ -6,6 +6,8 @@ from src.utils.util import num_tokens
 from src.utils.log import logger
 from src.tools.base import ToolCall
 from src.utils.tracer import Tracer
+from src.utils.tracing import tracer
+from src.utils.profiler import profile_phase
 
 
 class Agent:
@@ -71,86 +73,94 @@ class Agent:
             self._tracer.trace(msg)
 
     async def invoke(self, input=None):
-        if input:
-            self.append_user_message(input)
-
-        response = self._invoke(
-            client=self._client,
-            messages=self.messages,
-            tools=self.tools.get_tool_schemas(),
-        )
-
-        message = {
-            "role": "assistant",
-        }
-        if hasattr(response.choices[0].message, "content"):
-            if response.choices[0].message.content:
-                content = response.choices[0].message.content
-                message["content"] = content
-            else:
-                content = None
-
-        if hasattr(response.choices[0].message, "reasoning_content"):
-            reasoning_content = response.choices[0].message.reasoning_content
-            message["reasoning_content"] = reasoning_content
-        else:
-            reasoning_content = None
+        with tracer.start_as_current_span("agent.invoke") as span:
+            if input:
+                self.append_user_message(input)
+
+            with profile_phase("build_request"):
+                tools = self.tools.get_tool_schemas()
+
+            with profile_phase("model_wait"):
+                response = self._invoke(
+                    client=self._client,
+                    messages=self.messages,
+                    tools=tools,
+                )
 
-        if hasattr(response.choices[0].message, "tool_calls"):
-            if response.choices[0].message.tool_calls:
-                tool_calls = response.choices[0].message.tool_calls
-            else:
-                tool_calls = None
-        else:
-            tool_calls = None
-
-        if tool_calls:
-            message["tool_calls"] = [
-                {
-                    "id": tool_call.id,
-                    "type": tool_call.type,
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": tool_call.function.arguments,
-                    },
+            with profile_phase("parse_response"):
+                message = {
+                    "role": "assistant",
                 }
-                for tool_call in tool_calls
-            ]
-        self.append_message(message)
-        logger.info(f"Agent produced response: {message}")
-
-        if reasoning_content:
-            logger.info(f"Agent produced reasoning_content: {reasoning_content}")
-
-        if tool_calls:
-            logger.info(f"Agent produced tool_calls: {tool_calls}")
-            for tool_call in tool_calls:
-                tool_result = str(
-                    await self.tools.execute_tool_call(
-                        ToolCall(
-                            id=tool_call.id,
-                            tool_name=tool_call.function.name,
-                            tool_args=tool_call.function.arguments,
+                if hasattr(response.choices[0].message, "content"):
+                    if response.choices[0].message.content:
+                        content = response.choices[0].message.content
+                        message["content"] = content
+                    else:
+                        content = None
+
+                if hasattr(response.choices[0].message, "reasoning_content"):
+                    reasoning_content = response.choices[0].message.reasoning_content
+                    message["reasoning_content"] = reasoning_content
+                else:
+                    reasoning_content = None
+
+                if hasattr(response.choices[0].message, "tool_calls"):
+                    if response.choices[0].message.tool_calls:
+                        tool_calls = response.choices[0].message.tool_calls
+                    else:
+                        tool_calls = None
+                else:
+                    tool_calls = None
+
+                if tool_calls:
+                    message["tool_calls"] = [
+                        {
+                            "id": tool_call.id,
+                            "type": tool_call.type,
+                            "function": {
+                                "name": tool_call.function.name,
+                                "arguments": tool_call.function.arguments,
+                            },
+                        }
+                        for tool_call in tool_calls
+                    ]
+                self.append_message(message)
+                logger.info(f"Agent produced response: {message}")
+
+            if reasoning_content:
+                logger.info(f"Agent produced reasoning_content: {reasoning_content}")
+
+            if tool_calls:
+                logger.info(f"Agent produced tool_calls: {tool_calls}")
+                for tool_call in tool_calls:
+                    tool_result = str(
+                        await self.tools.execute_tool_call(
+                            ToolCall(
+                                id=tool_call.id,
+                                tool_name=tool_call.function.name,
+                                tool_args=tool_call.function.arguments,
+                            )
                         )
                     )
-                )
 
-                self.append_message(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": tool_result,
-                    }
-                )
+                    self.append_message(
+                        {
+                            "role": "tool",
+                            "tool_call_id": tool_call.id,
+                            "content": tool_result,
+                        }
+                    )
 
-                logger.info(
-                    f"The tool {tool_call.function.name} produced result: {tool_result}"
-                )
+                    logger.info(
+                        f"The tool {tool_call.function.name} produced result: {tool_result}"
+                    )
 
-        if content:
-            logger.info(f"Agent produced content: {content}")
+            if content:
+                logger.info(f"Agent produced content: {content}")
 
-        return reasoning_content, tool_calls, content
+            span.set_attribute("agent.messages", len(self.messages))
+            span.set_attribute("agent.tool_calls", len(tool_calls or []))
+            return reasoning_content, tool_calls, content
 
     def clear_reasoning_content(self):
         for message in self.messages:
@@ -170,7 +180,12 @@ if __name__ == "__main__":
 
     from src.tools.bash.bash_tool import BashTool
     from src.tools.text.view_tool import ViewTool
-    from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+    from src.tools.text.edit_tool import (
+        CreateFileTool,
+        EditFileTool,
+        InsertFileTool,
+        ReplaceFileTool,
+    )
 
     async def main():
         tool_registry = ToolRegistry(
@@ -180,6 +195,7 @@ if __name__ == "__main__":
                 CreateFileTool(),
                 InsertFileTool(),
                 ReplaceFileTool(),
+                EditFileTool(),
             ]
         )
         agent = Agent(tools=tool_registry, tracer=Tracer(".cache/trace/tracer.txt"))
@@ -1,7 +1,10 @@
+import time
 from openai import OpenAI
 
 from src.config.config import DefaultConfig
 from src.llms.cache import get_response_with_cache
+from src.utils.metrics import record_llm_response
+from src.utils.tracing import tracer, record_llm_span
 
 
 def get_anthropic_client(
@@ -24,12 +27,18 @@ def get_anthropic_response(
     model_name: str = DefaultConfig.anthropic_reasoning_model,
     **kwargs,
 ):
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=messages,
-        tools=tools,
-        **kwargs,
-    )
+    with tracer.start_as_current_span("llm.request") as span:
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            tools=tools,
+            **kwargs,
+        )
+        record_llm_response(
+            "anthropic", model_name, time.perf_counter() - start, response
+        )
+        record_llm_span(span, "anthropic", model_name, response)
     return response
 
 
@@ -2,6 +2,8 @@ import hashlib
 import json
 import os
 from openai.types.chat.chat_completion import ChatCompletion
+from src.utils.metrics import LLM_CACHE_REQUESTS
+from src.utils.tracing import tracer
 
 
 def get_response_with_cache(
@@ -14,13 +16,18 @@ def get_response_with_cache(
 ):
     cache_key = hashlib.md5(f"_{messages}_{tools}".encode()).hexdigest()
     if cache_path:
-        try:
-            with open(f"{cache_path}/{cache_key}", "r") as f:
-                response = json.load(f)
-                response = ChatCompletion(**response)
-                return response
-        except Exception:
-            pass
+        with tracer.start_as_current_span("llm.cache_lookup") as span:
+            try:
+                with open(f"{cache_path}/{cache_key}", "r") as f:
+                    response = json.load(f)
+                    response = ChatCompletion(**response)
+                    LLM_CACHE_REQUESTS.labels(result="hit").inc()
+                    span.set_attribute("cache.hit", True)
+                    return response
+            except Exception:
+                pass
+            LLM_CACHE_REQUESTS.labels(result="miss").inc()
+            span.set_attribute("cache.hit", False)
 
     response = invoke(client=client, messages=messages, tools=tools, **kwargs)
     if cache_path:
@@ -1,7 +1,10 @@
+import time
 from openai import OpenAI
 
 from src.config.config import DefaultConfig
 from src.llms.cache import get_response_with_cache
+from src.utils.metrics import record_llm_response
+from src.utils.tracing import tracer, record_llm_span
 
 
 def get_deepseek_client(
@@ -25,13 +28,19 @@ def get_deepseek_response(
     model_name: str = DefaultConfig.deepseek_reasoning_model,
     **kwargs,
 ):
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=messages,
-        tools=tools,
-        extra_body=extra_body,
-        **kwargs,
-    )
+    with tracer.start_as_current_span("llm.request") as span:
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            tools=tools,
+            extra_body=extra_body,
+            **kwargs,
+        )
+        record_llm_response(
+            "deepseek", model_name, time.perf_counter() - start, response
+        )
+        record_llm_span(span, "deepseek", model_name, response)
     return response
 
 
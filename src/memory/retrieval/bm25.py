@@ -0,0 +1,207 @@
+"""
+Offline BM25 ranking of text documents.
+
+Functionality:
+    - Ranks documents by Okapi BM25 over word tokens. CJK characters are tokens on
+      their own, so notes written in Chinese are searchable without a segmenter.
+    - Optionally re-ranks the best BM25 candidates by the cosine similarity of hashed
+      character n-gram vectors, which rewards partial identifiers, inflections and CJK
+      phrases that single tokens miss. The vectors are stored as compact arrays.
+    - Documents can be added and removed one by one, the statistics are kept exact.
+
+Everything runs locally, no model or network is involved.
+
+Usage:
+    index = BM25Index(ngram_dims=1 << 16)
+    index.add("note.md#0", "The api service listens on port 8080")
+    index.search("which port does the api use", k=3)
+"""
+
+import re
+import math
+import zlib
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Kana, CJK ideographs and Hangul are tokens character by character
+_TOKEN_PATTERN = re.compile(
+    r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]"
+)
+_SPACES = re.compile(r"\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lowercase word tokens. Identifiers are also split at underscores,
+    and every CJK character is a token.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def hashed_ngrams(text: str, dims: int, n: int = 3) -> Dict[int, float]:
+    """
+    Embed a text as an L2-normalized vector of hashed character n-gram counts.
+
+    Args:
+        text (str): The text.
+        dims (int): The number of hash buckets.
+        n (int, optional): The n-gram length.
+
+    Returns:
+        Dict[int, float]: The non-zero weights by bucket.
+    """
+    text = _SPACES.sub(" ", text.lower()).strip()
+    counts = Counter(
+        zlib.crc32(text[i : i + n].encode("utf-8")) % dims
+        for i in range(len(text) - n + 1)
+    )
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    return {bucket: count / norm for bucket, count in counts.items()} if norm else {}
+
+
+class BM25Index:
+    """
+    An incremental BM25 index of documents identified by keys.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, ngram_dims: int = 0):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1 (float, optional): The term frequency saturation of BM25.
+            b (float, optional): The document length normalization of BM25.
+            ngram_dims (int, optional): The buckets of the hashed n-gram vectors, 0 to
+                rank by BM25 only.
+        """
+        self.k1 = k1
+        self.b = b
+        self.ngram_dims = ngram_dims
+        # key -> (token count, distinct tokens, payload)
+        self.docs: Dict[str, Tuple[int, List[str], Any]] = {}
+        # token -> key -> term frequency
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        # key -> (buckets, weights) of the n-gram vector
+        self.vectors: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.docs
+
+    def add(self, key: str, text: str, payload: Any = None):
+        """
+        Index a document, replacing the document with the same key.
+
+        Args:
+            key (str): The key of the document.
+            text (str): The text to index.
+            payload (Any, optional): Data returned with the document, e.g. its location.
+        """
+        self.remove(key)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        for token, count in counts.items():
+            self.postings.setdefault(token, {})[key] = count
+        self.docs[key] = (len(tokens), list(counts), payload)
+        self.total_length += len(tokens)
+        if self.ngram_dims:
+            vector = hashed_ngrams(text, self.ngram_dims)
+            self.vectors[key] = (array("I", vector), array("f", vector.values()))
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove a document.
+
+        Args:
+            key (str): The key of the document.
+
+        Returns:
+            bool: False if the document was not indexed.
+        """
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return False
+        length, tokens, _ = doc
+        self.total_length -= length
+        for token in tokens:
+            keys = self.postings[token]
+            del keys[key]
+            if not keys:
+                del self.postings[token]
+        self.vectors.pop(key, None)
+        return True
+
+    def payload(self, key: str) -> Any:
+        return self.docs[key][2]
+
+    def _bm25(self, tokens: List[str]) -> Dict[str, float]:
+        count = len(self.docs)
+        average_length = self.total_length / count if count else 0.0
+        scores: Dict[str, float] = {}
+        for token in set(tokens):
+            keys = self.postings.get(token)
+            if not keys:
+                continue
+            idf = math.log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key, frequency in keys.items():
+                length = self.docs[key][0]
+                norm = self.k1 * (1 - self.b + self.b * length / (average_length or 1))
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (
+                    frequency + norm
+                )
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        ngram_weight: float = 0.3,
+        candidates: int = 50,
+        exclude: Optional[set] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank the documents for a query.
+
+        Args:
+            query (str): The query text.
+            k (int, optional): The number of documents returned.
+            ngram_weight (float, optional): The weight of the n-gram cosine similarity,
+                added to the BM25 score normalized by the best one.
+            candidates (int, optional): The number of best BM25 documents re-ranked with
+                the n-gram similarity.
+            exclude (set, optional): Keys of documents not to return.
+
+        Returns:
+            List[Tuple[str, float]]: The best (key, score) pairs, best first.
+        """
+        scores = self._bm25(tokenize(query))
+        if exclude:
+            scores = {key: score for key, score in scores.items() if key not in exclude}
+        if not scores:
+            return []
+        best = max(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if not self.ngram_dims or not ngram_weight:
+            return [(key, score / best) for key, score in ranked[:k]]
+
+        query_vector = hashed_ngrams(query, self.ngram_dims)
+        reranked = []
+        for key, score in ranked[: max(k, candidates)]:
+            buckets, weights = self.vectors[key]
+            similarity = sum(
+                query_vector.get(bucket, 0.0) * weight
+                for bucket, weight in zip(buckets, weights)
+            )
+            reranked.append((key, score / best + ngram_weight * similarity))
+        reranked.sort(key=lambda item: (-item[1], item[0]))
+        return reranked[:k]
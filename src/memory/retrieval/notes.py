@@ -0,0 +1,336 @@
+"""
+Incremental recall index of the short-term memory notes.
+
+Functionality:
+    - Indexes the markdown notes under `.contextify/short_term_memory/`: the context and
+      progress notes, and the summaries of compacted conversations.
+    - Splits notes into chunks at headings and paragraphs, so recall returns the
+      relevant snippets instead of whole notes.
+    - Re-indexes only the notes whose modification time changed, and persists the index
+      under `.cache/recall`, so the cost of a query does not grow with the sessions.
+      Notes written through our file tools are picked up by the next recall.
+    - Fits the recalled snippets in a token budget.
+
+Usage:
+    index = get_note_index(".contextify/short_term_memory")
+    snippets = index.recall("why did the deployment fail", k=5, max_tokens=1000)
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Set, Tuple
+from src.memory.retrieval.bm25 import BM25Index
+from src.tools.text.changes import add_change_listener
+from src.utils.log import logger
+from src.utils.util import num_tokens
+
+NOTE_DIRECTORIES = ["context", "progress", "summaries"]
+
+_INDEX_VERSION = 1
+_CHUNK_CHARS = 1200
+_MAX_CHUNK_CHARS = 2400
+_NGRAM_DIMS = 1 << 18
+
+
+class Snippet(BaseModel):
+    """
+    A recalled part of a note.
+
+    Attributes:
+        key (str): The key of the chunk, `<path>#<index>`.
+        path (str): The path of the note.
+        start_line (int): The 1-based first line of the snippet.
+        end_line (int): The 1-based last line of the snippet.
+        text (str): The text of the snippet.
+        score (float): The relevance, higher first.
+    """
+
+    key: str
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+    score: float = 0.0
+
+
+def split_chunks(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Split a markdown note into chunks, starting a new chunk at each heading, and at
+    paragraph breaks once a chunk is long enough.
+
+    Args:
+        text (str): The note.
+
+    Returns:
+        List[Tuple[int, int, str]]: The 1-based first and last line and the text of each chunk.
+    """
+    chunks = []
+    lines: List[str] = []
+    start = 1
+    size = 0
+
+    def flush(end: int):
+        nonlocal lines, size
+        chunk = "\n".join(lines).strip()
+        if chunk:
+            chunks.append((start, end, chunk))
+        lines, size = [], 0
+
+    for number, line in enumerate(text.splitlines(), 1):
+        is_heading = line.startswith("#")
+        if lines and (
+            is_heading
+            or (size >= _CHUNK_CHARS and not line.strip())
+            or size + len(line) > _MAX_CHUNK_CHARS
+        ):
+            flush(number - 1)
+        if not lines:
+            start = number
+        lines.append(line)
+        size += len(line) + 1
+    flush(start + len(lines) - 1)
+    return chunks
+
+
+class NoteIndex:
+    """
+    A BM25 index of the notes under one memory directory.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        cache_dir: str = os.path.join(".cache", "recall"),
+        refresh_interval: float = 5.0,
+    ):
+        """
+        Initialize the index, loading its persisted state if any.
+
+        Args:
+            root (str): The memory directory, e.g. `.contextify/short_term_memory`.
+            cache_dir (str, optional): The directory holding the persisted indexes.
+            refresh_interval (float, optional): The seconds between scans of the notes for changes.
+        """
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(os.path.abspath(cache_dir), f"{digest}.pkl")
+
+        self.bm25 = BM25Index(ngram_dims=_NGRAM_DIMS)
+        # (mtime_ns, size) and chunk keys, by note path
+        self.notes: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return
+        if state.get("version") != _INDEX_VERSION or state.get("root") != self.root:
+            return
+        self.bm25 = state["bm25"]
+        self.notes = state["notes"]
+
+    def save(self):
+        """
+        Persist the index atomically.
+        """
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._lock:
+            state = {
+                "version": _INDEX_VERSION,
+                "root": self.root,
+                "bm25": self.bm25,
+                "notes": self.notes,
+            }
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.cache_path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        notes = {}
+        for directory in NOTE_DIRECTORIES:
+            try:
+                entries = list(os.scandir(os.path.join(self.root, directory)))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".md"):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        notes[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return notes
+
+    def _remove(self, path: str):
+        _, keys = self.notes.pop(path)
+        for key in keys:
+            self.bm25.remove(key)
+
+    def _add(self, path: str, stamp: Tuple[int, int]):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            return
+        keys = []
+        for i, (start_line, end_line, chunk) in enumerate(split_chunks(text)):
+            key = f"{path}#{i}"
+            self.bm25.add(key, chunk, (path, start_line, end_line, chunk))
+            keys.append(key)
+        self.notes[path] = (stamp, keys)
+
+    def refresh(self, force: bool = False):
+        """
+        Re-index the notes changed since the previous refresh.
+
+        Args:
+            force (bool, optional): Whether to scan the notes regardless of the interval.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+            on_disk = self._scan()
+            changed = False
+            for path in list(self.notes):
+                if on_disk.get(path) != self.notes[path][0]:
+                    self._remove(path)
+                    changed = True
+            for path, stamp in on_disk.items():
+                if path not in self.notes:
+                    self._add(path, stamp)
+                    changed = True
+            if changed:
+                try:
+                    self.save()
+                except OSError as e:
+                    logger.warning(
+                        f"Saving the recall index of {self.root} failed: {e}"
+                    )
+
+    def notify(self):
+        """
+        Make the next recall scan the notes for changes.
+        """
+        self._last_refresh = 0.0
+
+    def recall(
+        self,
+        query: str,
+        k: int = 5,
+        max_tokens: int = 1000,
+        exclude: Optional[Set[str]] = None,
+    ) -> List[Snippet]:
+        """
+        Find the snippets of notes most relevant to a query.
+
+        Args:
+            query (str): The query, e.g. the task at hand.
+            k (int, optional): The maximum number of snippets.
+            max_tokens (int, optional): The token budget of the snippets. Lower-ranked
+                snippets that do not fit are left out, a single snippet is truncated.
+            exclude (Set[str], optional): Keys of snippets not to return, e.g. those
+                already in the context.
+
+        Returns:
+            List[Snippet]: The snippets, best first.
+        """
+        self.refresh()
+        with self._lock:
+            ranked = self.bm25.search(query, k=k, exclude=exclude)
+            payloads = [(key, score, self.bm25.payload(key)) for key, score in ranked]
+
+        snippets = []
+        budget = max_tokens
+        for key, score, (path, start_line, end_line, text) in payloads:
+            tokens = num_tokens(text)
+            if tokens > budget:
+                if snippets:
+                    continue
+                # Keep the start of a single snippet exceeding the budget on its own
+                text = text[: budget * 3] + "\n..."
+                tokens = budget
+            snippets.append(
+                Snippet(
+                    key=key,
+                    path=path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    text=text,
+                    score=score,
+                )
+            )
+            budget -= tokens
+        return snippets
+
+
+def format_snippets(snippets: List[Snippet]) -> str:
+    """
+    Render recalled snippets with their locations.
+
+    Args:
+        snippets (List[Snippet]): The snippets.
+
+    Returns:
+        str: The snippets, each under a `[path:start-end]` header.
+    """
+    return "\n\n".join(
+        f"[{snippet.path}:{snippet.start_line}-{snippet.end_line}]\n{snippet.text}"
+        for snippet in snippets
+    )
+
+
+_note_indexes: Dict[str, NoteIndex] = {}
+_note_indexes_lock = threading.Lock()
+
+
+def get_note_index(
+    root: str = os.path.join(".contextify", "short_term_memory"),
+) -> NoteIndex:
+    """
+    Get the index of a memory directory, shared by all recalls in this process.
+
+    Args:
+        root (str, optional): The memory directory.
+
+    Returns:
+        NoteIndex: The index.
+    """
+    root = os.path.abspath(root)
+    with _note_indexes_lock:
+        index = _note_indexes.get(root)
+        if index is None:
+            index = _note_indexes[root] = NoteIndex(root)
+        return index
+
+
+def _on_file_changed(path: str):
+    with _note_indexes_lock:
+        indexes = list(_note_indexes.values())
+    for index in indexes:
+        if path.startswith(index.root + os.sep):
+            index.notify()
+
+
+add_change_listener(_on_file_changed)
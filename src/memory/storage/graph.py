@@ -0,0 +1,710 @@
+"""
+Embedded property graph, in memory or persisted.
+
+Functionality:
+    - Nodes have an id, a kind and a dictionary of properties.
+    - Edges have a kind and properties, at most one edge of a kind between two nodes.
+    - Outgoing and incoming adjacency lists are indexed by edge kind, and nodes are
+      indexed by kind and by their `name` property, so lookups do not scan the graph.
+    - Removing a node removes its edges.
+    - Bounded neighborhood and shortest path queries.
+    - `GraphStore` persists a graph as an append-only JSON lines log with compaction,
+      and validates properties against per-kind pydantic models.
+
+Usage:
+    graph = Graph()
+    graph.add_node("file:a.py", "file", name="a.py")
+    graph.add_node("symbol:a.py:main", "function", name="main")
+    graph.add_edge("file:a.py", "contains", "symbol:a.py:main")
+    graph.find("main")
+    graph.out_edges("file:a.py", "contains")
+    graph.neighborhood("file:a.py", depth=2)
+
+    store = get_graph_store(".contextify/long_term_memory/graph.jsonl")
+    store.add_node("api", "service", name="api", port=8080)
+"""
+
+import os
+import json
+import tempfile
+import threading
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
+from src.utils.log import logger
+
+Properties = Dict[str, Any]
+# (source, kind, target, properties)
+Edge = Tuple[str, str, str, Properties]
+
+
+class Node:
+    """
+    A node of the graph.
+    """
+
+    __slots__ = ("id", "kind", "properties")
+
+    def __init__(self, id: str, kind: str, properties: Properties):
+        self.id = id
+        self.kind = kind
+        self.properties = properties
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.properties.get(key, default)
+
+    def __repr__(self) -> str:
+        return f"Node({self.id!r}, {self.kind!r}, {self.properties!r})"
+
+
+class Graph:
+    """
+    A directed multigraph whose nodes and edges have kinds and properties.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        # source -> edge kind -> target -> edge properties
+        self._out: Dict[str, Dict[str, Dict[str, Properties]]] = {}
+        # target -> edge kind -> sources
+        self._in: Dict[str, Dict[str, Set[str]]] = {}
+        self._by_kind: Dict[str, Set[str]] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        self.edge_count = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def _unindex(self, node: Node):
+        self._by_kind[node.kind].discard(node.id)
+        if not self._by_kind[node.kind]:
+            del self._by_kind[node.kind]
+        name = node.properties.get("name")
+        if name is not None:
+            self._by_name[name].discard(node.id)
+            if not self._by_name[name]:
+                del self._by_name[name]
+
+    def add_node(self, node_id: str, kind: str, **properties) -> Node:
+        """
+        Add a node, or replace the kind and properties of an existing one while keeping
+        its edges.
+
+        Args:
+            node_id (str): The id of the node.
+            kind (str): The kind of the node.
+            **properties: The properties of the node.
+
+        Returns:
+            Node: The node.
+        """
+        node = self.nodes.get(node_id)
+        if node is not None:
+            self._unindex(node)
+            node.kind = kind
+            node.properties = properties
+        else:
+            node = self.nodes[node_id] = Node(node_id, kind, properties)
+        self._by_kind.setdefault(kind, set()).add(node_id)
+        name = properties.get("name")
+        if name is not None:
+            self._by_name.setdefault(name, set()).add(node_id)
+        return node
+
+    def get_node(self, node_id: str) -> Optional[Node]:
+        return self.nodes.get(node_id)
+
+    def remove_node(self, node_id: str) -> bool:
+        """
+        Remove a node and its edges.
+
+        Args:
+            node_id (str): The id of the node.
+
+        Returns:
+            bool: False if the node did not exist.
+        """
+        node = self.nodes.pop(node_id, None)
+        if node is None:
+            return False
+        self._unindex(node)
+        for kind, targets in self._out.pop(node_id, {}).items():
+            for target in targets:
+                self._discard_in(target, kind, node_id)
+                self.edge_count -= 1
+        for kind, sources in self._in.pop(node_id, {}).items():
+            for source in sources:
+                by_kind = self._out[source]
+                del by_kind[kind][node_id]
+                if not by_kind[kind]:
+                    del by_kind[kind]
+                    if not by_kind:
+                        del self._out[source]
+                self.edge_count -= 1
+        return True
+
+    def _discard_in(self, target: str, kind: str, source: str):
+        by_kind = self._in.get(target)
+        if by_kind is None:
+            return
+        sources = by_kind.get(kind)
+        if sources is None:
+            return
+        sources.discard(source)
+        if not sources:
+            del by_kind[kind]
+            if not by_kind:
+                del self._in[target]
+
+    def add_edge(self, source: str, kind: str, target: str, **properties):
+        """
+        Add an edge between two existing nodes, replacing the properties of an existing
+        edge of the same kind.
+
+        Args:
+            source (str): The id of the source node.
+            kind (str): The kind of the edge.
+            target (str): The id of the target node.
+            **properties: The properties of the edge.
+
+        Raises:
+            KeyError: If a node does not exist.
+        """
+        for node_id in (source, target):
+            if node_id not in self.nodes:
+                raise KeyError(f"Node {node_id} does not exist.")
+        targets = self._out.setdefault(source, {}).setdefault(kind, {})
+        if target not in targets:
+            self.edge_count += 1
+            self._in.setdefault(target, {}).setdefault(kind, set()).add(source)
+        targets[target] = properties
+
+    def remove_edge(self, source: str, kind: str, target: str) -> bool:
+        """
+        Remove an edge.
+
+        Returns:
+            bool: False if the edge did not exist.
+        """
+        by_kind = self._out.get(source)
+        if by_kind is None or target not in by_kind.get(kind, {}):
+            return False
+        del by_kind[kind][target]
+        if not by_kind[kind]:
+            del by_kind[kind]
+            if not by_kind:
+                del self._out[source]
+        self._discard_in(target, kind, source)
+        self.edge_count -= 1
+        return True
+
+    def get_edge(self, source: str, kind: str, target: str) -> Optional[Properties]:
+        return self._out.get(source, {}).get(kind, {}).get(target)
+
+    def out_edges(
+        self, node_id: str, kind: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, Properties]]:
+        """
+        Iterate over the outgoing edges of a node.
+
+        Args:
+            node_id (str): The id of the node.
+            kind (str, optional): Only edges of this kind.
+
+        Returns:
+            Iterator[Tuple[str, str, Properties]]: The (kind, target, properties) of each edge.
+        """
+        by_kind = self._out.get(node_id, {})
+        kinds = [kind] if kind is not None else list(by_kind)
+        for edge_kind in kinds:
+            for target, properties in by_kind.get(edge_kind, {}).items():
+                yield edge_kind, target, properties
+
+    def in_edges(
+        self, node_id: str, kind: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, Properties]]:
+        """
+        Iterate over the incoming edges of a node.
+
+        Args:
+            node_id (str): The id of the node.
+            kind (str, optional): Only edges of this kind.
+
+        Returns:
+            Iterator[Tuple[str, str, Properties]]: The (kind, source, properties) of each edge.
+        """
+        by_kind = self._in.get(node_id, {})
+        kinds = [kind] if kind is not None else list(by_kind)
+        for edge_kind in kinds:
+            for source in by_kind.get(edge_kind, ()):
+                yield edge_kind, source, self._out[source][edge_kind][node_id]
+
+    def degree(self, node_id: str) -> int:
+        """
+        Count the incoming and outgoing edges of a node.
+        """
+        return sum(
+            len(targets) for targets in self._out.get(node_id, {}).values()
+        ) + sum(len(sources) for sources in self._in.get(node_id, {}).values())
+
+    def all_nodes(self) -> List[Node]:
+        return list(self.nodes.values())
+
+    def nodes_of_kind(self, kind: str) -> List[Node]:
+        return [self.nodes[node_id] for node_id in self._by_kind.get(kind, ())]
+
+    def find(self, name: str, kinds: Optional[Set[str]] = None) -> List[Node]:
+        """
+        Find the nodes with a `name` property.
+
+        Args:
+            name (str): The name.
+            kinds (Set[str], optional): Only nodes of these kinds.
+
+        Returns:
+            List[Node]: The nodes, sorted by id.
+        """
+        nodes = [self.nodes[node_id] for node_id in self._by_name.get(name, ())]
+        if kinds is not None:
+            nodes = [node for node in nodes if node.kind in kinds]
+        return sorted(nodes, key=lambda node: node.id)
+
+    def edges(self) -> Iterator[Edge]:
+        """
+        Iterate over all the edges.
+
+        Returns:
+            Iterator[Edge]: The (source, kind, target, properties) of each edge.
+        """
+        for source, by_kind in self._out.items():
+            for kind, targets in by_kind.items():
+                for target, properties in targets.items():
+                    yield source, kind, target, properties
+
+    def _adjacent(
+        self, node_id: str, edge_kinds: Optional[Set[str]], direction: str
+    ) -> Iterator[Tuple[str, Edge]]:
+        """
+        Iterate over the edges of a node as (neighbor, edge) pairs.
+        """
+        if direction in ("out", "both"):
+            for kind, targets in self._out.get(node_id, {}).items():
+                if edge_kinds is None or kind in edge_kinds:
+                    for target, properties in targets.items():
+                        yield target, (node_id, kind, target, properties)
+        if direction in ("in", "both"):
+            for kind, sources in self._in.get(node_id, {}).items():
+                if edge_kinds is None or kind in edge_kinds:
+                    for source in sources:
+                        properties = self._out[source][kind][node_id]
+                        yield source, (source, kind, node_id, properties)
+
+    def neighborhood(
+        self,
+        node_id: str,
+        depth: int = 1,
+        edge_kinds: Optional[Set[str]] = None,
+        direction: str = "both",
+        max_nodes: int = 50,
+    ) -> Tuple[List[Node], List[Edge]]:
+        """
+        Collect the nodes within `depth` edges of a node, breadth first.
+
+        Args:
+            node_id (str): The id of the start node.
+            depth (int, optional): The maximum number of edges from the start node.
+            edge_kinds (Set[str], optional): Only follow edges of these kinds.
+            direction (str, optional): Follow `out`, `in` or `both` directions.
+            max_nodes (int, optional): Stop once this many nodes are collected.
+
+        Returns:
+            Tuple[List[Node], List[Edge]]: The nodes, nearest first and starting with the
+                start node, and the edges between them. Empty if the node does not exist.
+        """
+        if node_id not in self.nodes:
+            return [], []
+        seen = {node_id}
+        order = [node_id]
+        frontier = [node_id]
+        for _ in range(depth):
+            next_frontier = []
+            for current in frontier:
+                for neighbor, _ in self._adjacent(current, edge_kinds, direction):
+                    if neighbor in seen or len(order) >= max_nodes:
+                        continue
+                    seen.add(neighbor)
+                    order.append(neighbor)
+                    next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        edges = []
+        for current in order:
+            for neighbor, edge in self._adjacent(current, edge_kinds, "out"):
+                if neighbor in seen:
+                    edges.append(edge)
+        return [self.nodes[current] for current in order], edges
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        max_depth: int = 4,
+        edge_kinds: Optional[Set[str]] = None,
+        direction: str = "both",
+        max_visited: int = 10000,
+    ) -> Optional[List[Edge]]:
+        """
+        Find a shortest path between two nodes, searching breadth first from both ends.
+
+        Args:
+            source (str): The id of the start node.
+            target (str): The id of the end node.
+            max_depth (int, optional): The maximum number of edges of the path.
+            edge_kinds (Set[str], optional): Only follow edges of these kinds.
+            direction (str, optional): Follow edges `out` of the source towards the
+                target, or in `both` directions.
+            max_visited (int, optional): Give up after visiting this many nodes.
+
+        Returns:
+            Optional[List[Edge]]: The edges of the path in order, empty if the nodes are
+                the same, or None if there is no path within the bounds.
+        """
+        if source not in self.nodes or target not in self.nodes:
+            return None
+        if source == target:
+            return []
+        reverse = {"out": "in", "in": "out", "both": "both"}[direction]
+        # node -> (previous node, edge) on each side
+        parents = [{source: None}, {target: None}]
+        frontiers = [[source], [target]]
+        directions = [direction, reverse]
+        for _ in range(max_depth):
+            # Expand the smaller side
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            next_frontier = []
+            for current in frontiers[side]:
+                for neighbor, edge in self._adjacent(
+                    current, edge_kinds, directions[side]
+                ):
+                    if neighbor in parents[side]:
+                        continue
+                    parents[side][neighbor] = (current, edge)
+                    if neighbor in parents[1 - side]:
+                        return self._join_path(parents, neighbor)
+                    next_frontier.append(neighbor)
+            if not next_frontier:
+                return None
+            frontiers[side] = next_frontier
+            if len(parents[0]) + len(parents[1]) > max_visited:
+                return None
+        return None
+
+    @staticmethod
+    def _join_path(parents: List[Dict], meeting: str) -> List[Edge]:
+        path = []
+        current = meeting
+        while parents[0][current] is not None:
+            current, edge = parents[0][current]
+            path.append(edge)
+        path.reverse()
+        current = meeting
+        while parents[1][current] is not None:
+            current, edge = parents[1][current]
+            path.append(edge)
+        return path
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def check_properties(properties: Properties) -> Properties:
+    """
+    Check that property values can be stored: strings, numbers, booleans, None, or
+    lists of those.
+
+    Args:
+        properties (Properties): The properties.
+
+    Raises:
+        ValueError: If a value has another type.
+
+    Returns:
+        Properties: The properties.
+    """
+    for key, value in properties.items():
+        if isinstance(value, list):
+            if all(isinstance(item, _SCALARS) for item in value):
+                continue
+        elif isinstance(value, _SCALARS):
+            continue
+        raise ValueError(
+            f"Property `{key}` has the unsupported type {type(value).__name__}."
+        )
+    return properties
+
+
+class GraphStore(Graph):
+    """
+    A graph persisted as an append-only log of JSON lines.
+
+    Every change is appended to the log, and the log is rewritten with only the current
+    nodes and edges once most of its entries are outdated. Opening the store replays
+    the log, ignoring a last line cut short by a crash.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        node_schemas: Optional[Dict[str, Type[BaseModel]]] = None,
+        edge_schemas: Optional[Dict[str, Type[BaseModel]]] = None,
+        fsync: bool = False,
+    ):
+        """
+        Open a store, creating it if needed.
+
+        Args:
+            path (str): The path of the log file.
+            node_schemas (Dict[str, Type[BaseModel]], optional): Models validating the
+                properties of the nodes of a kind.
+            edge_schemas (Dict[str, Type[BaseModel]], optional): Models validating the
+                properties of the edges of a kind.
+            fsync (bool, optional): Whether to sync the log to disk after every change.
+        """
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.node_schemas = node_schemas or {}
+        self.edge_schemas = edge_schemas or {}
+        self.fsync = fsync
+        self.log_entries = 0
+        self._file = None
+        self._lock = threading.RLock()
+        self._replay()
+
+    def _replay(self):
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        corrupt = False
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    op = entry["op"]
+                    if op == "node":
+                        Graph.add_node(
+                            self, entry["id"], entry["kind"], **entry["properties"]
+                        )
+                    elif op == "remove_node":
+                        Graph.remove_node(self, entry["id"])
+                    elif op == "edge":
+                        Graph.add_edge(
+                            self,
+                            entry["source"],
+                            entry["kind"],
+                            entry["target"],
+                            **entry["properties"],
+                        )
+                    elif op == "remove_edge":
+                        Graph.remove_edge(
+                            self, entry["source"], entry["kind"], entry["target"]
+                        )
+                except (ValueError, KeyError, TypeError):
+                    corrupt = True
+                    continue
+                self.log_entries += 1
+        if corrupt:
+            logger.warning(f"Skipped unreadable entries of the graph log {self.path}.")
+            self.compact()
+
+    def _append(self, entry: Dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.log_entries += 1
+        if self.log_entries > 1000 and self.log_entries > 2 * (
+            len(self.nodes) + self.edge_count
+        ):
+            self.compact()
+
+    def _validate(
+        self, schemas: Dict[str, Type[BaseModel]], kind: str, properties: Properties
+    ) -> Properties:
+        schema = schemas.get(kind)
+        if schema is not None:
+            try:
+                properties = schema.model_validate(properties).model_dump()
+            except ValidationError as e:
+                raise ValueError(f"Invalid properties for `{kind}`: {e}")
+        return check_properties(properties)
+
+    def add_node(self, node_id: str, kind: str, **properties) -> Node:
+        properties = self._validate(self.node_schemas, kind, properties)
+        with self._lock:
+            node = super().add_node(node_id, kind, **properties)
+            self._append(
+                {"op": "node", "id": node_id, "kind": kind, "properties": properties}
+            )
+            return node
+
+    def remove_node(self, node_id: str) -> bool:
+        with self._lock:
+            if not super().remove_node(node_id):
+                return False
+            self._append({"op": "remove_node", "id": node_id})
+            return True
+
+    def add_edge(self, source: str, kind: str, target: str, **properties):
+        properties = self._validate(self.edge_schemas, kind, properties)
+        with self._lock:
+            super().add_edge(source, kind, target, **properties)
+            self._append(
+                {
+                    "op": "edge",
+                    "source": source,
+                    "kind": kind,
+                    "target": target,
+                    "properties": properties,
+                }
+            )
+
+    def remove_edge(self, source: str, kind: str, target: str) -> bool:
+        with self._lock:
+            if not super().remove_edge(source, kind, target):
+                return False
+            self._append(
+                {"op": "remove_edge", "source": source, "kind": kind, "target": target}
+            )
+            return True
+
+    # Reads hold the lock as well, writes from other threads resize the indexes
+
+    def get_node(self, node_id: str) -> Optional[Node]:
+        with self._lock:
+            return super().get_node(node_id)
+
+    def get_edge(self, source: str, kind: str, target: str) -> Optional[Properties]:
+        with self._lock:
+            return super().get_edge(source, kind, target)
+
+    def out_edges(
+        self, node_id: str, kind: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, Properties]]:
+        with self._lock:
+            return iter(list(super().out_edges(node_id, kind)))
+
+    def in_edges(
+        self, node_id: str, kind: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, Properties]]:
+        with self._lock:
+            return iter(list(super().in_edges(node_id, kind)))
+
+    def degree(self, node_id: str) -> int:
+        with self._lock:
+            return super().degree(node_id)
+
+    def all_nodes(self) -> List[Node]:
+        with self._lock:
+            return super().all_nodes()
+
+    def nodes_of_kind(self, kind: str) -> List[Node]:
+        with self._lock:
+            return super().nodes_of_kind(kind)
+
+    def find(self, name: str, kinds: Optional[Set[str]] = None) -> List[Node]:
+        with self._lock:
+            return super().find(name, kinds)
+
+    def edges(self) -> Iterator[Edge]:
+        with self._lock:
+            return iter(list(super().edges()))
+
+    def neighborhood(
+        self, node_id: str, *args, **kwargs
+    ) -> Tuple[List[Node], List[Edge]]:
+        with self._lock:
+            return super().neighborhood(node_id, *args, **kwargs)
+
+    def shortest_path(
+        self, source: str, target: str, *args, **kwargs
+    ) -> Optional[List[Edge]]:
+        with self._lock:
+            return super().shortest_path(source, target, *args, **kwargs)
+
+    def compact(self):
+        """
+        Rewrite the log atomically with only the current nodes and edges.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    for node in self.nodes.values():
+                        entry = {
+                            "op": "node",
+                            "id": node.id,
+                            "kind": node.kind,
+                            "properties": node.properties,
+                        }
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    for source, kind, target, properties in self.edges():
+                        entry = {
+                            "op": "edge",
+                            "source": source,
+                            "kind": kind,
+                            "target": target,
+                            "properties": properties,
+                        }
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self.log_entries = len(self.nodes) + self.edge_count
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_stores: Dict[str, GraphStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_graph_store(path: str) -> GraphStore:
+    """
+    Get the store of a log file, shared by all users in this process.
+
+    Args:
+        path (str): The path of the log file.
+
+    Returns:
+        GraphStore: The store.
+    """
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = GraphStore(path)
+        return store
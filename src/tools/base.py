@@ -1,8 +1,9 @@
 import json
-from typing import Type, Dict, Callable
+from typing import Any, Type, Dict, Callable, List
 from pydantic import BaseModel, Field
 from abc import ABC
 import asyncio
+from src.tools.policy import ExecutionPolicy, run_with_policy
 
 
 def is_pydantic_model(obj):
@@ -42,12 +43,15 @@ class ToolResult(BaseModel):
         output (str): The output of the tool execution if successful.
         error (str): The error message if the tool execution failed.
         success (bool): True if the execution was successful, False otherwise.
+        metadata (Dict[str, Any]): Extra figures about the execution, e.g. resource usage.
+            They are kept out of the string form sent to the model.
     """
 
     id: str = ""
     output: str = ""
     error: str = ""
     success: bool = False
+    metadata: Dict[str, Any] = Field(default_factory=dict, repr=False)
 
 
 class Tool(ABC):
@@ -65,6 +69,8 @@ class Tool(ABC):
         description: str = None,
         parameters: Type[BaseModel] | Dict = None,
         callback: Callable[[Dict], ToolResult] = None,
+        pure: bool = False,
+        execution_policy: ExecutionPolicy = ExecutionPolicy.INLINE,
     ):
         """
         Initialize the tool.
@@ -74,11 +80,18 @@ class Tool(ABC):
             description (str, optional): A brief description of what the tool does.
             parameters (Type[BaseModel] | Dict, optional): The parameters schema for the tool, either as a Pydantic model or a dictionary.
             callback (Callable[[Dict], ToolResult], optional): The callback function to execute the tool.
+            pure (bool, optional): Whether the tool result only depends on its arguments and the
+                state of the paths returned by `get_cache_paths`. Pure tools may have their results memoized.
+            execution_policy (ExecutionPolicy, optional): Where the tool body runs. Tools with a blocking or
+                CPU-heavy body implement the synchronous `_run` method and use the THREAD or PROCESS policy
+                so that they do not block the event loop.
         """
         self.name = name
         self.description = description
         self.parameters = parameters
         self.callback = callback
+        self.pure = pure
+        self.execution_policy = execution_policy
 
     def get_name(self) -> str:
         """
@@ -127,6 +140,44 @@ class Tool(ABC):
             },
         }
 
+    def get_cache_paths(self, **kwargs) -> List[str]:
+        """
+        Get the filesystem paths whose state the result of a pure tool depends on.
+
+        Args:
+            **kwargs: The validated arguments for the tool execution.
+
+        Returns:
+            List[str]: The paths to fingerprint when memoizing the result.
+        """
+        return []
+
+    def get_modified_paths(self, **kwargs) -> List[str]:
+        """
+        Get the filesystem paths that executing the tool may modify.
+
+        Args:
+            **kwargs: The validated arguments for the tool execution.
+
+        Returns:
+            List[str]: The paths whose memoized results must be invalidated.
+        """
+        return []
+
+    def parse_args(self, tool_args: str) -> Dict:
+        """
+        Validate the JSON arguments of a tool call against the parameters schema.
+
+        Args:
+            tool_args (str): The arguments for the tool call as a JSON string.
+
+        Returns:
+            Dict: The validated arguments.
+        """
+        if is_pydantic_model(self.get_parameters()):
+            return self.get_parameters().model_validate_json(tool_args).model_dump()
+        return json.loads(tool_args)
+
     async def execute(self, tool_call: ToolCall) -> ToolResult:
         """
         Execute the tool with the given arguments.
@@ -140,23 +191,20 @@ class Tool(ABC):
         result = ToolResult(id=tool_call.id, success=False)
 
         try:
-            if is_pydantic_model(self.get_parameters()):
-                args = (
-                    self.get_parameters()
-                    .model_validate_json(tool_call.tool_args)
-                    .model_dump()
-                )
-            else:
-                args = json.loads(tool_call.tool_args)
+            args = self.parse_args(tool_call.tool_args)
         except Exception as e:
             result.error = f"Validating the tool `{tool_call.tool_name}` with args `{tool_call.tool_args}` failed: {str(e)}"
             return result
 
         try:
-            res = await self._execute(**args)
+            if self.execution_policy == ExecutionPolicy.INLINE:
+                res = await self._execute(**args)
+            else:
+                res = await run_with_policy(self.execution_policy, self._run, **args)
             result.output = res.output
             result.error = res.error
             result.success = res.success
+            result.metadata = res.metadata
             return result
         except Exception as e:
             result.error = f"Executing the tool `{tool_call.tool_name}` with args `{tool_call.tool_args}` failed: {str(e)}"
@@ -176,7 +224,22 @@ class Tool(ABC):
             if asyncio.iscoroutinefunction(self.callback):
                 return await self.callback(kwargs)
             return self.callback(kwargs)
-        raise NotImplementedError("Must implement _execute method")
+        return self._run(**kwargs)
+
+    def _run(self, **kwargs) -> ToolResult:
+        """
+        Execute the tool synchronously with the given arguments.
+
+        This is the body dispatched to the shared pools for tools whose execution
+        policy is not INLINE.
+
+        Args:
+            **kwargs: The arguments for the tool execution.
+
+        Returns:
+            ToolResult: The result of the tool execution.
+        """
+        raise NotImplementedError("Must implement _execute or _run method")
 
     async def close(self):
         """
@@ -1,5 +1,50 @@
 import os
+import time
+import shlex
+import codecs
+import signal
 import asyncio
+from typing import Optional
+from pydantic import BaseModel
+from src.tools.bash.output import OutputCapture
+from src.tools.bash.resources import (
+    OutputBudget,
+    ResourceLimits,
+    ResourceUsage,
+    UsageMonitor,
+    terminate_session_children,
+    wrap_with_limits,
+)
+from src.utils.metrics import record_bash_command
+
+
+class CommandResult(BaseModel):
+    """
+    Represents the result of a command run in a BashTerminal.
+
+    Attributes:
+        output (str): The stdout of the command.
+        error (str): The stderr of the command, followed by the reason it did not complete if any.
+        exit_code (Optional[int]): The exit status of the command, None if it did not complete.
+        timed_out (bool): True if the command did not complete within the output timeout.
+        output_limit_exceeded (bool): True if the command was terminated for exceeding its output limit.
+        output_path (Optional[str]): The file holding the full stdout if it was truncated.
+        error_path (Optional[str]): The file holding the full stderr if it was truncated.
+        usage (ResourceUsage): The resources consumed by the command.
+    """
+
+    output: str = ""
+    error: str = ""
+    exit_code: Optional[int] = None
+    timed_out: bool = False
+    output_limit_exceeded: bool = False
+    output_path: Optional[str] = None
+    error_path: Optional[str] = None
+    usage: ResourceUsage = ResourceUsage()
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
 
 
 class BashTerminal:
@@ -8,13 +53,27 @@ class BashTerminal:
         self,
         cwd: str = None,
         delimiter: str = f"<terminal-command-exit-{os.urandom(4).hex()}>",
-        output_delay: float = 0.2,
         output_timeout: int = 60 * 3,
+        read_size: int = 64 * 1024,
+        head_size: int = 8000,
+        tail_size: int = 8000,
+        output_dir: str = os.path.join(".cache", "bash"),
+        limits: ResourceLimits = None,
+        drain_timeout: float = 5.0,
     ):
         self._cwd = cwd
         self._delimiter = delimiter
-        self._output_delay = output_delay
         self._output_timeout = output_timeout
+        self._read_size = read_size
+        self._head_size = head_size
+        self._tail_size = tail_size
+        self._limits = limits
+        self._drain_timeout = drain_timeout
+        # Large outputs of the session are spilled to files under a directory of its own
+        self._output_dir = os.path.abspath(
+            os.path.join(output_dir, os.urandom(4).hex())
+        )
+        self._sequence = 0
         self._process: asyncio.subprocess.Process = None
 
     def _get_bash_shell_process(self):
@@ -41,6 +100,14 @@ class BashTerminal:
             cwd=self._cwd,
         )
 
+    @property
+    def cwd(self) -> Optional[str]:
+        return self._cwd
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
     async def start(self):
         if self._process:
             return
@@ -55,64 +122,263 @@ class BashTerminal:
             return
 
         try:
-            self._process.terminate()
+            if self._process.returncode is None:
+                if os.name != "nt":
+                    # The shell leads its own session, stop the commands it runs as well
+                    os.killpg(self._process.pid, signal.SIGTERM)
+                else:
+                    self._process.terminate()
             await asyncio.wait_for(self._process.communicate(), timeout=5.0)
+        except ProcessLookupError:
+            pass
         except asyncio.TimeoutError:
             try:
-                self._process.kill()
+                if os.name != "nt":
+                    os.killpg(self._process.pid, signal.SIGKILL)
+                else:
+                    self._process.kill()
                 await asyncio.wait_for(self._process.communicate(), timeout=5.0)
             except asyncio.TimeoutError:
                 pass
         finally:
             self._process = None
 
-    def _get_command(self, cmd: str):
-        cmd = cmd.strip()
-        if not cmd.endswith(";"):
-            cmd += ";"
-        cmd += f" echo '{self._delimiter}'\n"
-        return cmd
+    async def get_cwd(self) -> Optional[str]:
+        """
+        Get the current working directory of the shell, which `cd` commands may have changed.
 
-    def _decode_buffer(self, buffer: bytes):
-        try:
-            return buffer.decode("utf-8")
-        except Exception:
-            return buffer.decode("utf-8", errors="replace")
+        Returns:
+            Optional[str]: The working directory, or the initial one if the shell is not running.
+        """
+        if not self._process:
+            return self._cwd
+        result = await self.run("pwd" if os.name != "nt" else "(Get-Location).Path")
+        return result.output.strip() if result.success else self._cwd
+
+    async def reset(self) -> bool:
+        """
+        Reset the shell to a clean state for its next user.
+
+        On bash the shell replaces itself with a new one started in the initial working
+        directory with the environment of the Python process, which drops variables,
+        functions, aliases and options. PowerShell only returns to the initial directory.
+
+        Returns:
+            bool: True if the shell is ready for the next command.
+        """
+        if not self.running:
+            return False
+        cwd = self._cwd or os.getcwd()
+        if os.name != "nt":
+            env = " ".join(shlex.quote(f"{k}={v}") for k, v in os.environ.items())
+            cmd = f"cd -- {shlex.quote(cwd)} && exec env -i {env} /bin/bash"
+        else:
+            cmd = f"Set-Location -LiteralPath '{cwd}'"
+        result = await self.run(cmd)
+        return result.success and self.running
+
+    def _get_command(self, cmd: str, delimiter: str):
+        # The sentinel goes on its own line so that a trailing `&`, comment or heredoc
+        # in the command cannot swallow it. It carries the exit status on stdout and
+        # marks the end of stderr, so both streams are drained before returning.
+        if os.name != "nt":
+            sentinel = f"echo \"{delimiter}$?\"; echo '{delimiter}' >&2"
+        else:
+            sentinel = (
+                "$__exit_code = if ($?) { 0 } elseif ($LASTEXITCODE) { $LASTEXITCODE } else { 1 }; "
+                f'echo "{delimiter}$__exit_code"; '
+                f"[Console]::Error.WriteLine('{delimiter}')"
+            )
+        return f"{cmd.strip()}\n{sentinel}\n"
+
+    async def _read_until_delimiter(
+        self,
+        stream: asyncio.StreamReader,
+        sequence: int,
+        capture: OutputCapture,
+        budget: OutputBudget,
+    ) -> str:
+        """
+        Stream a stream into a capture as data arrives, until the sentinel of a command.
+
+        The delimiter is searched on the raw bytes and decoded incrementally. The last
+        `len(delimiter) - 1` bytes are held back from the decoder, since they may be the
+        start of a delimiter split across two reads. Sentinels of earlier timed out
+        commands that completed meanwhile are dropped.
+
+        Args:
+            stream (asyncio.StreamReader): The stdout or stderr of the shell.
+            sequence (int): The number of the command to wait for.
+            capture (OutputCapture): The capture receiving the decoded output.
+            budget (OutputBudget): The output budget shared by both streams. The output
+                up to the budget is captured, the rest is dropped while waiting for the
+                sentinel.
+
+        Returns:
+            str: The rest of the sentinel line, i.e. the exit status on stdout.
+        """
+        delimiter = self._delimiter.encode("utf-8")
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = bytearray()
+
+        def emit(data: bytes, final: bool = False):
+            # Keep the output up to the budget, the sentinels do not count
+            kept = budget.consume(len(data))
+            text = decoder.decode(data[:kept], final)
+            if text:
+                capture.write(text)
 
-    async def run(self, cmd: str):
+        while True:
+            index = pending.find(delimiter)
+            newline = pending.find(b"\n", index) if index >= 0 else -1
+            if newline >= 0:
+                emit(bytes(pending[:index]))
+                line = pending[index + len(delimiter) : newline]
+                del pending[: newline + 1]
+                number, _, status = line.decode("utf-8", errors="replace").partition(
+                    ":"
+                )
+                if number == str(sequence):
+                    emit(b"", final=True)
+                    return status.strip()
+                continue
+
+            if index < 0:
+                safe = len(pending) - len(delimiter) + 1
+                if safe > 0:
+                    emit(bytes(pending[:safe]))
+                    del pending[:safe]
+
+            chunk = await stream.read(self._read_size)
+            if not chunk:
+                emit(bytes(pending), final=True)
+                raise EOFError("The shell exited before the command completed.")
+            pending += chunk
+
+    def _terminate_command(self):
+        if self.running and os.name != "nt":
+            terminate_session_children(self._process.pid)
+
+    async def run(
+        self, cmd: str, limits: Optional[ResourceLimits] = None
+    ) -> CommandResult:
+        """
+        Run a command in the shell and wait for it to complete.
+
+        A command exceeding the output timeout is terminated and its remaining output
+        is drained, so the next command starts clean. If it does not stop within the
+        drain timeout, the shell is stopped and a new one runs the next command.
+
+        Args:
+            cmd (str): The command.
+            limits (ResourceLimits, optional): The resource limits of the command,
+                defaulting to the limits of the terminal.
+
+        Returns:
+            CommandResult: The output, exit code and resource usage of the command.
+        """
         if not self._process:
             await self.start()
+        limits = limits or self._limits
 
-        output = ""
-        stderr = ""
+        # Number the sentinels, so that the late sentinel of a timed out command
+        # is not mistaken for the end of the next one
+        self._sequence += 1
+        sequence = self._sequence
+        delimiter = f"{self._delimiter}{sequence}:"
 
-        self._process.stdin.write(self._get_command(cmd).encode("utf-8"))
-        await self._process.stdin.drain()
+        output = OutputCapture(
+            os.path.join(self._output_dir, f"{sequence}.stdout.log"),
+            head_size=self._head_size,
+            tail_size=self._tail_size,
+        )
+        stderr = OutputCapture(
+            os.path.join(self._output_dir, f"{sequence}.stderr.log"),
+            head_size=self._head_size,
+            tail_size=self._tail_size,
+        )
+        budget = OutputBudget(
+            limits.output_bytes if limits else None, self._terminate_command
+        )
+        usage = ResourceUsage()
+        monitor = UsageMonitor(self._process.pid)
+        start = time.perf_counter()
 
-        try:
-            async with asyncio.timeout(self._output_timeout):
+        command = self._get_command(wrap_with_limits(cmd, limits), delimiter)
+        self._process.stdin.write(command.encode("utf-8"))
+        await self._process.stdin.drain()
+        monitor.start()
 
-                while True:
-                    await asyncio.sleep(self._output_delay)
+        stdout_task = asyncio.create_task(
+            self._read_until_delimiter(self._process.stdout, sequence, output, budget)
+        )
+        stderr_task = asyncio.create_task(
+            self._read_until_delimiter(self._process.stderr, sequence, stderr, budget)
+        )
 
-                    output += self._decode_buffer(self._process.stdout._buffer)
-                    stderr += self._decode_buffer(self._process.stderr._buffer)
+        exit_code = None
+        timed_out = False
+        error = ""
+        tasks = (stdout_task, stderr_task)
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self._output_timeout)
+            if pending:
+                timed_out = True
+                error = f"Command timed out after {self._output_timeout} seconds."
+                # Stop the command and drain its output up to the sentinel, so that
+                # it is not read as the output of the next command
+                self._terminate_command()
+                _, pending = await asyncio.wait(tasks, timeout=self._drain_timeout)
+            if not pending:
+                status = stdout_task.result()
+                stderr_task.result()
+                if not timed_out:
+                    exit_code = int(status) if status.lstrip("-").isdigit() else None
 
-                    if stderr:
-                        break
+        except EOFError:
+            # The shell exited, e.g. on `exit N`, its status is the one of the command
+            try:
+                exit_code = await asyncio.wait_for(
+                    self._process.wait(), timeout=self._drain_timeout
+                )
+            except TimeoutError:
+                error = "The shell closed its output before the command completed."
+        except Exception as e:
+            error = f"{e}"
 
-                    if self._delimiter in output:
-                        output = output[: output.index(self._delimiter)]
-                        break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            output.close()
+            stderr.close()
+            usage.wall_seconds = time.perf_counter() - start
+            usage.output_bytes = budget.used
+            await monitor.stop(usage)
 
-        except Exception as e:
-            if not stderr:
-                stderr = f"{e}"
+        if budget.exceeded:
+            error = f"{error}\nThe output exceeded the limit of {budget.limit} bytes, the command was terminated.".strip()
 
-        self._process.stdout._buffer.clear()
-        self._process.stderr._buffer.clear()
+        if self._process.stdout.at_eof() or (timed_out and pending):
+            # The shell exited, e.g. on `exit`, or is still busy with a command that
+            # ignored the termination; start a new one on the next command
+            await self.stop()
 
-        return output.strip(), stderr.strip()
+        error_text = stderr.getvalue().strip()
+        if error:
+            error_text = f"{error_text}\n{error}" if error_text else error
+        result = CommandResult(
+            output=output.getvalue().strip(),
+            error=error_text,
+            exit_code=exit_code,
+            timed_out=timed_out,
+            output_limit_exceeded=budget.exceeded,
+            output_path=output.spill_path if output.truncated else None,
+            error_path=stderr.spill_path if stderr.truncated else None,
+            usage=usage,
+        )
+        record_bash_command(result)
+        return result
 
 
 if __name__ == "__main__":
@@ -120,6 +386,10 @@ if __name__ == "__main__":
     async def main():
         terminal = BashTerminal()
         try:
+            res = await terminal.run("pwd")
+            print(res)
+            res = await terminal.run("ls non_existent_file; echo done")
+            print(res)
             # res = await terminal.run("ls")
             res = await terminal.run("docker --version")
             # res = await terminal.run("echo $Env:PATH")
@@ -1,8 +1,12 @@
+import asyncio
 from pydantic import BaseModel, Field
-from typing import override
+from typing import Literal, Optional, override
 
 from src.tools.base import Tool, ToolResult
-from src.tools.bash.bash_terminal import BashTerminal
+from src.tools.bash.bash_terminal import BashTerminal, CommandResult
+from src.tools.bash.jobs import BashJobManager
+from src.tools.bash.pool import TerminalPool
+from src.tools.bash.resources import ResourceLimits
 
 
 class BashArgs(BaseModel):
@@ -11,44 +15,188 @@ class BashArgs(BaseModel):
         default=False,
         description="Whether to restart the bash session. Default is False, meaning the session will be persistent.",
     )
+    background: bool = Field(
+        default=False,
+        description="Whether to start the command as a background job and return its job id immediately. "
+        "Use it for long-running commands such as builds, then follow the job with the `bash_job` tool.",
+    )
+    isolated: bool = Field(
+        default=False,
+        description="Whether to run the command in a fresh shell instead of the persistent session. "
+        "Isolated commands run in parallel and do not see or change the state of the session.",
+    )
 
 
 class BashTool(Tool):
 
-    def __init__(self, cwd: str = None):
-        self._terminal = BashTerminal(cwd)
+    def __init__(
+        self,
+        cwd: str = None,
+        jobs: BashJobManager = None,
+        pool: TerminalPool = None,
+        limits: ResourceLimits = None,
+    ):
+        """
+        Initialize the bash tool.
+
+        Args:
+            cwd (str, optional): The initial working directory of the shells.
+            jobs (BashJobManager, optional): The manager of the background jobs.
+            pool (TerminalPool, optional): A pool of pre-spawned shells, which may be shared
+                with other bash tools, e.g. of sub-agents. A private pool is used by default.
+            limits (ResourceLimits, optional): Per-command limits on CPU seconds, address
+                space and output bytes. CPU and memory limits run commands in a subshell,
+                so `cd` and `export` do not persist while they are set.
+        """
+        self._cwd = cwd
+        self._owns_pool = pool is None
+        self._pool = pool or TerminalPool()
+        self._limits = limits
+        self._terminal: Optional[BashTerminal] = None
+        self._lock = asyncio.Lock()
+        self.jobs = jobs or BashJobManager()
         super().__init__(
             name="bash",
-            description="Executes a given bash command in a persistent shell session and returns the stdout and stderr.",
+            description="Executes a given bash command in a persistent shell session and returns the stdout, the stderr and the exit code.",
             parameters=BashArgs,
         )
 
     @override
     async def close(self):
-        await self._terminal.stop()
+        await self.jobs.close()
+        if self._terminal is not None:
+            await self._pool.release(self._terminal)
+            self._terminal = None
+        if self._owns_pool:
+            await self._pool.close()
 
-    @override
-    async def _execute(self, command: str, restart: bool = False) -> ToolResult:
-        if restart and self._terminal:
-            await self._terminal.stop()
+    async def _get_terminal(self) -> BashTerminal:
+        if self._terminal is None or not self._terminal.running:
+            self._terminal = await self._pool.acquire(self._cwd)
+        return self._terminal
+
+    async def _restart(self):
+        # The replacement shell is already warm, the old one stops in the background
+        if self._terminal is not None:
+            await self._pool.discard(self._terminal)
+            self._terminal = None
 
-        output, stderr = await self._terminal.run(command)
+    def _to_tool_result(self, result: CommandResult) -> ToolResult:
+        output, stderr = result.output, result.error
 
-        # 判断长度，如果长度超过16000, 只保留最后16000个字符
-        if len(output) > 16000:
-            output = output[-16000:]
-        if len(stderr) > 16000:
-            stderr = stderr[-16000:]
+        # Warnings on stderr do not fail a command, its exit status does
+        if result.exit_code not in (0, None):
+            stderr = f"{stderr}\nExit code: {result.exit_code}".strip()
 
         return ToolResult(
             output=output,
             error=stderr,
-            success=not stderr,
+            success=result.success,
+            metadata={"exit_code": result.exit_code, **result.usage.model_dump()},
+        )
+
+    async def _run_isolated(self, command: str) -> ToolResult:
+        terminal = await self._pool.acquire(self._cwd)
+        try:
+            result = await terminal.run(command, limits=self._limits)
+        except BaseException:
+            await self._pool.discard(terminal)
+            raise
+        if terminal.running:
+            await self._pool.release(terminal)
+        else:
+            await self._pool.discard(terminal)
+        return self._to_tool_result(result)
+
+    @override
+    async def _execute(
+        self,
+        command: str,
+        restart: bool = False,
+        background: bool = False,
+        isolated: bool = False,
+    ) -> ToolResult:
+        if isolated and not background:
+            return await self._run_isolated(command)
+
+        async with self._lock:
+            if restart:
+                await self._restart()
+            terminal = await self._get_terminal()
+
+            if background:
+                # Jobs start in the directory the persistent shell has `cd`-ed into
+                job = await self.jobs.start(command, cwd=await terminal.get_cwd())
+                return ToolResult(
+                    output=f"Started job {job.job_id}. Follow it with the `bash_job` tool, its output is written to {job.log_path}.",
+                    success=True,
+                )
+
+            # The terminal keeps the head and tail of long outputs and spills them to files
+            result = await terminal.run(command, limits=self._limits)
+            tool_result = self._to_tool_result(result)
+
+            if result.timed_out:
+                # The terminal stopped the command, or restarted if it could not
+                restarted = not terminal.running
+                tool_result.error += (
+                    "\nThe shell session was restarted."
+                    if restarted
+                    else "\nThe command was terminated."
+                ) + " Run long commands with `background` set to true."
+
+            return tool_result
+
+
+class BashJobArgs(BaseModel):
+    action: Literal["poll", "wait", "kill", "list"] = Field(
+        description="'poll' returns the status and the output produced since the last poll, "
+        "'wait' waits for the job to exit at most `timeout` seconds and then polls it, "
+        "'kill' terminates the job and its child processes, 'list' lists all jobs."
+    )
+    job_id: Optional[str] = Field(
+        default=None, description="The id of the job, required unless action is 'list'."
+    )
+    timeout: float = Field(
+        default=60, description="The maximum seconds to wait when action is 'wait'."
+    )
+
+
+class BashJobTool(Tool):
+    """
+    A companion of BashTool following the background jobs it started.
+    """
+
+    def __init__(self, bash_tool: BashTool):
+        self.jobs = bash_tool.jobs
+        super().__init__(
+            name="bash_job",
+            description="Polls, waits for or kills the background jobs started by the `bash` tool.",
+            parameters=BashJobArgs,
         )
 
+    @override
+    async def _execute(
+        self, action: str, job_id: Optional[str] = None, timeout: float = 60
+    ) -> ToolResult:
+        try:
+            if action == "list":
+                jobs = self.jobs.list()
+                output = "\n".join(job.describe() for job in jobs) or "No jobs."
+            elif job_id is None:
+                return ToolResult(error="`job_id` is required.", success=False)
+            elif action == "poll":
+                output = self.jobs.poll(job_id)
+            elif action == "wait":
+                output = await self.jobs.wait(job_id, timeout)
+            else:
+                output = await self.jobs.kill(job_id)
+        except KeyError as e:
+            return ToolResult(error=str(e.args[0]), success=False)
+        return ToolResult(output=output, success=True)
+
 
 if __name__ == "__main__":
-    import asyncio
     from src.tools.registry import ToolRegistry
     from src.tools.base import ToolCall
 
@@ -103,6 +251,25 @@ if __name__ == "__main__":
         )
         print(res)
 
+        # Test 6: Background job
+        print("\n" + "-" * 50)
+        print("Test 6: Background job")
+        tool_registry = ToolRegistry(tools=[tool, BashJobTool(tool)])
+        res = await tool_registry.execute_tool_call(
+            ToolCall(
+                tool_name="bash",
+                tool_args='{"command":"sleep 1; echo done", "background":true}',
+            )
+        )
+        print(res)
+        res = await tool_registry.execute_tool_call(
+            ToolCall(
+                tool_name="bash_job",
+                tool_args='{"action":"wait", "job_id":"1", "timeout":5}',
+            )
+        )
+        print(res)
+
         # Cleanup
         await tool_registry.close_tools()
 
@@ -0,0 +1,244 @@
+import os
+import time
+import signal
+import asyncio
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+
+class BashJob:
+    """
+    A shell command running in the background in its own process group.
+
+    The combined stdout and stderr of the job go to a log file, so memory stays
+    constant however long the job runs, and its output can be read incrementally.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        command: str,
+        process: asyncio.subprocess.Process,
+        log_path: str,
+    ):
+        self.job_id = job_id
+        self.command = command
+        self.process = process
+        self.log_path = log_path
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._read_offset = 0
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self.process.returncode
+
+    @property
+    def running(self) -> bool:
+        return self.process.returncode is None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def read_new_output(self, max_chars: int) -> str:
+        """
+        Read the output written since the previous read.
+
+        Args:
+            max_chars (int): The maximum number of characters returned. Only the end of
+                longer outputs is returned, the full output stays in the log file.
+
+        Returns:
+            str: The new output.
+        """
+        with open(self.log_path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            # Read only the tail of a long output, no more bytes than characters returned
+            start = max(self._read_offset, end - max_chars)
+            f.seek(start)
+            data = f.read(end - start)
+        omitted = start - self._read_offset
+        self._read_offset = start + len(data)
+        if omitted:
+            # Skip the rest of a character cut by the seek
+            data = data.lstrip(bytes(range(0x80, 0xC0)))
+        text = data.decode("utf-8", errors="replace")
+        if omitted:
+            text = (
+                f"[... {omitted} bytes omitted, the full output is in {self.log_path} ...]\n"
+                + text
+            )
+        return text
+
+    def describe(self) -> str:
+        if self.running:
+            status = "running"
+        else:
+            status = f"exited with code {self.exit_code}"
+        return f"Job {self.job_id} ({status} after {self.elapsed:.1f}s): {self.command}"
+
+
+class BashJobManager:
+    """
+    Starts shell commands as background jobs and polls, waits for and kills them.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = os.path.join(".cache", "bash", "jobs"),
+        max_output_chars: int = 16000,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            output_dir (str, optional): The directory holding the job logs.
+            max_output_chars (int, optional): The maximum number of characters returned per read.
+        """
+        self.output_dir = os.path.abspath(output_dir)
+        self.max_output_chars = max_output_chars
+        self._jobs: Dict[str, BashJob] = {}
+        self._next_id = 1
+
+    def _create_process(self, command: str, cwd: Optional[str], log):
+        if os.name != "nt":
+            return asyncio.create_subprocess_exec(
+                "/bin/bash",
+                "-c",
+                command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=log,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd,
+                start_new_session=True,
+            )
+        return asyncio.create_subprocess_exec(
+            "powershell.exe",
+            "-NoLogo",
+            "-NoProfile",
+            "-Command",
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=log,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=cwd,
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+        )
+
+    async def start(self, command: str, cwd: Optional[str] = None) -> BashJob:
+        """
+        Start a command as a background job.
+
+        Args:
+            command (str): The command to run.
+            cwd (str, optional): The working directory of the job.
+
+        Returns:
+            BashJob: The started job.
+        """
+        job_id = str(self._next_id)
+        self._next_id += 1
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Job ids restart in every manager, the log name must be unique on its own
+        fd, log_path = tempfile.mkstemp(
+            prefix=f"job_{job_id}_", suffix=".log", dir=self.output_dir
+        )
+        with os.fdopen(fd, "wb") as log:
+            process = await self._create_process(command, cwd, log)
+
+        job = BashJob(job_id, command, process, log_path)
+        self._jobs[job_id] = job
+        job._watcher = asyncio.create_task(self._watch(job))
+        return job
+
+    async def _watch(self, job: BashJob):
+        await job.process.wait()
+        job.finished_at = time.monotonic()
+
+    def get(self, job_id: str) -> BashJob:
+        if job_id not in self._jobs:
+            raise KeyError(f"Unknown job `{job_id}`.")
+        return self._jobs[job_id]
+
+    def list(self) -> List[BashJob]:
+        return list(self._jobs.values())
+
+    def poll(self, job_id: str) -> str:
+        """
+        Get the status of a job and the output written since the previous poll.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            str: The status line followed by the new output.
+        """
+        job = self.get(job_id)
+        output = job.read_new_output(self.max_output_chars)
+        return f"{job.describe()}\n{output}".rstrip()
+
+    async def wait(self, job_id: str, timeout: float) -> str:
+        """
+        Wait for a job to exit, at most `timeout` seconds, then poll it.
+
+        Args:
+            job_id (str): The id of the job.
+            timeout (float): The maximum seconds to wait.
+
+        Returns:
+            str: The status line followed by the new output.
+        """
+        job = self.get(job_id)
+        try:
+            await asyncio.wait_for(asyncio.shield(job.process.wait()), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.poll(job_id)
+
+    async def kill(self, job_id: str, grace: float = 5.0) -> str:
+        """
+        Terminate the process group of a job, killing it if it outlives the grace period.
+
+        Args:
+            job_id (str): The id of the job.
+            grace (float, optional): Seconds to wait after the termination request.
+
+        Returns:
+            str: The status line followed by the new output.
+        """
+        job = self.get(job_id)
+        if job.running:
+            self._signal(job, terminate=True)
+            try:
+                await asyncio.wait_for(job.process.wait(), timeout=grace)
+            except asyncio.TimeoutError:
+                self._signal(job, terminate=False)
+                await job.process.wait()
+        return self.poll(job_id)
+
+    def _signal(self, job: BashJob, terminate: bool):
+        try:
+            if os.name != "nt":
+                os.killpg(
+                    job.process.pid, signal.SIGTERM if terminate else signal.SIGKILL
+                )
+            elif terminate:
+                job.process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                subprocess.run(
+                    ["taskkill", "/T", "/F", "/PID", str(job.process.pid)],
+                    capture_output=True,
+                )
+        except ProcessLookupError:
+            pass
+
+    async def close(self):
+        """
+        Kill all running jobs.
+        """
+        await asyncio.gather(
+            *[self.kill(job.job_id) for job in self._jobs.values() if job.running]
+        )
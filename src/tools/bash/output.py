@@ -0,0 +1,101 @@
+import os
+from collections import deque
+from typing import Deque, Optional, TextIO
+
+
+class OutputCapture:
+    """
+    Bounded capture of a streamed command output.
+
+    The first `head_size` and the last `tail_size` characters are kept in memory.
+    Once the output outgrows them, everything is spilled to `spill_path` as it
+    arrives, so memory stays constant however verbose the command is, while the
+    full output remains available on disk.
+    """
+
+    def __init__(
+        self,
+        spill_path: str,
+        head_size: int = 8000,
+        tail_size: int = 8000,
+    ):
+        """
+        Initialize the capture.
+
+        Args:
+            spill_path (str): The file receiving the full output once it is truncated.
+            head_size (int, optional): The number of leading characters kept in memory.
+            tail_size (int, optional): The number of trailing characters kept in memory.
+        """
+        self.spill_path = spill_path
+        self.head_size = head_size
+        self.tail_size = tail_size
+        self.total_chars = 0
+
+        self._head = ""
+        self._tail: Deque[str] = deque()
+        self._tail_chars = 0
+        self._spill: Optional[TextIO] = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self.head_size + self.tail_size
+
+    def _start_spill(self):
+        if os.path.dirname(self.spill_path):
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        self._spill = open(self.spill_path, "w", encoding="utf-8", newline="")
+        # Nothing was dropped yet, so head and tail still hold the whole output
+        self._spill.write(self._head)
+        self._spill.writelines(self._tail)
+
+    def write(self, text: str):
+        """
+        Append a chunk of output.
+
+        Args:
+            text (str): The decoded chunk.
+        """
+        if not text:
+            return
+        if self._spill is not None:
+            self._spill.write(text)
+        self.total_chars += len(text)
+
+        if len(self._head) < self.head_size:
+            room = self.head_size - len(self._head)
+            self._head += text[:room]
+            text = text[room:]
+            if not text:
+                return
+
+        self._tail.append(text)
+        self._tail_chars += len(text)
+        if self._spill is None and self.truncated:
+            self._start_spill()
+        while self._tail_chars - len(self._tail[0]) >= self.tail_size:
+            self._tail_chars -= len(self._tail.popleft())
+
+    def getvalue(self) -> str:
+        """
+        Get the captured output, with a notice in place of the dropped middle part.
+
+        Returns:
+            str: The head and tail of the output.
+        """
+        tail = "".join(self._tail)
+        if not self.truncated:
+            return self._head + tail
+
+        tail = tail[-self.tail_size :]
+        omitted = self.total_chars - len(self._head) - len(tail)
+        return (
+            f"{self._head}\n"
+            f"[... {omitted} characters omitted. The full output ({self.total_chars} characters) "
+            f"is saved in {self.spill_path}, page through it with the `view` tool ...]\n"
+            f"{tail}"
+        )
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
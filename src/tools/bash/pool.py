@@ -0,0 +1,130 @@
+import os
+import asyncio
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Set
+from src.tools.bash.bash_terminal import BashTerminal
+from src.utils.log import logger
+
+
+class TerminalPool:
+    """
+    A pool of pre-spawned shells per working directory.
+
+    Acquiring a shell hands out a warm one when available and spawns replacements in
+    the background, so persistent sessions, restarts and isolated commands do not pay
+    the shell spawn latency. Released shells are reset and recycled.
+
+    Shells are bound to the event loop that spawned them, so a pool is used from a
+    single event loop.
+    """
+
+    def __init__(self, size: int = 1, **terminal_kwargs):
+        """
+        Initialize the pool.
+
+        Args:
+            size (int, optional): The number of idle shells kept ready per working directory.
+            **terminal_kwargs: Keyword arguments forwarded to every BashTerminal.
+        """
+        self.size = size
+        self._terminal_kwargs = terminal_kwargs
+        self._idle: Dict[Optional[str], Deque[BashTerminal]] = defaultdict(deque)
+        self._spawning: Dict[Optional[str], int] = defaultdict(int)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    @staticmethod
+    def _key(cwd: Optional[str]) -> Optional[str]:
+        return os.path.abspath(cwd) if cwd else None
+
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _spawn(self, cwd: Optional[str]) -> BashTerminal:
+        terminal = BashTerminal(cwd, **self._terminal_kwargs)
+        await terminal.start()
+        return terminal
+
+    async def _spawn_idle(self, cwd: Optional[str]):
+        key = self._key(cwd)
+        try:
+            terminal = await self._spawn(cwd)
+        except Exception as e:
+            logger.warning(f"Pre-spawning a shell in `{cwd}` failed: {e}")
+            return
+        finally:
+            self._spawning[key] -= 1
+        if self._closed:
+            await terminal.stop()
+        else:
+            self._idle[key].append(terminal)
+
+    def _refill(self, cwd: Optional[str]):
+        key = self._key(cwd)
+        missing = self.size - len(self._idle[key]) - self._spawning[key]
+        for _ in range(max(0, missing)):
+            self._spawning[key] += 1
+            self._run_in_background(self._spawn_idle(cwd))
+
+    async def acquire(self, cwd: Optional[str] = None) -> BashTerminal:
+        """
+        Get a shell for exclusive use until it is released or discarded.
+
+        Args:
+            cwd (str, optional): The working directory of the shell.
+
+        Returns:
+            BashTerminal: A started shell.
+        """
+        idle = self._idle[self._key(cwd)]
+        terminal = None
+        while idle and terminal is None:
+            candidate = idle.popleft()
+            if candidate.running:
+                terminal = candidate
+        self._refill(cwd)
+        return terminal or await self._spawn(cwd)
+
+    async def release(self, terminal: BashTerminal):
+        """
+        Return a shell to the pool, resetting it, or stop it if the pool is full.
+
+        Args:
+            terminal (BashTerminal): The shell obtained from `acquire`.
+        """
+        idle = self._idle[self._key(terminal.cwd)]
+        if self._closed or len(idle) >= self.size:
+            await terminal.stop()
+            return
+        try:
+            ready = await terminal.reset()
+        except Exception:
+            ready = False
+        if ready:
+            idle.append(terminal)
+        else:
+            await terminal.stop()
+            self._refill(terminal.cwd)
+
+    async def discard(self, terminal: BashTerminal):
+        """
+        Stop a shell in the background, e.g. on restart, and spawn its replacement.
+
+        Args:
+            terminal (BashTerminal): The shell obtained from `acquire`.
+        """
+        self._run_in_background(terminal.stop())
+        if not self._closed:
+            self._refill(terminal.cwd)
+
+    async def close(self):
+        """
+        Stop all idle shells and the pending spawns.
+        """
+        self._closed = True
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        terminals = [terminal for idle in self._idle.values() for terminal in idle]
+        self._idle.clear()
+        await asyncio.gather(*[terminal.stop() for terminal in terminals])
@@ -0,0 +1,278 @@
+"""
+Resource accounting and limits for the commands run in a BashTerminal.
+
+Functionality:
+    - Measures the wall time, the CPU time and the peak resident memory of a command.
+    - Applies per-command limits on CPU seconds, address space and output bytes.
+
+The CPU time is the difference of the shell's own and reaped children's times in
+`/proc/<pid>/stat` around the command. The peak memory is sampled from the process
+tree of the shell, at growing intervals, so commands shorter than the first interval
+may report no peak. Both are only available on Linux.
+"""
+
+import os
+import signal
+import asyncio
+from typing import Callable, List, Optional
+from pydantic import BaseModel
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# Whether the kernel lists the children of processes, so that a process tree can be
+# walked without scanning every process
+_CHILDREN_LISTED = os.path.exists(f"/proc/self/task/{os.getpid()}/children")
+
+
+class ResourceLimits(BaseModel):
+    """
+    Per-command resource limits. Unset limits are not applied.
+
+    Attributes:
+        cpu_seconds (Optional[int]): The CPU time limit of each process, as `ulimit -t`.
+        memory_bytes (Optional[int]): The address space limit of each process, as `ulimit -v`.
+        output_bytes (Optional[int]): The combined stdout and stderr bytes after which the
+            command is terminated.
+    """
+
+    cpu_seconds: Optional[int] = None
+    memory_bytes: Optional[int] = None
+    output_bytes: Optional[int] = None
+
+
+class ResourceUsage(BaseModel):
+    """
+    Resources consumed by a command.
+
+    Attributes:
+        wall_seconds (float): The elapsed time until the command completed or was abandoned.
+        cpu_seconds (Optional[float]): The user and system CPU time of the command.
+        max_rss_bytes (Optional[int]): The sampled peak resident memory of its processes.
+        output_bytes (int): The combined stdout and stderr bytes.
+    """
+
+    wall_seconds: float = 0.0
+    cpu_seconds: Optional[float] = None
+    max_rss_bytes: Optional[int] = None
+    output_bytes: int = 0
+
+
+def wrap_with_limits(cmd: str, limits: Optional[ResourceLimits]) -> str:
+    """
+    Wrap a bash command in a subshell applying the CPU and memory limits.
+
+    The subshell keeps the limits from leaking into the persistent session, at the cost
+    of `cd` or `export` in a limited command not persisting either.
+
+    Args:
+        cmd (str): The command.
+        limits (ResourceLimits, optional): The limits to apply.
+
+    Returns:
+        str: The wrapped command, or the command itself without CPU and memory limits.
+    """
+    if limits is None or os.name == "nt":
+        return cmd
+    ulimits = []
+    if limits.cpu_seconds:
+        ulimits.append(f"-t {int(limits.cpu_seconds)}")
+    if limits.memory_bytes:
+        ulimits.append(f"-v {max(1, int(limits.memory_bytes) // 1024)}")
+    if not ulimits:
+        return cmd
+    return f"(\nulimit {' '.join(ulimits)} || exit $?\n{cmd}\n)"
+
+
+def read_cpu_ticks(pid: int) -> Optional[int]:
+    """
+    Read the CPU ticks of a process and of its reaped children.
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        Optional[int]: utime + stime + cutime + cstime, or None if unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, the fields start after its closing parenthesis
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    return sum(int(value) for value in fields[11:15])
+
+
+def ticks_to_seconds(ticks: int) -> float:
+    return ticks / _CLOCK_TICKS
+
+
+def _session_processes(session_id: int):
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return
+    for pid in pids:
+        if pid == session_id:
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rindex(b")") + 2 :].split()
+        if int(fields[3]) == session_id:
+            yield pid, int(fields[21]) * _PAGE_SIZE
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return children
+    for tid in tids:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                children += [int(child) for child in f.read().split()]
+        except OSError:
+            continue
+    return children
+
+
+def _descendants(pid: int) -> List[int]:
+    descendants = []
+    stack = [pid]
+    while stack:
+        children = _children(stack.pop())
+        descendants += children
+        stack += children
+    return descendants
+
+
+def _process_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return 0
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    return int(fields[21]) * _PAGE_SIZE
+
+
+def session_rss(session_id: int) -> int:
+    """
+    Sum the resident memory of the processes a shell runs, except the shell itself.
+
+    Only the process tree of the shell is read where the kernel lists the children of
+    processes, otherwise every process is scanned for the session.
+
+    Args:
+        session_id (int): The session id, i.e. the pid of the shell leading it.
+
+    Returns:
+        int: The resident memory in bytes.
+    """
+    if not _CHILDREN_LISTED:
+        return sum(rss for _, rss in _session_processes(session_id))
+    return sum(_process_rss(pid) for pid in _descendants(session_id))
+
+
+def terminate_session_children(session_id: int):
+    """
+    Terminate the processes of a session except its leader, i.e. the commands a shell runs.
+
+    Args:
+        session_id (int): The session id, i.e. the pid of the shell leading it.
+    """
+    for pid, _ in list(_session_processes(session_id)):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+class UsageMonitor:
+    """
+    Samples the CPU time and peak memory of the command run by a shell.
+    """
+
+    def __init__(
+        self, shell_pid: int, interval: float = 0.05, max_interval: float = 1.0
+    ):
+        """
+        Initialize the monitor.
+
+        Args:
+            shell_pid (int): The pid of the shell, which leads its own session.
+            interval (float, optional): Seconds before the second memory sample. The
+                interval doubles after each sample, so long commands are sampled rarely.
+            max_interval (float, optional): The longest interval between memory samples.
+        """
+        self._pid = shell_pid
+        self._interval = interval
+        self._max_interval = max_interval
+        self._enabled = os.path.isdir(f"/proc/{shell_pid}")
+        self._start_ticks = read_cpu_ticks(shell_pid) if self._enabled else None
+        self._max_rss: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample(self):
+        interval = self._interval
+        while True:
+            rss = session_rss(self._pid)
+            if rss:
+                self._max_rss = max(self._max_rss or 0, rss)
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self._max_interval)
+
+    def start(self):
+        if self._enabled:
+            self._task = asyncio.create_task(self._sample())
+
+    async def stop(self, usage: ResourceUsage):
+        """
+        Stop sampling and fill in the CPU time and peak memory of the command.
+
+        Args:
+            usage (ResourceUsage): The usage to complete.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        usage.max_rss_bytes = self._max_rss
+        end_ticks = read_cpu_ticks(self._pid) if self._enabled else None
+        if self._start_ticks is not None and end_ticks is not None:
+            usage.cpu_seconds = ticks_to_seconds(end_ticks - self._start_ticks)
+
+
+class OutputBudget:
+    """
+    Counts the output bytes of a command and fires a callback once they exceed a limit.
+    """
+
+    def __init__(self, limit: Optional[int], on_exceeded: Callable[[], None]):
+        self.limit = limit
+        self.used = 0
+        self.exceeded = False
+        self._on_exceeded = on_exceeded
+
+    def consume(self, size: int) -> int:
+        """
+        Count output bytes.
+
+        Args:
+            size (int): The number of bytes read.
+
+        Returns:
+            int: How many of the first bytes are within the limit and should be captured.
+        """
+        if self.limit is None:
+            self.used += size
+            return size
+        kept = max(0, min(size, self.limit - self.used))
+        self.used += size
+        if kept < size and not self.exceeded:
+            self.exceeded = True
+            self._on_exceeded()
+        return kept
@@ -0,0 +1,162 @@
+import os
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from src.tools.base import ToolResult
+
+Fingerprint = Tuple[str, Optional[int], Optional[int], Optional[int]]
+
+
+def normalize_path(path: str) -> str:
+    """
+    Normalize a path so that different spellings of the same file share cache entries.
+
+    Args:
+        path (str): The path to normalize.
+
+    Returns:
+        str: The absolute, normalized path.
+    """
+    return os.path.normcase(os.path.abspath(os.path.normpath(str(path))))
+
+
+def fingerprint(paths: List[str]) -> Tuple[Fingerprint, ...]:
+    """
+    Compute the filesystem fingerprint of the given paths.
+
+    Each path is fingerprinted by a single `stat` call as (path, mtime_ns, size, inode).
+    Missing paths are fingerprinted as (path, None, None, None).
+
+    Args:
+        paths (List[str]): The paths to fingerprint.
+
+    Returns:
+        Tuple[Fingerprint, ...]: The fingerprints in the order of the given paths.
+    """
+    result = []
+    for path in paths:
+        path = normalize_path(path)
+        try:
+            stat = os.stat(path)
+            result.append((path, stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except OSError:
+            result.append((path, None, None, None))
+    return tuple(result)
+
+
+class ToolResultCache:
+    """
+    LRU cache for the results of pure tools.
+
+    Entries are keyed on the tool name and its normalized arguments, and are
+    validated against the filesystem fingerprint of the paths they depend on,
+    so a repeated call costs only a `stat` per path. Writes performed through
+    the file tools invalidate affected entries immediately.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): The maximum number of memoized results to keep.
+        """
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[Tuple[Fingerprint, ...], ToolResult]] = (
+            OrderedDict()
+        )
+        # Reverse index from a normalized path to the keys depending on it
+        self._keys_by_path: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _key(tool_name: str, args: Dict) -> str:
+        return json.dumps(
+            [tool_name, args], sort_keys=True, ensure_ascii=False, default=str
+        )
+
+    def get(self, tool_name: str, args: Dict) -> Optional[ToolResult]:
+        """
+        Get the memoized result of a tool call if the files it depends on are unchanged.
+
+        Args:
+            tool_name (str): The name of the tool.
+            args (Dict): The validated arguments of the tool call.
+
+        Returns:
+            Optional[ToolResult]: The memoized result, or None on a miss.
+        """
+        key = self._key(tool_name, args)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        fingerprints, result = entry
+        if fingerprint([fp[0] for fp in fingerprints]) != fingerprints:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return result
+
+    def put(
+        self,
+        tool_name: str,
+        args: Dict,
+        fingerprints: Tuple[Fingerprint, ...],
+        result: ToolResult,
+    ):
+        """
+        Memoize the result of a tool call.
+
+        Args:
+            tool_name (str): The name of the tool.
+            args (Dict): The validated arguments of the tool call.
+            fingerprints (Tuple[Fingerprint, ...]): The fingerprints taken before the tool was executed.
+            result (ToolResult): The result to memoize.
+        """
+        key = self._key(tool_name, args)
+        self._remove(key)
+        self._entries[key] = (fingerprints, result)
+        for fp in fingerprints:
+            self._keys_by_path.setdefault(fp[0], set()).add(key)
+
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, paths: List[str]):
+        """
+        Drop the entries depending on the given paths or on any of their parent directories.
+
+        Args:
+            paths (List[str]): The paths that have been modified.
+        """
+        for path in paths:
+            path = normalize_path(path)
+            while True:
+                for key in list(self._keys_by_path.get(path, ())):
+                    self._remove(key)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+    def clear(self):
+        """
+        Drop all memoized results.
+        """
+        self._entries.clear()
+        self._keys_by_path.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for fp in entry[0]:
+            keys = self._keys_by_path.get(fp[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_path[fp[0]]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,282 @@
+"""
+Extraction of the symbols, imports and calls of source files.
+
+Functionality:
+    - Parses Python files with `ast`: classes, functions and methods with their line
+      ranges and signatures, absolute and relative imports, and the names called from
+      each scope.
+    - Lets other languages plug in a parser per file extension with `register_parser`.
+      Parsers run in the shared process pool, so they must be registered when their
+      module is imported and return picklable results.
+
+Symbols, imports and calls are named tuples rather than models, as large workspaces have
+hundreds of thousands of them to pass between processes.
+
+Calls are recorded by the called name only, e.g. `self.graph.add_node(...)` as
+`add_node`, since the receiver type is not known without running the code.
+
+Usage:
+    parsed = parse_file("/repo/src/main.py", "src/main.py")
+    parsed.symbols, parsed.imports, parsed.calls
+"""
+
+import os
+import ast
+import warnings
+from pydantic import BaseModel
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+_MAX_SIGNATURE_LENGTH = 200
+
+
+class Symbol(NamedTuple):
+    """
+    A definition in a file.
+
+    Attributes:
+        qualname (str): The dotted name within the file, e.g. `Graph.add_node`.
+        kind (str): `class`, `function` or `method`.
+        line (int): The 1-based line of the definition.
+        end_line (int): The 1-based last line of the definition.
+        signature (str): The parameters of functions or the bases of classes.
+    """
+
+    qualname: str
+    kind: str
+    line: int
+    end_line: int
+    signature: str = ""
+
+
+class Import(NamedTuple):
+    """
+    An import statement.
+
+    Attributes:
+        module (str): The absolute dotted name of the imported module.
+        line (int): The 1-based line of the statement.
+        names (List[str]): The names imported from the module, empty for `import module`.
+    """
+
+    module: str
+    line: int
+    names: List[str] = []
+
+
+class Call(NamedTuple):
+    """
+    A call of a name.
+
+    Attributes:
+        caller (str): The qualname of the calling symbol, empty at module level.
+        name (str): The called name.
+        line (int): The 1-based line of the call.
+    """
+
+    caller: str
+    name: str
+    line: int
+
+
+class ParsedFile(BaseModel):
+    """
+    What a parser extracted from a file.
+
+    Attributes:
+        language (str): The language of the file.
+        module (str): The dotted module name of the file, if the language has one.
+        symbols (List[Symbol]): The definitions, parents before their members.
+        imports (List[Import]): The imports.
+        calls (List[Call]): The calls.
+        error (str, optional): Why the file could not be parsed.
+    """
+
+    language: str
+    module: str = ""
+    symbols: List[Symbol] = []
+    imports: List[Import] = []
+    calls: List[Call] = []
+    error: Optional[str] = None
+
+
+Parser = Callable[[str, str], ParsedFile]
+
+_parsers: Dict[str, Parser] = {}
+
+
+def register_parser(extensions: List[str], parser: Parser):
+    """
+    Register the parser of a language.
+
+    Args:
+        extensions (List[str]): The file extensions of the language, e.g. `[".py"]`.
+        parser (Parser): A function taking the source and the path relative to the
+            workspace, and returning the parsed file.
+    """
+    for extension in extensions:
+        _parsers[extension.lower()] = parser
+
+
+def is_supported(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in _parsers
+
+
+def parse_file(path: str, relative: str) -> ParsedFile:
+    """
+    Parse a file with the parser of its extension.
+
+    Args:
+        path (str): The absolute path of the file.
+        relative (str): The path relative to the workspace, with forward slashes.
+
+    Raises:
+        OSError: If the file cannot be read.
+
+    Returns:
+        ParsedFile: The parsed file.
+    """
+    parser = _parsers[os.path.splitext(path)[1].lower()]
+    with open(path, "rb") as f:
+        source = f.read().decode("utf-8", errors="replace")
+    return parser(source, relative)
+
+
+def _python_module(relative: str) -> str:
+    parts = relative[: -len(os.path.splitext(relative)[1])].split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _signature(node: ast.AST) -> str:
+    try:
+        if isinstance(node, ast.ClassDef):
+            bases = [ast.unparse(base) for base in node.bases + node.keywords]
+            signature = f"({', '.join(bases)})" if bases else ""
+        else:
+            signature = f"({ast.unparse(node.args)})"
+            if node.returns is not None:
+                signature += f" -> {ast.unparse(node.returns)}"
+    except Exception:
+        return ""
+    if len(signature) > _MAX_SIGNATURE_LENGTH:
+        signature = signature[: _MAX_SIGNATURE_LENGTH - 3] + "..."
+    return signature
+
+
+# Nodes without calls, imports or definitions below them
+_LEAVES = {
+    ast.Name,
+    ast.Constant,
+    ast.Load,
+    ast.Store,
+    ast.Del,
+    ast.alias,
+    ast.Pass,
+    ast.Break,
+    ast.Continue,
+}
+_DEFINITIONS = {ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef}
+
+
+def _absolute_module(node: ast.ImportFrom, module: str, is_package: bool) -> str:
+    imported = node.module or ""
+    if not node.level:
+        return imported
+    package = module.split(".") if module else []
+    # The package of a module is its parent, a package is its own package
+    drop = node.level - 1 if is_package else node.level
+    package = package[: len(package) - drop] if drop else package
+    return ".".join(package + ([imported] if imported else []))
+
+
+def _extract_python(tree: ast.Module, parsed: ParsedFile, is_package: bool):
+    """
+    Walk the tree with an explicit stack, which is several times faster than
+    `ast.NodeVisitor` on large files.
+    """
+    symbols, imports, calls = parsed.symbols, parsed.imports, parsed.calls
+    # (node, qualname of the enclosing scope, whether the scope is a class)
+    stack = [(child, "", False) for child in reversed(tree.body)]
+    while stack:
+        node, scope, in_class = stack.pop()
+        node_type = type(node)
+        if node_type in _DEFINITIONS:
+            qualname = f"{scope}.{node.name}" if scope else node.name
+            is_class = node_type is ast.ClassDef
+            symbols.append(
+                Symbol(
+                    qualname=qualname,
+                    kind="class" if is_class else "method" if in_class else "function",
+                    line=node.lineno,
+                    end_line=node.end_lineno or node.lineno,
+                    signature=_signature(node),
+                )
+            )
+            stack += [(child, qualname, is_class) for child in reversed(node.body)]
+            # Decorators, bases and defaults are evaluated in the enclosing scope
+            outer = node.decorator_list
+            if is_class:
+                outer = outer + node.bases + node.keywords
+            else:
+                outer = outer + [node.args] + ([node.returns] if node.returns else [])
+            stack += [(child, scope, in_class) for child in outer]
+            continue
+        if node_type is ast.Import:
+            imports += [
+                Import(module=alias.name, line=node.lineno) for alias in node.names
+            ]
+            continue
+        if node_type is ast.ImportFrom:
+            imports.append(
+                Import(
+                    module=_absolute_module(node, parsed.module, is_package),
+                    names=[alias.name for alias in node.names],
+                    line=node.lineno,
+                )
+            )
+            continue
+        if node_type is ast.Call:
+            func = node.func
+            func_type = type(func)
+            if func_type is ast.Name:
+                calls.append(Call(caller=scope, name=func.id, line=node.lineno))
+            elif func_type is ast.Attribute:
+                calls.append(Call(caller=scope, name=func.attr, line=node.lineno))
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                stack += [
+                    (child, scope, in_class)
+                    for child in reversed(value)
+                    if isinstance(child, ast.AST) and type(child) not in _LEAVES
+                ]
+            elif isinstance(value, ast.AST) and type(value) not in _LEAVES:
+                stack.append((value, scope, in_class))
+
+
+def parse_python(source: str, relative: str) -> ParsedFile:
+    """
+    Parse a Python file.
+
+    Args:
+        source (str): The source code.
+        relative (str): The path relative to the workspace, with forward slashes.
+
+    Returns:
+        ParsedFile: The parsed file, with `error` set on syntax errors.
+    """
+    module = _python_module(relative)
+    try:
+        # Invalid escape sequences and the like are not our concern
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tree = ast.parse(source, filename=relative)
+    except (SyntaxError, ValueError) as e:
+        return ParsedFile(language="python", module=module, error=str(e))
+    parsed = ParsedFile(language="python", module=module)
+    _extract_python(tree, parsed, relative.rsplit("/", 1)[-1] == "__init__.py")
+    return parsed
+
+
+register_parser([".py", ".pyi"], parse_python)
@@ -0,0 +1,483 @@
+"""
+Persistent symbol and dependency graph of a workspace.
+
+Functionality:
+    - Builds a `Graph` of the files, classes, functions and methods of the workspace,
+      with `contains`, `imports`, `defines` and `calls` edges, from the parsers of
+      `src.tools.code.parsers`.
+    - Parses many files in parallel on the shared process pool.
+    - Updates incrementally: only the nodes owned by a changed file are replaced.
+      Called names and imported modules are shared nodes, dropped once unreferenced.
+    - Refreshes from file modification times at most every `refresh_interval` seconds,
+      edits made through our file tools are applied on the next query via
+      `notify_file_changed`.
+    - Persists under `.cache/symbols`, so a new session only re-parses changed files.
+
+Node ids:
+    - `file:<path>` for files, with the path relative to the root.
+    - `symbol:<path>:<qualname>` for definitions.
+    - `module:<dotted name>` for modules, defined by a file or imported.
+    - `name:<name>` for called names.
+
+Usage:
+    index = get_symbol_index("/repo")
+    index.definitions("Graph.add_node")
+    index.callers("add_node")
+    index.importers("src.memory.storage.graph")
+"""
+
+import os
+import atexit
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.memory.storage.graph import Graph, Node
+from src.tools.code.parsers import ParsedFile, is_supported, parse_file
+from src.tools.policy import get_process_pool
+from src.tools.text.changes import add_change_listener
+from src.tools.text.ignore import walk_files
+from src.utils.log import logger
+
+_INDEX_VERSION = 1
+_MAX_FILE_SIZE = 1024 * 1024
+_PARALLEL_THRESHOLD = 16
+_BATCH_SIZE = 32
+_SAVE_INTERVAL = 30.0
+
+SYMBOL_KINDS = {"class", "function", "method"}
+
+_indexes: "weakref.WeakSet[SymbolIndex]" = weakref.WeakSet()
+
+
+def parse_files(
+    items: List[Tuple[str, str]],
+) -> List[Tuple[str, Optional[int], int, Optional[ParsedFile]]]:
+    """
+    Parse a batch of files. Runs in the worker processes.
+
+    Args:
+        items (List[Tuple[str, str]]): The absolute and relative path of each file.
+
+    Returns:
+        List[Tuple[str, Optional[int], int, Optional[ParsedFile]]]: The relative path,
+            mtime_ns, size and parsed content of each file. The mtime is None for
+            unreadable files, oversized files are not parsed.
+    """
+    results = []
+    for path, relative in items:
+        try:
+            stat = os.stat(path)
+            if stat.st_size > _MAX_FILE_SIZE:
+                results.append((relative, stat.st_mtime_ns, stat.st_size, None))
+                continue
+            parsed = parse_file(path, relative)
+        except OSError:
+            results.append((relative, None, 0, None))
+            continue
+        results.append((relative, stat.st_mtime_ns, stat.st_size, parsed))
+    return results
+
+
+class SymbolIndex:
+    """
+    The symbol graph of the source files under one root directory.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        cache_dir: str = os.path.join(".cache", "symbols"),
+        refresh_interval: float = 30.0,
+    ):
+        """
+        Initialize the index, loading its persisted state if any.
+
+        Args:
+            root (str): The directory to index.
+            cache_dir (str, optional): The directory holding the persisted indexes.
+            refresh_interval (float, optional): The seconds between scans of the workspace for changes.
+        """
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(os.path.abspath(cache_dir), f"{digest}.pkl")
+
+        self.graph = Graph()
+        # (mtime_ns, size) and the ids of the owned nodes, by relative path
+        self.files: Dict[str, Tuple[Tuple[int, int], List[str]]] = {}
+
+        self._dirty: Set[str] = set()
+        self._last_refresh = 0.0
+        self._last_save = 0.0
+        self._unsaved = False
+        self._lock = threading.RLock()
+        self._load()
+        _indexes.add(self)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return
+        if state.get("version") != _INDEX_VERSION or state.get("root") != self.root:
+            return
+        self.graph = state["graph"]
+        self.files = state["files"]
+
+    def save(self):
+        """
+        Persist the index atomically.
+        """
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._lock:
+            state = {
+                "version": _INDEX_VERSION,
+                "root": self.root,
+                "graph": self.graph,
+                "files": self.files,
+            }
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.cache_path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._unsaved = False
+            self._last_save = time.monotonic()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _shared(self, node_id: str, kind: str) -> str:
+        if node_id not in self.graph:
+            self.graph.add_node(node_id, kind)
+        return node_id
+
+    def _remove(self, relative: str):
+        entry = self.files.pop(relative, None)
+        if entry is None:
+            return
+        self._unsaved = True
+        shared = set()
+        for node_id in entry[1]:
+            for kind, target, _ in self.graph.out_edges(node_id):
+                if kind != "contains":
+                    shared.add(target)
+            self.graph.remove_node(node_id)
+        for node_id in shared:
+            if self.graph.degree(node_id) == 0:
+                self.graph.remove_node(node_id)
+
+    def _add(self, relative: str, stamp: Tuple[int, int], parsed: Optional[ParsedFile]):
+        graph = self.graph
+        file_id = f"file:{relative}"
+        graph.add_node(
+            file_id,
+            "file",
+            name=relative.rsplit("/", 1)[-1],
+            path=relative,
+            language=parsed.language if parsed else "",
+            module=parsed.module if parsed else "",
+            error=parsed.error if parsed else None,
+        )
+        owned = [file_id]
+        self.files[relative] = (stamp, owned)
+        if parsed is None:
+            return
+
+        if parsed.module:
+            graph.add_edge(
+                file_id, "defines", self._shared(f"module:{parsed.module}", "module")
+            )
+        scopes = {"": file_id}
+        for symbol in parsed.symbols:
+            symbol_id = f"symbol:{relative}:{symbol.qualname}"
+            parent = symbol.qualname.rpartition(".")[0]
+            line, end_line = symbol.line, symbol.end_line
+            existing = graph.get_node(symbol_id)
+            if existing is None:
+                owned.append(symbol_id)
+            else:
+                # A redefinition, e.g. a property setter, spans all the definitions
+                line = min(line, existing.get("line"))
+                end_line = max(end_line, existing.get("end_line"))
+            graph.add_node(
+                symbol_id,
+                symbol.kind,
+                name=symbol.qualname.rsplit(".", 1)[-1],
+                qualname=symbol.qualname,
+                path=relative,
+                line=line,
+                end_line=end_line,
+                signature=symbol.signature,
+            )
+            scopes[symbol.qualname] = symbol_id
+            graph.add_edge(scopes.get(parent, file_id), "contains", symbol_id)
+        for item in parsed.imports:
+            if not item.module:
+                continue
+            module_id = self._shared(f"module:{item.module}", "module")
+            existing = graph.get_edge(file_id, "imports", module_id)
+            names = (existing["names"] if existing else []) + item.names
+            line = existing["line"] if existing else item.line
+            graph.add_edge(file_id, "imports", module_id, line=line, names=names)
+
+        lines: Dict[Tuple[str, str], List[int]] = {}
+        for call in parsed.calls:
+            lines.setdefault((call.caller, call.name), []).append(call.line)
+        for (caller, name), call_lines in lines.items():
+            graph.add_edge(
+                scopes.get(caller, file_id),
+                "calls",
+                self._shared(f"name:{name}", "name"),
+                lines=call_lines,
+            )
+
+    def _parse(self, relatives: List[str]):
+        items = [
+            (os.path.join(self.root, relative), relative) for relative in relatives
+        ]
+        if len(items) < _PARALLEL_THRESHOLD:
+            return [parse_files(items)]
+        batches = [
+            items[i : i + _BATCH_SIZE] for i in range(0, len(items), _BATCH_SIZE)
+        ]
+        return get_process_pool().map(parse_files, batches)
+
+    def _update(self, relatives: Iterable[str]):
+        relatives = list(relatives)
+        if not relatives:
+            return
+        for relative in relatives:
+            self._remove(relative)
+        for results in self._parse(relatives):
+            for relative, mtime, size, parsed in results:
+                if mtime is not None:
+                    self._add(relative, (mtime, size), parsed)
+        self._unsaved = True
+
+    def refresh(self, force: bool = False):
+        """
+        Apply the changes since the previous refresh.
+
+        Files reported by `notify_file_changed` are always re-parsed. The workspace is
+        scanned for other changes when `refresh_interval` has passed or `force` is set.
+
+        Args:
+            force (bool, optional): Whether to scan the workspace regardless of the interval.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            changed = set()
+            now = time.monotonic()
+            if force or now - self._last_refresh >= self.refresh_interval:
+                on_disk = {
+                    relative: stamp
+                    for relative, stamp in walk_files(self.root).items()
+                    if is_supported(relative)
+                }
+                for relative in list(self.files):
+                    if relative not in on_disk:
+                        self._remove(relative)
+                for relative, stamp in on_disk.items():
+                    entry = self.files.get(relative)
+                    if entry is None or entry[0] != stamp:
+                        changed.add(relative)
+                self._last_refresh = time.monotonic()
+            for path in dirty:
+                relative = self._relative(path)
+                if os.path.isfile(path):
+                    changed.add(relative)
+                else:
+                    self._remove(relative)
+            self._update(sorted(changed))
+            if self._unsaved and (
+                force or time.monotonic() - self._last_save >= _SAVE_INTERVAL
+            ):
+                self.save()
+
+    def notify(self, path: str):
+        """
+        Mark a file as changed, to be re-parsed on the next query.
+
+        Args:
+            path (str): The absolute path of the file.
+        """
+        if is_supported(path):
+            with self._lock:
+                self._dirty.add(path)
+
+    def definitions(self, name: str) -> List[Node]:
+        """
+        Find where a class, function, method or module is defined.
+
+        Args:
+            name (str): A plain name, a qualified name like `Graph.add_node`, or a dotted
+                module name optionally followed by a qualified name.
+
+        Returns:
+            List[Node]: The symbol and file nodes, sorted by path and line.
+        """
+        self.refresh()
+        with self._lock:
+            last = name.rsplit(".", 1)[-1]
+            nodes = self.graph.find(last, SYMBOL_KINDS)
+            if "." in name:
+                nodes = [
+                    node
+                    for node in nodes
+                    if node.get("qualname") == name
+                    or f".{node.get('qualname')}".endswith(f".{name}")
+                    or self._module_of(node) + f".{node.get('qualname')}" == name
+                ]
+            nodes += [
+                self.graph.nodes[source]
+                for _, source, _ in self.graph.in_edges(f"module:{name}", "defines")
+            ]
+        return sorted(nodes, key=lambda node: (node.get("path"), node.get("line", 0)))
+
+    def _module_of(self, node: Node) -> str:
+        file_node = self.graph.get_node(f"file:{node.get('path')}")
+        return file_node.get("module", "") if file_node else ""
+
+    def callers(self, name: str) -> List[Tuple[Node, List[int]]]:
+        """
+        Find the symbols calling a name. Calls are matched by the last part of the name,
+        whatever the receiver.
+
+        Args:
+            name (str): The called name, e.g. `add_node` or `Graph.add_node`.
+
+        Returns:
+            List[Tuple[Node, List[int]]]: The calling symbol, or the file for module-level
+                calls, with the lines of the calls, sorted by path and line.
+        """
+        self.refresh()
+        with self._lock:
+            last = name.rsplit(".", 1)[-1]
+            callers = [
+                (self.graph.nodes[source], properties["lines"])
+                for _, source, properties in self.graph.in_edges(
+                    f"name:{last}", "calls"
+                )
+            ]
+        return sorted(callers, key=lambda item: (item[0].get("path"), item[1][0]))
+
+    def importers(self, module: str) -> List[Tuple[Node, int, List[str]]]:
+        """
+        Find the files importing a module, or a name from it.
+
+        Args:
+            module (str): The dotted module name, or the path of the module file.
+
+        Returns:
+            List[Tuple[Node, int, List[str]]]: The importing file, the line of the first
+                import and the imported names, sorted by path.
+        """
+        self.refresh()
+        with self._lock:
+            if "/" in module or os.sep in module or module.endswith(".py"):
+                path = os.path.abspath(os.path.join(self.root, module))
+                file_node = self.graph.get_node(f"file:{self._relative(path)}")
+                if file_node is None or not file_node.get("module"):
+                    return []
+                module = file_node.get("module")
+            results = {}
+            for _, source, properties in self.graph.in_edges(
+                f"module:{module}", "imports"
+            ):
+                results[source] = (properties["line"], properties["names"])
+            # `from package import module` imports the module as a name of its package
+            package, _, last = module.rpartition(".")
+            if package:
+                for _, source, properties in self.graph.in_edges(
+                    f"module:{package}", "imports"
+                ):
+                    if last in properties["names"] and source not in results:
+                        results[source] = (properties["line"], [last])
+            importers = [
+                (self.graph.nodes[source], line, names)
+                for source, (line, names) in results.items()
+            ]
+        return sorted(importers, key=lambda item: item[0].get("path"))
+
+    def outline(self, path: str) -> List[Node]:
+        """
+        List the symbols defined in a file.
+
+        Args:
+            path (str): The path of the file, absolute or relative to the root.
+
+        Raises:
+            ValueError: If the file is not indexed.
+
+        Returns:
+            List[Node]: The symbol nodes, sorted by line.
+        """
+        self.refresh()
+        relative = self._relative(os.path.abspath(os.path.join(self.root, path)))
+        with self._lock:
+            file_id = f"file:{relative}"
+            if file_id not in self.graph:
+                raise ValueError(f"File {path} is not indexed.")
+            nodes = []
+            stack = [file_id]
+            while stack:
+                for _, target, _ in self.graph.out_edges(stack.pop(), "contains"):
+                    nodes.append(self.graph.nodes[target])
+                    stack.append(target)
+        return sorted(nodes, key=lambda node: node.get("line"))
+
+
+_symbol_indexes: Dict[str, SymbolIndex] = {}
+_symbol_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str) -> SymbolIndex:
+    """
+    Get the symbol index of a directory, shared by all queries in this process.
+
+    Args:
+        root (str): The directory.
+
+    Returns:
+        SymbolIndex: The index.
+    """
+    root = os.path.abspath(root)
+    with _symbol_indexes_lock:
+        index = _symbol_indexes.get(root)
+        if index is None:
+            index = _symbol_indexes[root] = SymbolIndex(root)
+        return index
+
+
+def _on_file_changed(path: str):
+    for index in list(_indexes):
+        if path.startswith(index.root + os.sep):
+            index.notify(path)
+
+
+def save_symbol_indexes():
+    """
+    Persist the indexes with unsaved changes.
+    """
+    for index in list(_indexes):
+        if index._unsaved:
+            try:
+                index.save()
+            except OSError as e:
+                logger.warning(f"Saving the symbol index of {index.root} failed: {e}")
+
+
+add_change_listener(_on_file_changed)
+atexit.register(save_symbol_indexes)
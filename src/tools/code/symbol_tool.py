@@ -0,0 +1,123 @@
+import os
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, override
+
+from src.memory.storage.graph import Node
+from src.tools.code.symbol_index import SymbolIndex, get_symbol_index
+from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
+
+
+class SymbolGraphArgs(BaseModel):
+    query: Literal["definition", "callers", "importers", "outline"] = Field(
+        description="`definition`: where a class, function, method or module is defined. "
+        "`callers`: the functions calling a name. "
+        "`importers`: the files importing a module. "
+        "`outline`: the classes and functions of a file."
+    )
+    name: str = Field(
+        description="The symbol, e.g. `add_node` or `Graph.add_node`, the dotted module name, or the file path for `outline`."
+    )
+    max_results: int = Field(default=50, description="The maximum number of results.")
+
+
+class SymbolGraphTool(Tool):
+    """
+    Answers structural questions about the code of the workspace from a persistent
+    symbol graph, instead of viewing files one by one.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize the tool.
+
+        Args:
+            root (str, optional): The workspace directory to index. Defaults to the current directory.
+        """
+        super().__init__(
+            name="symbol_graph",
+            description="Queries the symbol graph of the code in the workspace: where a symbol is defined, which functions call a name, which files import a module, or the outline of a file. Results list the file path and line of each match. Calls are matched by name regardless of the object they are called on.",
+            parameters=SymbolGraphArgs,
+            execution_policy=ExecutionPolicy.THREAD,
+        )
+        self.root = os.path.abspath(root or os.getcwd())
+
+    def _location(self, index: SymbolIndex, node: Node) -> str:
+        path = os.path.join(index.root, node.get("path"))
+        if node.kind == "file":
+            return path
+        return f"{path}:{node.get('line')}-{node.get('end_line')}"
+
+    def _describe(self, node: Node) -> str:
+        if node.kind == "file":
+            return "module level"
+        return f"{node.kind} {node.get('qualname')}{node.get('signature')}"
+
+    def _lines(self, index: SymbolIndex, query: str, name: str) -> List[str]:
+        if query == "definition":
+            return [
+                f"{self._location(index, node)} "
+                + (
+                    f"module {node.get('module')}"
+                    if node.kind == "file"
+                    else self._describe(node)
+                )
+                for node in index.definitions(name)
+            ]
+        if query == "callers":
+            return [
+                f"{os.path.join(index.root, node.get('path'))}:{','.join(map(str, lines))} in {self._describe(node)}"
+                for node, lines in index.callers(name)
+            ]
+        if query == "importers":
+            return [
+                f"{os.path.join(index.root, node.get('path'))}:{line}"
+                + (f" ({', '.join(names)})" if names else "")
+                for node, line, names in index.importers(name)
+            ]
+        return [
+            f"{node.get('line')}-{node.get('end_line')} {self._describe(node)}"
+            for node in index.outline(name)
+        ]
+
+    @override
+    def _run(
+        self,
+        query: str,
+        name: str,
+        max_results: int = 50,
+    ) -> ToolResult:
+        index = get_symbol_index(self.root)
+        try:
+            lines = self._lines(index, query, name)
+        except ValueError as e:
+            return ToolResult(error=str(e), success=False)
+
+        output = [f"<symbol_graph query={query} name={name!r} results={len(lines)}>"]
+        output += lines[:max_results]
+        if len(lines) > max_results:
+            output.append(
+                f"({len(lines) - max_results} more results are omitted, raise `max_results` to see them.)"
+            )
+        if not lines:
+            output.append("(No results.)")
+        output.append("</symbol_graph>")
+        return ToolResult(output="\n".join(output), success=True)
+
+
+if __name__ == "__main__":
+    from src.utils.loop import run_async_in_thread
+
+    symbol_tool = SymbolGraphTool()
+    print(run_async_in_thread(symbol_tool._execute, query="definition", name="Tool"))
+    print(run_async_in_thread(symbol_tool._execute, query="callers", name="write_file"))
+    print(
+        run_async_in_thread(
+            symbol_tool._execute, query="importers", name="src.tools.base"
+        )
+    )
+    print(
+        run_async_in_thread(
+            symbol_tool._execute, query="outline", name="src/tools/base.py"
+        )
+    )
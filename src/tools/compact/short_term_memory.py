@@ -1,14 +1,26 @@
+import os
+import time
 from src.llms.agent import Agent
 from src.tools.registry import ToolRegistry
 from src.tools.text.view_tool import ViewTool
 from src.tools.text.edit_tool import CreateFileTool, InsertFileTool, ReplaceFileTool
+from src.utils.metrics import COMPACTIONS, COMPACTION_SECONDS
+from src.utils.tracing import tracer
+from src.utils.profiler import profile_phase
 
 prompt = """Wait, do not perform any actions other than recording. Please document the key context and task progress in detail based on the previous conversation, following the 5W1H principle for future reference. Key context should be saved in the `.contextify/short_term_memory/context/xxx.md`. Task progress should be saved in the `.contextify/short_term_memory/progress/xxx.md`. After completing the documentation, return a detailed response and do not perform any actions other than recording."""
 
 
 class ShortTermMemoryManager:
-    def __init__(self, agent: Agent):
+    def __init__(
+        self,
+        agent: Agent,
+        summary_dir: str = os.path.join(
+            ".contextify", "short_term_memory", "summaries"
+        ),
+    ):
         self.agent = agent
+        self.summary_dir = summary_dir
         self.tools = ToolRegistry(
             [
                 ViewTool(),
@@ -26,9 +38,14 @@ class ShortTermMemoryManager:
                 return content
 
     async def summarize(self):
+        start = time.perf_counter()
         agent = self.agent.fork(tools=self.tools)
         agent.append_user_message(prompt)
-        result = await self.solve(agent)
+        with tracer.start_as_current_span("memory.compact") as span:
+            span.set_attribute("memory.messages", len(self.agent.messages))
+            with profile_phase("compaction"):
+                result = await self.solve(agent)
+        self.save_summary(result)
         self.agent.messages = [self.agent.messages[0]]
         self.agent.append_message(
             {
@@ -37,8 +54,19 @@ class ShortTermMemoryManager:
                 "content": result,
             }
         )
+        COMPACTIONS.inc()
+        COMPACTION_SECONDS.observe(time.perf_counter() - start)
         # self.agent.print_history()
 
+    def save_summary(self, summary: str):
+        """Keeps the summary of the compacted conversation, so it can be recalled later."""
+        if not summary:
+            return
+        os.makedirs(self.summary_dir, exist_ok=True)
+        path = os.path.join(self.summary_dir, f"{time.strftime('%Y%m%d-%H%M%S')}.md")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(summary.rstrip() + "\n")
+
 
 if __name__ == "__main__":
     import json
@@ -1,6 +1,13 @@
+import time
 import asyncio
 from typing import List, Dict
 from src.tools.base import Tool, ToolCall, ToolResult
+from src.tools.cache import ToolResultCache, fingerprint
+from src.tools.policy import ExecutionPolicy, run_with_policy
+from src.utils.metrics import TOOL_SECONDS, TOOL_CALLS, TOOL_OUTPUT_BYTES
+from src.utils.tracing import tracer
+from src.utils.profiler import profile_phase
+from opentelemetry import trace
 
 
 class ToolExecutor:
@@ -12,16 +19,19 @@ class ToolExecutor:
     the lifecycle of tools, such as closing them when done.
     """
 
-    def __init__(self, tools: List[Tool]):
+    def __init__(self, tools: List[Tool], cache_results: bool = False):
         """
         Initialize the ToolExecutor with a list of tools.
 
         Args:
             tools (List[Tool]): A list of Tool instances to be managed by this executor.
+            cache_results (bool, optional): Whether to memoize the results of tools marked pure,
+                keyed on their normalized arguments and the state of the files they read.
         """
         self._tools = tools
         # Create a mapping from tool name to tool instance for quick lookup
         self._tools_map: Dict[str, Tool] = {tool.name: tool for tool in tools}
+        self._cache = ToolResultCache() if cache_results else None
 
     async def close_tools(self):
         """
@@ -66,8 +76,63 @@ class ToolExecutor:
                 success=False,
             )
 
-        # Execute the corresponding tool
-        return await self._tools_map[tool_call.tool_name].execute(tool_call)
+        tool = self._tools_map[tool_call.tool_name]
+        with tracer.start_as_current_span("tool.execute") as span:
+            span.set_attribute("tool.name", tool.name)
+            start = time.perf_counter()
+            with profile_phase(f"tool:{tool.name}"):
+                result = await self._execute_tool(tool, tool_call)
+
+            output_bytes = len(result.output.encode("utf-8", errors="replace"))
+            span.set_attribute("tool.success", result.success)
+            span.set_attribute("tool.output_bytes", output_bytes)
+            TOOL_SECONDS.labels(tool=tool.name).observe(time.perf_counter() - start)
+            TOOL_CALLS.labels(
+                tool=tool.name, status="success" if result.success else "error"
+            ).inc()
+            TOOL_OUTPUT_BYTES.labels(tool=tool.name).observe(output_bytes)
+            return result
+
+    async def _execute_tool(self, tool: Tool, tool_call: ToolCall) -> ToolResult:
+        """
+        Execute a tool call on a registered tool, going through the result cache if enabled.
+
+        Args:
+            tool (Tool): The tool to execute.
+            tool_call (ToolCall): The tool call object containing the tool name and arguments.
+
+        Returns:
+            ToolResult: The result of the tool execution.
+        """
+        if self._cache is None:
+            return await tool.execute(tool_call)
+
+        try:
+            args = tool.parse_args(tool_call.tool_args)
+        except Exception:
+            # Let the tool report the validation error
+            return await tool.execute(tool_call)
+
+        if tool.pure:
+            cached = self._cache.get(tool.name, args)
+            trace.get_current_span().set_attribute("tool.cache_hit", cached is not None)
+            if cached is not None:
+                return cached.model_copy(update={"id": tool_call.id})
+
+            # Fingerprint before executing so that concurrent changes invalidate the entry.
+            # Listing the paths may walk directories, keep it off the event loop
+            fingerprints = await run_with_policy(
+                ExecutionPolicy.THREAD,
+                lambda: fingerprint(tool.get_cache_paths(**args)),
+            )
+            result = await tool.execute(tool_call)
+            if result.success:
+                self._cache.put(tool.name, args, fingerprints, result)
+            return result
+
+        result = await tool.execute(tool_call)
+        self._cache.invalidate(tool.get_modified_paths(**args))
+        return result
 
     async def parallel_tool_call(self, tool_calls: List[ToolCall]) -> List[ToolResult]:
         """
@@ -103,6 +168,7 @@ class ToolExecutor:
 if __name__ == "__main__":
     from pydantic import BaseModel, Field
     import json
+    import os
 
     # Define parameters for a simple calculator tool
     class AddParameters(BaseModel):
@@ -162,6 +228,38 @@ if __name__ == "__main__":
         result = await executor.execute_tool_call(bad_call)
         print(f"Error: {result.error}")
 
+        # Test 4: Memoized pure tool invalidated by a file change
+        print("\n--- Test 4: Memoized Pure Tool ---")
+        import tempfile
+        from src.tools.text.view_tool import ViewTool
+        from src.tools.text.edit_tool import InsertFileTool
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "demo.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("Line 1\n")
+            cached_executor = ToolExecutor(
+                tools=[ViewTool(), InsertFileTool()], cache_results=True
+            )
+            view_call = ToolCall(
+                id="call_5", tool_name="view", tool_args=json.dumps({"path": path})
+            )
+            first = await cached_executor.execute_tool_call(view_call)
+            second = await cached_executor.execute_tool_call(view_call)
+            print(f"Cached entries: {len(cached_executor._cache)}")
+            assert first.output == second.output
+            await cached_executor.execute_tool_call(
+                ToolCall(
+                    id="call_6",
+                    tool_name="insert_file",
+                    tool_args=json.dumps(
+                        {"file_path": path, "insert_line": 2, "file_text": "Line 2"}
+                    ),
+                )
+            )
+            third = await cached_executor.execute_tool_call(view_call)
+            print(f"Invalidated: {'Line 2' in third.output}")
+
         await executor.close_tools()
 
     # Run the async main function
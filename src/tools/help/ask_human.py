@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import override
 from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
 
 
 class AskHumanForHelpArgs(BaseModel):
@@ -14,10 +15,11 @@ class AskHumanForHelpTool(Tool):
             name="ask_human_help",
             description="Ask human for help.",
             parameters=AskHumanForHelpArgs,
+            execution_policy=ExecutionPolicy.THREAD,
         )
 
     @override
-    async def _execute(self, help: str) -> ToolResult:
+    def _run(self, help: str) -> ToolResult:
         res = input(f"Human Help: {help}\n")
         return ToolResult(
             output=res,
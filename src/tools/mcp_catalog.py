@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from src.utils.log import logger
+
+
+class MCPCatalog:
+    """
+    On-disk cache of the tool schemas discovered from MCP servers.
+
+    Entries are keyed by the server name and a hash of its configuration, so
+    editing a server configuration never serves stale schemas, and carry their
+    discovery time so callers can refresh entries older than the TTL.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = os.path.join(".cache", "mcp"),
+        ttl: float = 24 * 60 * 60,
+    ):
+        """
+        Initialize the catalog.
+
+        Args:
+            cache_dir (str, optional): The directory holding the catalog files.
+            ttl (float, optional): Seconds after which a cached catalog is stale.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _get_file_path(self, server: str, config: Dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps([server, config], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def load(self, server: str, config: Dict) -> Optional[Tuple[List[Dict], bool]]:
+        """
+        Load the cached tools of a server.
+
+        Args:
+            server (str): The name of the server.
+            config (Dict): The configuration of the server.
+
+        Returns:
+            Optional[Tuple[List[Dict], bool]]: The cached tool schemas and whether they are
+            still fresh, or None if the server has no cached catalog.
+        """
+        path = self._get_file_path(server, config)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable MCP catalog {path}: {e}")
+            return None
+
+        fresh = time.time() - catalog.get("discovered_at", 0) < self.ttl
+        return catalog.get("tools", []), fresh
+
+    def save(self, server: str, config: Dict, tools: List[Dict]):
+        """
+        Save the discovered tools of a server.
+
+        Args:
+            server (str): The name of the server.
+            config (Dict): The configuration of the server.
+            tools (List[Dict]): The tool schemas with `name`, `description` and `inputSchema`.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._get_file_path(server, config)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"server": server, "discovered_at": time.time(), "tools": tools},
+                f,
+                indent=4,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
@@ -0,0 +1,244 @@
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+from src.utils.log import logger
+
+
+class MCPSession:
+    """
+    A long-lived session to a single MCP server.
+
+    The session is connected lazily on first use and then kept warm, so a tool call
+    costs only the tool's own latency instead of a process spawn or a new HTTP session
+    plus the initialize handshake. Idle sessions are health-checked with a ping before
+    use, broken sessions are reconnected with exponential backoff, and the number of
+    concurrent in-flight requests is bounded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: Dict,
+        max_in_flight: int = 8,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+        max_retries: int = 3,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            name (str): The name of the server in the `mcpServers` configuration.
+            config (Dict): The configuration of the server.
+            max_in_flight (int, optional): The maximum number of concurrent requests.
+            health_check_interval (float, optional): Seconds of inactivity after which the
+                session is pinged before being used.
+            health_check_timeout (float, optional): Seconds to wait for a ping response.
+            max_retries (int, optional): The number of connection attempts.
+            initial_backoff (float, optional): Seconds to wait after the first failed attempt.
+            max_backoff (float, optional): The maximum seconds to wait between attempts.
+        """
+        self.name = name
+        self._config = config
+        self._client = self._new_client()
+        self._max_in_flight = max_in_flight
+        self._health_check_interval = health_check_interval
+        self._health_check_timeout = health_check_timeout
+        self._max_retries = max_retries
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._connected = False
+        self._last_active = 0.0
+
+    def _new_client(self) -> Client:
+        return Client({"mcpServers": {self.name: self._config}})
+
+    def _bind_loop(self):
+        # Sessions and asyncio primitives are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._connected:
+            logger.warning(
+                f"MCP session `{self.name}` was created on another event loop; reconnecting."
+            )
+            self._client = self._new_client()
+            self._connected = False
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+
+    async def _connect(self):
+        delay = self._initial_backoff
+        for attempt in range(1, self._max_retries + 1):
+            try:
+                await self._client.__aenter__()
+                self._connected = True
+                self._last_active = time.monotonic()
+                return
+            except Exception as e:
+                if attempt == self._max_retries:
+                    raise
+                logger.warning(
+                    f"Connecting to MCP server `{self.name}` failed (attempt {attempt}): {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_backoff)
+
+    async def _disconnect(self):
+        if not self._connected:
+            return
+        self._connected = False
+        try:
+            await self._client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Disconnecting from MCP server `{self.name}` failed: {e}")
+
+    async def _reconnect(self):
+        await self._disconnect()
+        self._client = self._new_client()
+        await self._connect()
+
+    async def ensure_connected(self):
+        """
+        Connect the session if needed, and ping it if it has been idle for a while.
+        """
+        self._bind_loop()
+        async with self._lock:
+            if not self._connected or not self._client.is_connected():
+                self._connected = False
+                await self._connect()
+                return
+
+            if time.monotonic() - self._last_active < self._health_check_interval:
+                return
+
+            try:
+                await asyncio.wait_for(
+                    self._client.ping(), timeout=self._health_check_timeout
+                )
+                self._last_active = time.monotonic()
+            except Exception as e:
+                logger.warning(
+                    f"Health check of MCP server `{self.name}` failed: {e}; reconnecting."
+                )
+                await self._reconnect()
+
+    async def _request(self, method: str, *args):
+        self._bind_loop()
+        async with self._semaphore:
+            await self.ensure_connected()
+            client = self._client
+            try:
+                result = await getattr(client, method)(*args)
+            except ToolError:
+                raise
+            except Exception:
+                if client.is_connected():
+                    raise
+                # The transport dropped, retry once on a fresh session. A concurrent
+                # call may have replaced the client already, keep that one
+                async with self._lock:
+                    if self._client is client:
+                        await self._reconnect()
+                result = await getattr(self._client, method)(*args)
+            self._last_active = time.monotonic()
+            return result
+
+    async def call_tool(self, tool_name: str, args: Dict) -> Any:
+        """
+        Call a tool on the server through the warm session.
+
+        Args:
+            tool_name (str): The name of the tool on the server.
+            args (Dict): The arguments of the tool.
+
+        Returns:
+            Any: The result of the tool call.
+        """
+        return await self._request("call_tool", tool_name, args)
+
+    async def list_tools(self) -> List:
+        """
+        List the tools of the server through the warm session.
+
+        Returns:
+            List: The MCP tool definitions.
+        """
+        return await self._request("list_tools")
+
+    async def close(self):
+        """
+        Close the session.
+        """
+        if self._lock is None:
+            return
+        if self._loop is not asyncio.get_running_loop():
+            # The session cannot be awaited from another loop, drop it
+            self._connected = False
+            return
+        async with self._lock:
+            await self._disconnect()
+
+
+class MCPSessionManager:
+    """
+    Keeps one warm MCPSession per configured MCP server.
+    """
+
+    def __init__(self, servers: Dict[str, Dict], **session_kwargs):
+        """
+        Initialize the manager.
+
+        Args:
+            servers (Dict[str, Dict]): The `mcpServers` configuration.
+            **session_kwargs: Keyword arguments forwarded to every MCPSession.
+        """
+        self._sessions: Dict[str, MCPSession] = {
+            name: MCPSession(name, config, **session_kwargs)
+            for name, config in (servers or {}).items()
+        }
+
+    def get(self, server: str) -> MCPSession:
+        """
+        Get the session of a server.
+
+        Args:
+            server (str): The name of the server.
+
+        Returns:
+            MCPSession: The session.
+        """
+        return self._sessions[server]
+
+    @property
+    def servers(self) -> List[str]:
+        return list(self._sessions.keys())
+
+    async def call_tool(self, server: str, tool_name: str, args: Dict) -> Any:
+        """
+        Call a tool on a server through its warm session.
+
+        Args:
+            server (str): The name of the server.
+            tool_name (str): The name of the tool on the server.
+            args (Dict): The arguments of the tool.
+
+        Returns:
+            Any: The result of the tool call.
+        """
+        return await self._sessions[server].call_tool(tool_name, args)
+
+    async def close(self):
+        """
+        Close all sessions.
+        """
+        await asyncio.gather(*[session.close() for session in self._sessions.values()])
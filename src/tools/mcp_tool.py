@@ -1,9 +1,64 @@
 import asyncio
-from typing import List, Dict, Optional
-from fastmcp import Client
+from typing import List, Dict, Set, override
 from src.config.config import DefaultConfig
 from src.tools.base import Tool, ToolResult
-from src.utils.loop import run_async_in_thread
+from src.tools.mcp_catalog import MCPCatalog
+from src.tools.mcp_session import MCPSessionManager
+from src.utils.log import logger
+from src.utils.loop import run_async_in_thread, run_on_background_loop
+from src.utils.tracing import tracer
+
+
+class MCPTool(Tool):
+    """
+    A tool served by an MCP server through the warm session kept by MCPTools.
+    """
+
+    def __init__(
+        self,
+        mcp_tools: "MCPTools",
+        server: str,
+        remote_name: str,
+        name: str,
+        description: str,
+        parameters: Dict,
+    ):
+        """
+        Initialize the MCP tool.
+
+        Args:
+            mcp_tools (MCPTools): The manager holding the session of the server.
+            server (str): The name of the server serving the tool.
+            remote_name (str): The name of the tool on the server.
+            name (str): The name of the tool exposed to the model.
+            description (str): The description of the tool.
+            parameters (Dict): The input schema of the tool.
+        """
+        self._mcp_tools = mcp_tools
+        self._server = server
+        self._remote_name = remote_name
+        super().__init__(name=name, description=description, parameters=parameters)
+
+    @override
+    async def _execute(self, **kwargs) -> ToolResult:
+        with tracer.start_as_current_span("mcp.call_tool") as span:
+            span.set_attribute("mcp.server", self._server)
+            span.set_attribute("mcp.tool_name", self._remote_name)
+            try:
+                result = await run_on_background_loop(
+                    self._mcp_tools.sessions.call_tool(
+                        self._server, self._remote_name, kwargs
+                    )
+                )
+                return ToolResult(output=str(result), success=True)
+            except Exception as e:
+                span.record_exception(e)
+                return ToolResult(error=str(e), success=False)
+
+    @override
+    async def close(self):
+        # The manager is shared by all tools of the registry and closes idempotently
+        await self._mcp_tools.close()
 
 
 class MCPTools:
@@ -12,73 +67,139 @@ class MCPTools:
 
     This class handles the connection to MCP servers and converts the available
     MCP tools into Contextify Tool instances. It acts as a bridge between
-    the MCP ecosystem and the Contextify tool system.
+    the MCP ecosystem and the Contextify tool system. Tool calls go through one
+    long-lived session per server, which is shut down by `ToolExecutor.close_tools`.
+    The sessions live on the process-wide background loop, so they are shared by
+    synchronous and asynchronous callers and survive across event loops.
+
+    Servers are discovered concurrently with a per-server timeout, and the discovered
+    schemas are persisted in an MCPCatalog so that later startups use them immediately
+    and refresh stale entries in the background.
     """
 
-    def _create_tool_callback(self, tool_name: str):
+    def __init__(self, timeout: float = 30.0, catalog: MCPCatalog = None):
         """
-        Create a callback function for a specific tool.
+        Initialize the MCPTools manager.
 
-        Args:
-            tool_name (str): The name of the tool.
+        Sets up one session per MCP server configured in DefaultConfig.
 
-        Returns:
-            Callable: The callback function to execute the tool.
+        Args:
+            timeout (float, optional): Seconds to wait for the discovery of each server.
+            catalog (MCPCatalog, optional): The on-disk catalog of discovered tools.
         """
+        self.servers: Dict[str, Dict] = DefaultConfig.mcp_servers or {}
+        self.sessions = MCPSessionManager(self.servers)
+        self.catalog = catalog or MCPCatalog()
+        self.timeout = timeout
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    def _tool_name(self, server: str, tool_name: str) -> str:
+        # Keep the names of the former composite client, which prefixed tools
+        # with their server name when several servers were configured
+        if len(self.servers) > 1:
+            return f"{server}_{tool_name}"
+        return tool_name
+
+    async def _discover(self, server: str) -> List[Dict]:
+        tools = await self.sessions.get(server).list_tools()
+        schemas = [
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": tool.inputSchema,
+            }
+            for tool in tools
+        ]
+        self.catalog.save(server, self.servers[server], schemas)
+        return schemas
 
-        async def callback(args: Dict) -> ToolResult:
-            try:
-                # The client context manager handles the connection lifecycle
-                async with self.client:
-                    result = await self.client.call_tool(tool_name, args)
-                return ToolResult(output=str(result), success=True)
-            except Exception as e:
-                return ToolResult(error=str(e), success=False)
+    async def _discover_server(self, server: str) -> List[Dict]:
+        cached = self.catalog.load(server, self.servers[server])
+        if cached is not None:
+            schemas, fresh = cached
+            if not fresh:
+                self._refresh_in_background(server)
+            return schemas
 
-        return callback
+        try:
+            return await asyncio.wait_for(self._discover(server), timeout=self.timeout)
+        except Exception as e:
+            logger.warning(
+                f"Discovering the tools of MCP server `{server}` failed: {e!r}"
+            )
+            return []
+
+    async def _refresh(self, server: str):
+        try:
+            await asyncio.wait_for(self._discover(server), timeout=self.timeout)
+            logger.info(f"Refreshed the tool catalog of MCP server `{server}`")
+        except Exception as e:
+            logger.warning(
+                f"Refreshing the tools of MCP server `{server}` failed: {e!r}"
+            )
+
+    def _refresh_in_background(self, server: str):
+        task = asyncio.create_task(self._refresh(server))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
 
-    def __init__(self):
+    def _create_tools(self, schemas_by_server: Dict[str, List[Dict]]) -> List[Tool]:
+        return [
+            MCPTool(
+                mcp_tools=self,
+                server=server,
+                remote_name=schema["name"],
+                name=self._tool_name(server, schema["name"]),
+                description=schema["description"],
+                parameters=schema["inputSchema"],
+            )
+            for server, schemas in schemas_by_server.items()
+            for schema in schemas
+        ]
+
+    async def _discover_all(self) -> Dict[str, List[Dict]]:
+        results = await asyncio.gather(
+            *[self._discover_server(server) for server in self.servers]
+        )
+        return dict(zip(self.servers, results))
+
+    async def alist_tools(self) -> List[Tool]:
         """
-        Initialize the MCPTools manager.
+        List available tools from the configured MCP servers without blocking the event loop.
 
-        Sets up the MCP client using the servers configured in DefaultConfig.
+        Servers without a cached catalog are discovered concurrently through their warm
+        sessions. Stale catalogs are used as is and refreshed in the background.
+
+        Returns:
+            List[Tool]: A list of available tools. Servers that fail or time out are skipped.
         """
-        self.client: Optional[Client] = None
-        if DefaultConfig.mcp_servers:
-            self.client = Client({"mcpServers": DefaultConfig.mcp_servers})
+        if not self.servers:
+            return []
+        return self._create_tools(await run_on_background_loop(self._discover_all()))
 
     def list_tools(self) -> List[Tool]:
         """
         List available tools from the configured MCP servers.
 
-        Connects to the MCP servers, retrieves the list of tools, and wraps them
-        in Tool instances with a closure callback.
+        Blocking variant of `alist_tools` for synchronous callers.
 
         Returns:
-            List[Tool]: A list of available tools. Returns an empty list if no servers
-            are configured or if an error occurs.
+            List[Tool]: A list of available tools. Servers that fail or time out are skipped.
         """
-        if not self.client:
+        if not self.servers:
             return []
+        return self._create_tools(run_async_in_thread(self._discover_all))
 
-        async def _list_tools():
-            async with self.client:
-                return await self.client.list_tools()
-
-        try:
-            tools = run_async_in_thread(_list_tools)
-        except Exception:
-            return []
+    async def _close(self):
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        await self.sessions.close()
 
-        return [
-            Tool(
-                name=tool.name,
-                description=tool.description,
-                parameters=tool.inputSchema,
-                callback=self._create_tool_callback(tool.name),
-            )
-            for tool in tools
-        ]
+    async def close(self):
+        """
+        Cancel the pending catalog refreshes and close the MCP sessions.
+        """
+        await run_on_background_loop(self._close())
 
 
 if __name__ == "__main__":
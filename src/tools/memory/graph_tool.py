@@ -0,0 +1,250 @@
+"""
+This module provides the MemoryGraphTool class for the long-term memory of agents.
+
+Functionality:
+    - Remembers entities such as projects, services, ports, failures and fixes, with
+      typed properties and relations between them, across sessions.
+    - Recalls an entity with its neighborhood, finds entities by kind or name, and finds
+      how two entities are related, from the indexes of the graph instead of re-reading notes.
+    - The graph is stored in `.contextify/long_term_memory/graph.jsonl`.
+
+Usage:
+    tool = MemoryGraphTool()
+    tool._run(command="remember", name="api", kind="service", properties={"port": 8080})
+    tool._run(command="relate", name="api", relation="depends_on", target="db")
+    tool._run(command="recall", name="api", depth=2)
+"""
+
+import os
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal, Optional, override
+
+from src.memory.storage.graph import Edge, GraphStore, Node, get_graph_store
+from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
+
+
+class MemoryGraphArgs(BaseModel):
+    command: Literal["remember", "relate", "recall", "find", "path", "forget"] = Field(
+        description="`remember`: create or update the entity `name`. "
+        "`relate`: relate the entity `name` to the entity `target` by `relation`. "
+        "`recall`: the entity `name` with its related entities up to `depth` relations away. "
+        "`find`: the entities of `kind` and/or whose name contains `name`. "
+        "`path`: how the entities `name` and `target` are related. "
+        "`forget`: delete the entity `name`, or only its `relation` to `target`."
+    )
+    name: Optional[str] = Field(
+        default=None, description="The name of the entity, e.g. `api-server`."
+    )
+    kind: Optional[str] = Field(
+        default=None,
+        description="The kind of the entity, e.g. `project`, `service`, `port`, `failure` or `fix`. Required for new entities.",
+    )
+    properties: Dict[str, Any] = Field(
+        default={},
+        description="For `remember` and `relate`, properties to set: strings, numbers, booleans or lists of them. A null value removes the property.",
+    )
+    relation: Optional[str] = Field(
+        default=None,
+        description="The kind of relation, e.g. `depends_on` or `fixed_by`.",
+    )
+    target: Optional[str] = Field(
+        default=None, description="The name of the other entity of a relation."
+    )
+    depth: int = Field(
+        default=1, description="For `recall`, how many relations away to follow."
+    )
+    max_results: int = Field(
+        default=30, description="The maximum number of entities returned."
+    )
+
+
+def _format_properties(properties: Dict[str, Any]) -> str:
+    return ", ".join(
+        f"{key}={value!r}" for key, value in properties.items() if key != "name"
+    )
+
+
+def _format_node(node: Node) -> str:
+    properties = _format_properties(node.properties)
+    return f"{node.id} ({node.kind})" + (f": {properties}" if properties else "")
+
+
+def _format_edge(edge: Edge) -> str:
+    source, kind, target, properties = edge
+    properties = _format_properties(properties)
+    return f"{source} -{kind}-> {target}" + (f" ({properties})" if properties else "")
+
+
+class MemoryGraphTool(Tool):
+    """
+    A tool for the long-term memory of entities and their relations.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(".contextify", "long_term_memory", "graph.jsonl"),
+    ):
+        """
+        Initialize the tool.
+
+        Args:
+            path (str, optional): The path of the graph log. Defaults to '.contextify/long_term_memory/graph.jsonl'.
+        """
+        super().__init__(
+            name="memory_graph",
+            description="Long-term memory of entities (projects, services, ports, failures, fixes, ...) and their relations, kept across sessions. Remember what you learn that will matter later, and recall it before re-investigating.",
+            parameters=MemoryGraphArgs,
+            execution_policy=ExecutionPolicy.THREAD,
+        )
+        self.path = path
+
+    def _remember(
+        self, store: GraphStore, name: str, kind: Optional[str], properties: Dict
+    ) -> str:
+        node = store.get_node(name)
+        if node is None and not kind:
+            raise ValueError(f"Entity `{name}` is new, its `kind` is required.")
+        merged = dict(node.properties) if node is not None else {}
+        merged.update(properties)
+        merged = {key: value for key, value in merged.items() if value is not None}
+        merged["name"] = name
+        node = store.add_node(name, kind or node.kind, **merged)
+        return f"Remembered {_format_node(node)}"
+
+    def _relate(
+        self,
+        store: GraphStore,
+        name: str,
+        relation: Optional[str],
+        target: Optional[str],
+        properties: Dict,
+    ) -> str:
+        if not relation or not target:
+            raise ValueError("`relation` and `target` are required.")
+        for entity in (name, target):
+            if entity not in store:
+                raise ValueError(
+                    f"Entity `{entity}` is unknown, remember it with its `kind` first."
+                )
+        merged = dict(store.get_edge(name, relation, target) or {})
+        merged.update(properties)
+        merged = {key: value for key, value in merged.items() if value is not None}
+        store.add_edge(name, relation, target, **merged)
+        return f"Remembered {_format_edge((name, relation, target, merged))}"
+
+    def _recall(self, store: GraphStore, name: str, depth: int, limit: int) -> str:
+        # One node more than shown tells whether any were omitted
+        nodes, edges = store.neighborhood(name, depth=depth, max_nodes=limit + 1)
+        if not nodes:
+            raise ValueError(f"Entity `{name}` is unknown.")
+        truncated = len(nodes) > limit
+        if truncated:
+            nodes = nodes[:limit]
+            shown = {node.id for node in nodes}
+            edges = [edge for edge in edges if edge[0] in shown and edge[2] in shown]
+        lines = [_format_node(node) for node in nodes]
+        lines += [_format_edge(edge) for edge in edges]
+        if truncated:
+            lines.append(
+                f"(Entities beyond the first {limit} are omitted, raise `max_results` to see them.)"
+            )
+        return "\n".join(lines)
+
+    def _find(
+        self, store: GraphStore, name: Optional[str], kind: Optional[str], limit: int
+    ) -> str:
+        if not name and not kind:
+            raise ValueError("`name` or `kind` is required.")
+        if kind:
+            nodes = store.nodes_of_kind(kind)
+        else:
+            nodes = store.all_nodes()
+        if name:
+            needle = name.lower()
+            nodes = [node for node in nodes if needle in node.id.lower()]
+        nodes.sort(key=lambda node: node.id)
+        lines = [_format_node(node) for node in nodes[:limit]]
+        if len(nodes) > limit:
+            lines.append(f"({len(nodes) - limit} more entities are omitted.)")
+        return "\n".join(lines) or "(No entities.)"
+
+    def _path(self, store: GraphStore, name: str, target: Optional[str]) -> str:
+        if not target:
+            raise ValueError("`target` is required.")
+        for entity in (name, target):
+            if entity not in store:
+                raise ValueError(f"Entity `{entity}` is unknown.")
+        path = store.shortest_path(name, target)
+        if path is None:
+            return f"(`{name}` and `{target}` are not related within 4 relations.)"
+        if not path:
+            return f"(`{name}` is `{target}`.)"
+        return "\n".join(_format_edge(edge) for edge in path)
+
+    def _forget(
+        self,
+        store: GraphStore,
+        name: str,
+        relation: Optional[str],
+        target: Optional[str],
+    ) -> str:
+        if relation or target:
+            if not relation or not target:
+                raise ValueError("Both `relation` and `target` are required.")
+            if not store.remove_edge(name, relation, target):
+                raise ValueError(f"`{name}` -{relation}-> `{target}` is unknown.")
+            return f"Forgot {name} -{relation}-> {target}"
+        if not store.remove_node(name):
+            raise ValueError(f"Entity `{name}` is unknown.")
+        return f"Forgot {name} and its relations"
+
+    @override
+    def _run(
+        self,
+        command: str,
+        name: Optional[str] = None,
+        kind: Optional[str] = None,
+        properties: Dict[str, Any] = {},
+        relation: Optional[str] = None,
+        target: Optional[str] = None,
+        depth: int = 1,
+        max_results: int = 30,
+    ) -> ToolResult:
+        store = get_graph_store(self.path)
+        try:
+            if command == "find":
+                output = self._find(store, name, kind, max_results)
+            elif not name:
+                raise ValueError("`name` is required.")
+            elif command == "remember":
+                output = self._remember(store, name, kind, properties)
+            elif command == "relate":
+                output = self._relate(store, name, relation, target, properties)
+            elif command == "recall":
+                output = self._recall(store, name, depth, max_results)
+            elif command == "path":
+                output = self._path(store, name, target)
+            else:
+                output = self._forget(store, name, relation, target)
+        except ValueError as e:
+            return ToolResult(error=str(e), success=False)
+        return ToolResult(
+            output=f"<memory command={command}>\n{output}\n</memory>", success=True
+        )
+
+
+if __name__ == "__main__":
+    memory_tool = MemoryGraphTool(path=os.path.join(".cache", "memory_graph.jsonl"))
+    print(
+        memory_tool._run(
+            command="remember", name="api", kind="service", properties={"port": 8080}
+        )
+    )
+    print(memory_tool._run(command="remember", name="db", kind="service"))
+    print(
+        memory_tool._run(
+            command="relate", name="api", relation="depends_on", target="db"
+        )
+    )
+    print(memory_tool._run(command="recall", name="api"))
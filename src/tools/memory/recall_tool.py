@@ -0,0 +1,66 @@
+"""
+This module provides the RecallTool class for recalling short-term memory notes.
+
+Functionality:
+    - Ranks the chunks of the context, progress and summary notes under
+      `.contextify/short_term_memory/` against a query with an incremental BM25 index.
+    - Returns the best snippets with their locations, within a token budget.
+
+Usage:
+    tool = RecallTool()
+    tool._run(query="why did the deployment fail", k=3)
+"""
+
+import os
+from pydantic import BaseModel, Field
+from typing import override
+
+from src.memory.retrieval.notes import format_snippets, get_note_index
+from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
+
+
+class RecallArgs(BaseModel):
+    query: str = Field(description="What to recall, e.g. the problem at hand.")
+    k: int = Field(default=5, description="The maximum number of snippets.")
+    max_tokens: int = Field(
+        default=1500, description="The token budget of the snippets."
+    )
+
+
+class RecallTool(Tool):
+    """
+    Recalls the parts of the short-term memory notes relevant to a query, ranked
+    offline with BM25 instead of re-reading every note.
+    """
+
+    def __init__(self, root: str = os.path.join(".contextify", "short_term_memory")):
+        """
+        Initialize the tool.
+
+        Args:
+            root (str, optional): The memory directory. Defaults to '.contextify/short_term_memory'.
+        """
+        super().__init__(
+            name="recall",
+            description="Recalls the most relevant snippets of the notes recorded in earlier sessions and compactions: context, progress and summaries. Use it before re-investigating something that may have been handled before.",
+            parameters=RecallArgs,
+            execution_policy=ExecutionPolicy.THREAD,
+        )
+        self.root = root
+
+    @override
+    def _run(self, query: str, k: int = 5, max_tokens: int = 1500) -> ToolResult:
+        snippets = get_note_index(self.root).recall(query, k=k, max_tokens=max_tokens)
+        body = format_snippets(snippets) or "(Nothing relevant was recalled.)"
+        return ToolResult(
+            output=f"<recall query={query!r} snippets={len(snippets)}>\n{body}\n</recall>",
+            success=True,
+        )
+
+
+if __name__ == "__main__":
+    from src.utils.loop import run_async_in_thread
+
+    recall_tool = RecallTool()
+    print(run_async_in_thread(recall_tool._execute, query="task progress"))
@@ -0,0 +1,108 @@
+import os
+import atexit
+import asyncio
+import functools
+import threading
+import concurrent.futures
+from enum import Enum
+from typing import Callable, Optional
+
+
+class ExecutionPolicy(str, Enum):
+    """
+    Enum describing where the body of a tool is executed.
+
+    Values:
+        - INLINE: The body runs directly on the event loop. Suitable for tools that only await.
+        - THREAD: The body runs in the shared thread pool. Suitable for blocking I/O.
+        - PROCESS: The body runs in the shared process pool. Suitable for CPU-heavy work
+          whose arguments and results are picklable.
+    """
+
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+_lock = threading.Lock()
+_thread_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def get_thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Get the process-wide bounded thread pool shared by all tools.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The shared thread pool.
+    """
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) + 4),
+                thread_name_prefix="contextify-tool",
+            )
+        return _thread_pool
+
+
+def get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Get the process-wide bounded process pool shared by all tools.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: The shared process pool.
+    """
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max(1, min(8, os.cpu_count() or 1)),
+            )
+        return _process_pool
+
+
+async def run_with_policy(policy: ExecutionPolicy, func: Callable, *args, **kwargs):
+    """
+    Run a synchronous function according to the given execution policy.
+
+    Args:
+        policy (ExecutionPolicy): Where to run the function.
+        func (Callable): The synchronous function to run.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        Any: The return value of the function.
+    """
+    if policy == ExecutionPolicy.INLINE:
+        return func(*args, **kwargs)
+
+    if policy == ExecutionPolicy.THREAD:
+        pool = get_thread_pool()
+    else:
+        pool = get_process_pool()
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_pools(wait: bool = True):
+    """
+    Shut down the shared pools. They are recreated lazily on the next use.
+
+    Args:
+        wait (bool, optional): Whether to wait for pending work to finish.
+    """
+    global _thread_pool, _process_pool
+    with _lock:
+        thread_pool, _thread_pool = _thread_pool, None
+        process_pool, _process_pool = _process_pool, None
+
+    if thread_pool:
+        thread_pool.shutdown(wait=wait, cancel_futures=not wait)
+    if process_pool:
+        process_pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+atexit.register(shutdown_pools)
@@ -13,7 +13,9 @@ class ToolRegistry(ToolExecutor):
         include_tools: List[str] = [],
         exclude_tools: List[str] = [],
         include_mcp_tools: bool = True,
+        cache_results: bool = False,
     ):
+        tools = list(tools or [])
         if include_mcp_tools:
             tools.extend(MCPTools().list_tools())
 
@@ -23,7 +25,43 @@ class ToolRegistry(ToolExecutor):
             if exclude_tools:
                 tools = [tool for tool in tools if tool.get_name() not in exclude_tools]
 
-        super().__init__(tools=tools)
+        super().__init__(tools=tools, cache_results=cache_results)
+
+    @classmethod
+    async def create(
+        cls,
+        tools: Optional[List[Tool]] = None,
+        include_tools: List[str] = [],
+        exclude_tools: List[str] = [],
+        include_mcp_tools: bool = True,
+        cache_results: bool = False,
+        mcp_timeout: float = 30.0,
+    ) -> "ToolRegistry":
+        """
+        Create a registry, discovering the MCP servers concurrently on the running loop.
+
+        Args:
+            tools (List[Tool], optional): The built-in tools of the registry.
+            include_tools (List[str], optional): If set, only keep the tools with these names.
+            exclude_tools (List[str], optional): Drop the tools with these names.
+            include_mcp_tools (bool, optional): Whether to add the tools of the configured MCP servers.
+            cache_results (bool, optional): Whether to memoize the results of pure tools.
+            mcp_timeout (float, optional): Seconds to wait for the discovery of each MCP server.
+
+        Returns:
+            ToolRegistry: The registry.
+        """
+        tools = list(tools or [])
+        if include_mcp_tools:
+            tools.extend(await MCPTools(timeout=mcp_timeout).alist_tools())
+
+        return cls(
+            tools,
+            include_tools=include_tools,
+            exclude_tools=exclude_tools,
+            include_mcp_tools=False,
+            cache_results=cache_results,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+"""
+Notifications of the files written by our tools.
+
+Functionality:
+    - Lets workspace indexes register a listener instead of rescanning the workspace
+      to find the edits they caused themselves.
+    - Calls every listener with the absolute path of each written, created or deleted file.
+    - Serializes the writes to each file, as tools editing the same file may run in
+      parallel threads.
+
+Usage:
+    add_change_listener(lambda path: print(path))
+    notify_file_changed("/repo/src/main.py")
+
+    with file_lock("/repo/src/main.py"):
+        ...  # read, modify and write the file
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List
+
+_listeners: List[Callable[[str], None]] = []
+_listeners_lock = threading.Lock()
+_file_locks: Dict[str, threading.RLock] = {}
+_file_locks_lock = threading.Lock()
+
+
+def add_change_listener(listener: Callable[[str], None]):
+    """
+    Register a function called with the absolute path of every changed file.
+
+    Args:
+        listener (Callable[[str], None]): The function. It should only record the change,
+            as it runs in the writing tool.
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def notify_file_changed(path: str):
+    """
+    Tell the listeners that a file was written, created or deleted.
+
+    Args:
+        path (str): The path of the file.
+    """
+    path = os.path.abspath(path)
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener(path)
+
+
+def file_lock(path: str) -> threading.RLock:
+    """
+    Get the lock held while a file is read, modified and written, so that concurrent
+    edits of the same file do not lose each other's changes.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        threading.RLock: The lock of the file, shared by all tools in this process.
+    """
+    path = os.path.abspath(path)
+    with _file_locks_lock:
+        lock = _file_locks.get(path)
+        if lock is None:
+            lock = _file_locks[path] = threading.RLock()
+        return lock
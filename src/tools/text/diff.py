@@ -0,0 +1,386 @@
+"""
+Bounded unified diffs of line sequences.
+
+Functionality:
+    - Returns nothing for identical content.
+    - Trims the common prefix and suffix, so a local edit in a large file only diffs the edited region.
+    - Diffs the rest with the Myers algorithm, in O((N + M) * D) time for D edited lines.
+      Regions with more than `max_edits` edits are split at the lines occurring once in
+      both versions and diffed piecewise, regions without such lines are reported as
+      replaced entirely.
+    - Caps the rendered diff at a token budget and summarizes what is left out.
+
+Usage:
+    diff = unified_diff(old_content.splitlines(), new_content.splitlines(), "file.py")
+"""
+
+import bisect
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+Opcode = Tuple[str, int, int, int, int]
+
+_MAX_EDITS = 1000
+_CHARS_PER_TOKEN = 4
+
+
+def _myers(a: Sequence, b: Sequence, max_edits: int) -> Optional[List[str]]:
+    """
+    Find a shortest edit script, or None if it needs more than `max_edits` edits.
+
+    Returns:
+        Optional[List[str]]: One tag per step, "=" to keep a line, "-" to delete a line
+            of `a` and "+" to insert a line of `b`.
+    """
+    n, m = len(a), len(b)
+    max_d = min(max_edits, n + m)
+    offset = max_d + 1
+    # v[k + offset] is the furthest x reached on diagonal k = x - y
+    v = [0] * (2 * max_d + 3)
+    trace = []
+    for d in range(max_d + 1):
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace: List[List[int]], x: int, y: int) -> List[str]:
+    script = []
+    for d in range(len(trace) - 1, -1, -1):
+        # trace[d] holds the diagonals -d - 1 to d + 1 before step d
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1 + d + 1] < v[k + 1 + d + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[previous_k + d + 1]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            script.append("=")
+            x -= 1
+            y -= 1
+        if d > 0:
+            script.append("+" if x == previous_x else "-")
+        x, y = previous_x, previous_y
+    script.reverse()
+    return script
+
+
+def _script_opcodes(script: List[str], i: int, j: int) -> List[Opcode]:
+    opcodes = []
+    position = 0
+    while position < len(script):
+        i1, j1 = i, j
+        if script[position] == "=":
+            while position < len(script) and script[position] == "=":
+                i, j, position = i + 1, j + 1, position + 1
+            opcodes.append(("equal", i1, i, j1, j))
+            continue
+        while position < len(script) and script[position] != "=":
+            if script[position] == "-":
+                i += 1
+            else:
+                j += 1
+            position += 1
+        tag = "replace" if i > i1 and j > j1 else "delete" if i > i1 else "insert"
+        opcodes.append((tag, i1, i, j1, j))
+    return opcodes
+
+
+def _anchors(a: Sequence[str], b: Sequence[str]) -> List[Tuple[int, int]]:
+    """
+    Find the lines occurring exactly once in both sequences, keeping the longest run of
+    them in the same order in both, as in patience diff.
+
+    Returns:
+        List[Tuple[int, int]]: The (i, j) positions of the anchor lines, increasing.
+    """
+    counts = {}
+    for line in a:
+        counts[line] = counts.get(line, 0) + 1
+    b_positions = {}
+    for j, line in enumerate(b):
+        if counts.get(line) == 1:
+            b_positions[line] = -1 if line in b_positions else j
+    pairs = [
+        (i, b_positions[line])
+        for i, line in enumerate(a)
+        if b_positions.get(line, -1) >= 0 and counts[line] == 1
+    ]
+
+    # Longest increasing subsequence of the positions in b
+    tails: List[int] = []
+    tail_positions: List[int] = []
+    previous: List[int] = []
+    for index, (_, j) in enumerate(pairs):
+        position = bisect.bisect_left(tail_positions, j)
+        previous.append(tails[position - 1] if position else -1)
+        if position == len(tails):
+            tails.append(index)
+            tail_positions.append(j)
+        else:
+            tails[position] = index
+            tail_positions[position] = j
+    anchors = []
+    index = tails[-1] if tails else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _diff_region(
+    a: Sequence[str],
+    b: Sequence[str],
+    a_start: int,
+    a_end: int,
+    b_start: int,
+    b_end: int,
+    max_edits: int,
+    opcodes: List[Opcode],
+):
+    prefix = a_start
+    while prefix < a_end and b_start + prefix - a_start < b_end:
+        if a[prefix] != b[b_start + prefix - a_start]:
+            break
+        prefix += 1
+    if prefix > a_start:
+        opcodes.append(("equal", a_start, prefix, b_start, b_start + prefix - a_start))
+        b_start += prefix - a_start
+        a_start = prefix
+    suffix = 0
+    while (
+        a_end - suffix > a_start
+        and b_end - suffix > b_start
+        and a[a_end - suffix - 1] == b[b_end - suffix - 1]
+    ):
+        suffix += 1
+    a_end, b_end = a_end - suffix, b_end - suffix
+
+    a_middle, b_middle = a[a_start:a_end], b[b_start:b_end]
+    if a_middle or b_middle:
+        script = None
+        anchors = []
+        if a_middle and b_middle and not set(a_middle).isdisjoint(b_middle):
+            script = _myers(a_middle, b_middle, max_edits)
+            if script is None:
+                anchors = _anchors(a_middle, b_middle)
+        if script is not None:
+            opcodes += _script_opcodes(script, a_start, b_start)
+        elif anchors:
+            # Too many edits for one script, diff the regions between anchor lines
+            i, j = a_start, b_start
+            for anchor_i, anchor_j in anchors:
+                anchor_i, anchor_j = a_start + anchor_i, b_start + anchor_j
+                _diff_region(a, b, i, anchor_i, j, anchor_j, max_edits, opcodes)
+                opcodes.append(
+                    ("equal", anchor_i, anchor_i + 1, anchor_j, anchor_j + 1)
+                )
+                i, j = anchor_i + 1, anchor_j + 1
+            _diff_region(a, b, i, a_end, j, b_end, max_edits, opcodes)
+        else:
+            tag = (
+                "replace"
+                if a_middle and b_middle
+                else "delete" if a_middle else "insert"
+            )
+            opcodes.append((tag, a_start, a_end, b_start, b_end))
+    if suffix:
+        opcodes.append(("equal", a_end, a_end + suffix, b_end, b_end + suffix))
+
+
+def diff_opcodes(
+    a: Sequence[str], b: Sequence[str], max_edits: int = _MAX_EDITS
+) -> List[Opcode]:
+    """
+    Compare two line sequences.
+
+    Args:
+        a (Sequence[str]): The old lines.
+        b (Sequence[str]): The new lines.
+        max_edits (int, optional): The edit count beyond which a differing region is
+            split at the lines it shares uniquely with the new lines, or reported as
+            replaced entirely if there are none.
+
+    Returns:
+        List[Opcode]: `difflib`-style (tag, i1, i2, j1, j2) opcodes.
+    """
+    opcodes: List[Opcode] = []
+    _diff_region(a, b, 0, len(a), 0, len(b), max_edits, opcodes)
+
+    # Join the adjacent opcodes of neighbouring regions
+    merged: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if i1 == i2 and j1 == j2:
+            continue
+        if merged and (merged[-1][0] == "equal") == (tag == "equal"):
+            _, i1, _, j1, _ = merged.pop()
+            if tag != "equal":
+                tag = (
+                    "replace"
+                    if i2 > i1 and j2 > j1
+                    else "delete" if i2 > i1 else "insert"
+                )
+        merged.append((tag, i1, i2, j1, j2))
+    return merged
+
+
+def _group(opcodes: List[Opcode], context: int) -> Iterator[List[Opcode]]:
+    """
+    Group the changes with up to `context` equal lines around them.
+    """
+    if not opcodes or (len(opcodes) == 1 and opcodes[0][0] == "equal"):
+        return
+    opcodes = list(opcodes)
+    tag, i1, i2, j1, j2 = opcodes[0]
+    if tag == "equal":
+        opcodes[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    tag, i1, i2, j1, j2 = opcodes[-1]
+    if tag == "equal":
+        opcodes[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    group = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        # A long equal run ends a group and starts the next one
+        if tag == "equal" and i2 - i1 > 2 * context and group:
+            group.append((tag, i1, i1 + context, j1, j1 + context))
+            yield group
+            group = []
+            i1, j1 = i2 - context, j2 - context
+        group.append((tag, i1, i2, j1, j2))
+    if group:
+        yield group
+
+
+def _format_range(start: int, length: int) -> str:
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def format_hunks(
+    a: Sequence[str],
+    b: Sequence[str],
+    context: int = 3,
+    a_offset: int = 0,
+    b_offset: int = 0,
+    max_edits: int = _MAX_EDITS,
+) -> List[List[str]]:
+    """
+    Diff two line sequences into unified diff hunks.
+
+    Args:
+        a (Sequence[str]): The old lines.
+        b (Sequence[str]): The new lines.
+        context (int, optional): The number of equal lines around each change.
+        a_offset (int, optional): The number of old lines before `a`, for the hunk headers.
+        b_offset (int, optional): The number of new lines before `b`, for the hunk headers.
+        max_edits (int, optional): See `diff_opcodes`.
+
+    Returns:
+        List[List[str]]: The hunks, each a header followed by its lines.
+    """
+    hunks = []
+    for group in _group(diff_opcodes(a, b, max_edits), context):
+        first, last = group[0], group[-1]
+        old_range = _format_range(a_offset + first[1], last[2] - first[1])
+        new_range = _format_range(b_offset + first[3], last[4] - first[3])
+        hunk = [f"@@ -{old_range} +{new_range} @@"]
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                hunk += [" " + line for line in a[i1:i2]]
+                continue
+            hunk += ["-" + line for line in a[i1:i2]]
+            hunk += ["+" + line for line in b[j1:j2]]
+        hunks.append(hunk)
+    return hunks
+
+
+def render_hunks(
+    from_file: str, to_file: str, hunks: List[List[str]], max_tokens: int = 4000
+) -> str:
+    """
+    Render hunks as a unified diff capped at a token budget.
+
+    Args:
+        from_file (str): The name of the old file.
+        to_file (str): The name of the new file.
+        hunks (List[List[str]]): The hunks from `format_hunks`.
+        max_tokens (int, optional): The approximate token budget of the diff.
+
+    Returns:
+        str: The diff, or an empty string without hunks.
+    """
+    if not hunks:
+        return ""
+    lines = [f"--- {from_file}", f"+++ {to_file}"]
+    budget = max_tokens * _CHARS_PER_TOKEN
+    shown = 0
+    for hunk in hunks:
+        size = sum(len(line) + 1 for line in hunk)
+        if shown and size > budget:
+            break
+        if size > budget:
+            # Show the start of a single hunk exceeding the budget on its own
+            kept = []
+            for line in hunk:
+                budget -= len(line) + 1
+                if budget < 0:
+                    break
+                kept.append(line)
+            lines += kept
+        else:
+            lines += hunk
+            budget -= size
+        shown += 1
+        if budget < 0:
+            break
+
+    complete = shown == len(hunks) and budget >= 0
+    if not complete:
+        added = sum(1 for hunk in hunks for line in hunk[1:] if line[0] == "+")
+        removed = sum(1 for hunk in hunks for line in hunk[1:] if line[0] == "-")
+        lines.append(
+            f"(The diff is truncated to fit the token budget: {shown} of {len(hunks)} hunks shown, "
+            f"{added} lines added and {removed} lines removed in total.)"
+        )
+    return "\n".join(lines)
+
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    file_name: str,
+    context: int = 3,
+    max_tokens: int = 4000,
+) -> str:
+    """
+    Diff two versions of a file into a unified diff capped at a token budget.
+
+    Args:
+        a (Sequence[str]): The old lines.
+        b (Sequence[str]): The new lines.
+        file_name (str): The file name shown in the diff header.
+        context (int, optional): The number of equal lines around each change.
+        max_tokens (int, optional): The approximate token budget of the diff.
+
+    Returns:
+        str: The diff, or an empty string if the versions are identical.
+    """
+    if a == b:
+        return ""
+    return render_hunks(
+        file_name, file_name, format_hunks(a, b, context), max_tokens=max_tokens
+    )
@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import override
+from typing import List, override
 from pathlib import Path
 
+from src.tools.text.changes import file_lock
 from src.tools.text.write_file import write_file
 from src.tools.text.insert_file import insert_file
 from src.tools.text.replace_file import replace_file
+from src.tools.text.line_edit import LineEdit, apply_line_edits
 from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
 
 
 class CreateFileArgs(BaseModel):
@@ -46,6 +49,26 @@ class ReplaceFileArgs(BaseModel):
     )
 
 
+class LineEditArgs(BaseModel):
+    start_line: int = Field(
+        description="The first line to replace, numbered as in the file before any of the edits."
+    )
+    end_line: int = Field(
+        description="The last line to replace, inclusive. `start_line - 1` inserts `new_content` before `start_line` without replacing any line."
+    )
+    new_content: str = Field(
+        default="",
+        description="The new content of the lines. An empty content deletes them.",
+    )
+
+
+class EditFileArgs(BaseModel):
+    file_path: str = Field(description="Absolute path to file, e.g. `/repo/file.py`.")
+    edits: List[LineEditArgs] = Field(
+        description="The edits to apply together. All line numbers refer to the file before any of the edits, and the edited ranges must not overlap."
+    )
+
+
 class CreateFileTool(Tool):
 
     def __init__(self):
@@ -53,24 +76,30 @@ class CreateFileTool(Tool):
             name="create_file",
             description="Creates a file at the specified path with the given content.",
             parameters=CreateFileArgs,
+            execution_policy=ExecutionPolicy.THREAD,
         )
 
     @override
-    async def _execute(self, file_path: str, file_text: str) -> ToolResult:
+    def get_modified_paths(self, file_path: str, **kwargs) -> List[str]:
+        return [file_path]
+
+    @override
+    def _run(self, file_path: str, file_text: str) -> ToolResult:
         file_path = Path(file_path)
-        if file_path.exists():
-            return ToolResult(
-                error=f"File {file_path} already exists.",
-                success=False,
-            )
+        with file_lock(file_path):
+            if file_path.exists():
+                return ToolResult(
+                    error=f"File {file_path} already exists.",
+                    success=False,
+                )
 
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.touch()
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.touch()
 
-        return ToolResult(
-            output=write_file(file_path, "", file_text),
-            success=True,
-        )
+            return ToolResult(
+                output=write_file(file_path, "", file_text),
+                success=True,
+            )
 
 
 class InsertFileTool(Tool):
@@ -80,12 +109,15 @@ class InsertFileTool(Tool):
             name="insert_file",
             description="Inserts the given content after the specified line number in the file.",
             parameters=InsertFileArgs,
+            execution_policy=ExecutionPolicy.THREAD,
         )
 
     @override
-    async def _execute(
-        self, file_path: str, insert_line: int, file_text: str
-    ) -> ToolResult:
+    def get_modified_paths(self, file_path: str, **kwargs) -> List[str]:
+        return [file_path]
+
+    @override
+    def _run(self, file_path: str, insert_line: int, file_text: str) -> ToolResult:
         file_path = Path(file_path)
         return ToolResult(
             output=insert_file(file_path, file_text, insert_line),
@@ -100,8 +132,13 @@ class ReplaceFileTool(Tool):
             name="replace_file",
             description="Replaces the old content with the new content in the file.",
             parameters=ReplaceFileArgs,
+            execution_policy=ExecutionPolicy.THREAD,
         )
 
+    @override
+    def get_modified_paths(self, file_path: str, **kwargs) -> List[str]:
+        return [file_path]
+
     # @override
     # async def _execute(
     #     self, file_path: str, old_content: str, new_content: str
@@ -112,7 +149,7 @@ class ReplaceFileTool(Tool):
     #         success=True,
     #     )
     @override
-    async def _execute(
+    def _run(
         self, file_path: str, start_line: int, end_line: int, new_content: str
     ) -> ToolResult:
         file_path = Path(file_path)
@@ -122,6 +159,30 @@ class ReplaceFileTool(Tool):
         )
 
 
+class EditFileTool(Tool):
+
+    def __init__(self):
+        super().__init__(
+            name="edit_file",
+            description="Applies several line edits to a file at once. Every edit is numbered by the original lines of the file, so later edits need no adjustment for earlier ones. Either all edits are applied or none.",
+            parameters=EditFileArgs,
+            execution_policy=ExecutionPolicy.THREAD,
+        )
+
+    @override
+    def get_modified_paths(self, file_path: str, **kwargs) -> List[str]:
+        return [file_path]
+
+    @override
+    def _run(self, file_path: str, edits: List[dict]) -> ToolResult:
+        file_path = Path(file_path)
+        try:
+            diff = apply_line_edits(file_path, [LineEdit(**edit) for edit in edits])
+        except ValueError as e:
+            return ToolResult(error=f"No edit was applied: {e}", success=False)
+        return ToolResult(output=diff, success=True)
+
+
 if __name__ == "__main__":
     from src.utils.loop import run_async_in_thread
 
@@ -154,3 +215,15 @@ if __name__ == "__main__":
             new_content="print('Hello, World!yyyy')",
         )
     )
+
+    edit_tool = EditFileTool()
+    print(
+        run_async_in_thread(
+            edit_tool._execute,
+            file_path="test/test.py",
+            edits=[
+                {"start_line": 1, "end_line": 0, "new_content": "import os"},
+                {"start_line": 2, "end_line": 2, "new_content": "print(os.getcwd())"},
+            ],
+        )
+    )
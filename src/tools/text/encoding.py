@@ -0,0 +1,125 @@
+import os
+import codecs
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from charset_normalizer import from_bytes
+
+# Checked longest first, since the UTF-32 LE BOM starts with the UTF-16 LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_DETECTION_SAMPLE_SIZE = 64 * 1024
+_CACHE_SIZE = 4096
+
+_cache: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stat_key(file_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _get_cached(file_path: Path) -> Optional[str]:
+    key = _stat_key(file_path)
+    if key is None:
+        return None
+    with _cache_lock:
+        entry = _cache.get(str(file_path))
+        if entry is None or entry[:2] != key:
+            return None
+        _cache.move_to_end(str(file_path))
+        return entry[2]
+
+
+def remember_encoding(file_path: Path, encoding: str):
+    """
+    Cache the encoding of a file for its current modification time and size.
+
+    Args:
+        file_path (Path): The file.
+        encoding (str): Its encoding.
+    """
+    key = _stat_key(file_path)
+    if key is None:
+        return
+    with _cache_lock:
+        _cache[str(file_path)] = (*key, encoding)
+        _cache.move_to_end(str(file_path))
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _detect(raw_data: bytes, final: bool = True) -> Tuple[str, Optional[str]]:
+    for bom, encoding in _BOMS:
+        if raw_data.startswith(bom):
+            return encoding, None
+
+    # Almost every file is UTF-8 or ASCII, a strict decode settles it in one pass.
+    # A sample may end in the middle of a character, which is then not an error.
+    try:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        return "utf-8", decoder.decode(raw_data, final)
+    except UnicodeDecodeError:
+        pass
+
+    # Legacy encodings are detected on a sample, not the whole file
+    result = from_bytes(raw_data[:_DETECTION_SAMPLE_SIZE]).best()
+    return (result.encoding if result else "utf-8"), None
+
+
+def decode_file(file_path: Path) -> Tuple[str, str]:
+    """
+    Read and decode a file, detecting its encoding unless cached for its current version.
+
+    Args:
+        file_path (Path): The file.
+
+    Returns:
+        Tuple[str, str]: The decoded content and the encoding.
+    """
+    raw_data = file_path.read_bytes()
+    encoding = _get_cached(file_path)
+    if encoding is not None:
+        return raw_data.decode(encoding, errors="replace"), encoding
+
+    encoding, content = _detect(raw_data)
+    if content is None:
+        content = raw_data.decode(encoding, errors="replace")
+    remember_encoding(file_path, encoding)
+    return content, encoding
+
+
+def detect_encoding(file_path: Path, default: str = "utf-8") -> str:
+    """
+    Get the encoding of a file, reading only a sample of files not in the cache.
+
+    Args:
+        file_path (Path): The file.
+        default (str, optional): The encoding of missing or empty files.
+
+    Returns:
+        str: The encoding.
+    """
+    encoding = _get_cached(file_path)
+    if encoding is not None:
+        return encoding
+    try:
+        with open(file_path, "rb") as f:
+            sample = f.read(_DETECTION_SAMPLE_SIZE)
+    except OSError:
+        return default
+    if not sample:
+        return default
+
+    return _detect(sample, final=False)[0]
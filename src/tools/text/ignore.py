@@ -0,0 +1,226 @@
+"""
+`.gitignore`-style filtering of workspace paths.
+
+Functionality:
+    - Skips version control, dependency and cache directories by default.
+    - Applies the `.gitignore` files from the enclosing repository root down to each
+      walked directory, with negation, directory-only and anchored patterns.
+
+Paths are matched relative to the root of the rules, with forward slashes.
+
+Usage:
+    rules = IgnoreRules.for_directory(Path("/repo"))
+    rules.is_ignored("node_modules", is_dir=True)
+    rules.child("src").is_ignored("src/build", is_dir=True)
+    files = walk_files("/repo")
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_IGNORES = [
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "node_modules/",
+    "__pycache__/",
+    ".venv/",
+    "venv/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".tox/",
+    ".idea/",
+    ".DS_Store",
+    "*.pyc",
+]
+
+# (regex, negated, directory only, base directory relative to the root)
+Rule = Tuple[re.Pattern, bool, bool, str]
+
+
+def _translate(pattern: str) -> str:
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            regex.append("[" + pattern[i + 1 : end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(regex)
+
+
+def parse_rule(line: str, base: str = "") -> Optional[Rule]:
+    """
+    Parse one `.gitignore` line.
+
+    Args:
+        line (str): The line.
+        base (str, optional): The directory of the `.gitignore` file relative to the root,
+            with a trailing slash, or empty for the root.
+
+    Returns:
+        Optional[Rule]: The rule, or None for blank lines and comments.
+    """
+    line = line.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    if line.startswith("\\"):
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # Patterns with an inner slash are relative to the .gitignore, others match at any depth
+    anchored = "/" in line
+    line = line.lstrip("/")
+    regex = _translate(line)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return re.compile(regex + "$"), negated, directory_only, base
+
+
+class IgnoreRules:
+    """
+    The ignore rules in effect in one directory of a tree rooted at `root`.
+    """
+
+    def __init__(self, root: Path, rules: List[Rule], sources: List[str]):
+        self.root = root
+        self.rules = rules
+        # The .gitignore files read, so that caches can be invalidated when they change
+        self.sources = sources
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> "IgnoreRules":
+        """
+        Get the rules of a directory, reading the `.gitignore` files from the enclosing
+        repository root down to it.
+
+        Args:
+            directory (Path): The directory.
+
+        Returns:
+            IgnoreRules: The rules, rooted at the repository root or at `directory` itself.
+        """
+        directory = directory.resolve()
+        root = directory
+        for parent in [directory, *directory.parents]:
+            if (parent / ".git").exists():
+                root = parent
+                break
+
+        rules = cls(root, [parse_rule(line) for line in DEFAULT_IGNORES], [])
+        rules = rules._load("")
+        if directory != root:
+            relative = directory.relative_to(root).as_posix()
+            parts = relative.split("/")
+            for depth in range(1, len(parts) + 1):
+                rules = rules.child("/".join(parts[:depth]))
+        return rules
+
+    def _load(self, relative: str) -> "IgnoreRules":
+        path = self.root / relative / ".gitignore"
+        sources = self.sources + [str(path)]
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                lines = f.readlines()
+        except OSError:
+            return IgnoreRules(self.root, self.rules, sources)
+        base = f"{relative}/" if relative else ""
+        new_rules = [
+            rule for rule in (parse_rule(line, base) for line in lines) if rule
+        ]
+        return IgnoreRules(self.root, self.rules + new_rules, sources)
+
+    def child(self, relative: str) -> "IgnoreRules":
+        """
+        Get the rules of a subdirectory, adding its `.gitignore` if any.
+
+        Args:
+            relative (str): The subdirectory relative to the root, with forward slashes.
+
+        Returns:
+            IgnoreRules: The rules of the subdirectory.
+        """
+        return self._load(relative)
+
+    def is_ignored(self, relative: str, is_dir: bool) -> bool:
+        """
+        Check whether a path is ignored. The last matching rule decides.
+
+        Args:
+            relative (str): The path relative to the root, with forward slashes.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path is ignored.
+        """
+        ignored = False
+        for regex, negated, directory_only, base in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if base and not relative.startswith(base):
+                continue
+            if regex.match(relative[len(base) :]):
+                ignored = not negated
+        return ignored
+
+
+def walk_files(root: str) -> Dict[str, Tuple[int, int]]:
+    """
+    List the files under a directory that are not ignored. Symlinked directories are
+    not followed.
+
+    Args:
+        root (str): The absolute path of the directory.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The (mtime_ns, size) of each file, by path relative
+            to `root` with forward slashes.
+    """
+    files = {}
+    stack = [(root, "", IgnoreRules.for_directory(Path(root)))]
+    while stack:
+        path, relative, rules = stack.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if rules.is_ignored(entry_relative, is_dir):
+                    continue
+                if is_dir:
+                    stack.append(
+                        (entry.path, entry_relative, rules.child(entry_relative))
+                    )
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry_relative] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return files
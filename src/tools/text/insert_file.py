@@ -1,6 +1,15 @@
 from pathlib import Path
+from src.tools.text.changes import file_lock
+from src.tools.text.line_edit import LineEdit, apply_line_edits
+from src.tools.text.line_index import get_line_index
 from src.tools.text.read_file import read_raw_file
-from src.tools.text.write_file import write_file
+
+
+def _line_count(file_path: Path) -> int:
+    index = get_line_index(file_path)
+    if index is None:
+        return len(read_raw_file(file_path).splitlines())
+    return index.line_count
 
 
 def insert_file(
@@ -8,28 +17,28 @@ def insert_file(
     new_content: str,
     insert_line: int = -1,
 ):
-    old_content = read_raw_file(file_path)
-
-    new_content = new_content.expandtabs()
-    lines = old_content.splitlines()
-
-    if insert_line == -1:
-        insert_line = len(lines) + 1
-
-    if insert_line <= 0 or insert_line > len(lines) + 1:
-        raise ValueError(
-            f"insert_line must be in range [1, {len(lines) + 1}], but got {insert_line}"
+    with file_lock(file_path):
+        line_count = _line_count(file_path)
+
+        if insert_line == -1:
+            insert_line = line_count + 1
+
+        if insert_line <= 0 or insert_line > line_count + 1:
+            raise ValueError(
+                f"insert_line must be in range [1, {line_count + 1}], but got {insert_line}"
+            )
+
+        return apply_line_edits(
+            file_path,
+            [
+                LineEdit(
+                    start_line=insert_line,
+                    end_line=insert_line - 1,
+                    new_content=new_content,
+                )
+            ],
         )
 
-    lines.insert(insert_line - 1, new_content)
-    new_content = "\n".join(lines)
-
-    return write_file(
-        file_path,
-        old_content,
-        new_content,
-    )
-
 
 if __name__ == "__main__":
     file_path = ".gitignore"
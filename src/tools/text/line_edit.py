@@ -0,0 +1,283 @@
+"""
+Line-range edits applied by streaming a file into a temporary copy.
+
+Functionality:
+    - Locates the edited lines through the line index, without reading the rest of the file.
+    - Streams the untouched bytes and the new lines into a temporary file in the same
+      directory and renames it over the original, so a failed edit never leaves the
+      file truncated.
+    - Keeps the encoding, the line endings and the presence of a trailing newline.
+    - Updates the cached line index and returns a diff of the edited regions only.
+
+Files in encodings that are not ASCII-compatible (UTF-16, UTF-32) are edited in memory,
+with the same atomic replacement.
+"""
+
+import os
+import codecs
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+from pydantic import BaseModel
+from src.tools.text.diff import format_hunks, render_hunks
+from src.tools.text.changes import file_lock, notify_file_changed
+from src.tools.text.encoding import decode_file, remember_encoding
+from src.tools.text.line_index import forget_line_index, get_line_index
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+_DIFF_CONTEXT = 3
+
+
+class LineEdit(BaseModel):
+    """
+    Replaces lines `start_line` to `end_line` (1-based, inclusive) with `new_content`.
+    An `end_line` of `start_line - 1` inserts the new content before `start_line`, and an
+    empty `new_content` deletes the lines.
+    """
+
+    start_line: int
+    end_line: int
+    new_content: str = ""
+
+
+def _split_lines(text: str) -> List[str]:
+    lines = text.expandtabs().replace("\r\n", "\n").split("\n")
+    # A trailing newline ends the last line rather than starting an empty one
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _check_edits(edits: List[LineEdit], line_count: int) -> List[LineEdit]:
+    edits = sorted(edits, key=lambda edit: (edit.start_line, edit.end_line))
+    previous_end = 0
+    for edit in edits:
+        if not (
+            1 <= edit.start_line <= line_count + 1
+            and edit.start_line - 1 <= edit.end_line <= line_count
+        ):
+            raise ValueError(
+                f"Lines {edit.start_line}-{edit.end_line} are out of range, the file has {line_count} lines."
+            )
+        if edit.start_line <= previous_end:
+            raise ValueError(
+                f"The edit of lines {edit.start_line}-{edit.end_line} overlaps another edit."
+            )
+        previous_end = edit.end_line
+    return edits
+
+
+def _diff(
+    file_path: Path,
+    read_lines: Callable[[int, int], List[str]],
+    line_count: int,
+    edits: List[Tuple[LineEdit, List[str]]],
+) -> str:
+    """
+    Diff the edited regions with their context lines, numbered as in the whole file.
+    Edits whose context lines touch are diffed together as one window.
+    """
+    groups = []
+    for edit, new_lines in edits:
+        if (
+            groups
+            and edit.start_line - groups[-1][-1][0].end_line <= 2 * _DIFF_CONTEXT + 1
+        ):
+            groups[-1].append((edit, new_lines))
+        else:
+            groups.append([(edit, new_lines)])
+
+    hunks = []
+    shift = 0
+    for group in groups:
+        window_start = max(1, group[0][0].start_line - _DIFF_CONTEXT)
+        window_end = min(line_count, group[-1][0].end_line + _DIFF_CONTEXT)
+        old_window = read_lines(window_start, window_end)
+        new_window = []
+        position = window_start
+        for edit, new_lines in group:
+            new_window += old_window[
+                position - window_start : edit.start_line - window_start
+            ]
+            new_window += new_lines
+            position = edit.end_line + 1
+        new_window += old_window[position - window_start :]
+
+        hunks += format_hunks(
+            old_window,
+            new_window,
+            _DIFF_CONTEXT,
+            a_offset=window_start - 1,
+            b_offset=window_start - 1 + shift,
+        )
+        shift += len(new_window) - len(old_window)
+
+    return render_hunks(str(file_path), str(file_path), hunks)
+
+
+def _copy_range(src, dst, start: int, end: int):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(_COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def _replace_atomically(file_path: Path, write: Callable):
+    """
+    Write a temporary file next to `file_path` and rename it over the original.
+    """
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as temp:
+            write(temp)
+            temp.flush()
+            os.fsync(temp.fileno())
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _encode_lines(file_path: Path, lines: List[str], encoding: str) -> List[bytes]:
+    try:
+        return [line.encode(encoding) for line in lines]
+    except UnicodeEncodeError:
+        raise ValueError(
+            f"The new content cannot be encoded as {encoding}, the encoding of {file_path}."
+        )
+
+
+def _apply_streaming(file_path: Path, index, edits: List[LineEdit]) -> str:
+    line_count = index.line_count
+    size = index.offsets[-1]
+    # Lines after the BOM are plain UTF-8
+    codec = "utf-8" if index.encoding == "utf-8-sig" else index.encoding
+    bom = codecs.BOM_UTF8 if index.encoding == "utf-8-sig" else b""
+
+    with open(file_path, "rb") as f:
+        first_line = f.read(index.offsets[1]) if line_count else b""
+        f.seek(max(0, size - 1))
+        last_byte = f.read(1)
+    newline = b"\r\n" if first_line.endswith(b"\r\n") else b"\n"
+    trailing_newline = not line_count or last_byte == b"\n"
+
+    edits = _check_edits(edits, line_count)
+    # Without a trailing newline, edit the file as if its last line had one and drop
+    # it from the result, so every region ends at a line boundary and regions at the
+    # end of the file cannot overlap
+    end_of_file = size if trailing_newline else size + len(newline)
+    planned = []
+    regions = []
+    for edit in edits:
+        new_lines = _split_lines(edit.new_content)
+        planned.append((edit, new_lines))
+        pieces = [line + newline for line in _encode_lines(file_path, new_lines, codec)]
+        start, end = index.line_range(edit.start_line, edit.end_line)
+        start = end_of_file if start == size else start
+        end = end_of_file if end == size else end
+        if bom and start < len(bom):
+            # The BOM stays in front of the first line
+            start = len(bom)
+            end = max(end, start)
+        regions.append((edit.start_line, edit.end_line, start, end, pieces))
+
+    diff = _diff(file_path, index.read_lines, line_count, planned)
+
+    def write(temp):
+        position = 0
+        with open(file_path, "rb") as src:
+            for _, _, start, end, pieces in regions:
+                _copy_range(src, temp, position, min(start, size))
+                if start > size >= position:
+                    temp.write(newline)
+                temp.writelines(pieces)
+                position = end
+            _copy_range(src, temp, position, size)
+            if position <= size < end_of_file:
+                temp.write(newline)
+        if not trailing_newline and temp.tell() > len(bom):
+            temp.truncate(temp.tell() - len(newline))
+
+    _replace_atomically(file_path, write)
+    remember_encoding(file_path, index.encoding)
+    notify_file_changed(str(file_path))
+
+    stat = os.stat(file_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    if (bom and regions and regions[0][2] == len(bom)) or (
+        regions and regions[-1][3] == end_of_file != size
+    ):
+        # The BOM shifts the offsets of an edited first line, and the missing newline
+        # those of an edited last line, rescan on the next use
+        forget_line_index(file_path)
+    else:
+        # Later regions first, so the line numbers of earlier ones stay valid
+        for start_line, end_line, _, _, pieces in reversed(regions):
+            index.replace_lines(start_line, end_line, map(len, pieces), key)
+        index.key = key
+    return diff
+
+
+def _apply_in_memory(file_path: Path, edits: List[LineEdit]) -> str:
+    content, encoding = decode_file(file_path)
+    first_newline = content.find("\n")
+    newline = (
+        "\r\n" if first_newline > 0 and content[first_newline - 1] == "\r" else "\n"
+    )
+    lines = content.split("\n")
+    trailing_newline = lines[-1] == ""
+    if trailing_newline:
+        lines.pop()
+    lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    edits = _check_edits(edits, len(lines))
+    planned = [(edit, _split_lines(edit.new_content)) for edit in edits]
+    diff = _diff(
+        file_path, lambda start, end: lines[start - 1 : end], len(lines), planned
+    )
+
+    new_lines = list(lines)
+    for edit, edit_lines in reversed(planned):
+        new_lines[edit.start_line - 1 : edit.end_line] = edit_lines
+    new_content = newline.join(new_lines)
+    if trailing_newline and new_lines:
+        new_content += newline
+    data = new_content.encode(encoding)
+
+    _replace_atomically(file_path, lambda temp: temp.write(data))
+    remember_encoding(file_path, encoding)
+    notify_file_changed(str(file_path))
+    return diff
+
+
+def apply_line_edits(file_path: Path, edits: List[LineEdit]) -> str:
+    """
+    Apply non-overlapping line edits to a file in one atomic write.
+
+    Args:
+        file_path (Path): The file.
+        edits (List[LineEdit]): The edits, numbered by the lines of the file before any edit.
+
+    Raises:
+        ValueError: If an edit is out of range, edits overlap, or the new content cannot
+            be encoded in the encoding of the file.
+
+    Returns:
+        str: A unified diff of the edited regions.
+    """
+    with file_lock(file_path):
+        index = get_line_index(file_path)
+        if index is None:
+            return _apply_in_memory(file_path, edits)
+        return _apply_streaming(file_path, index, edits)
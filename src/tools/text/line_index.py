@@ -0,0 +1,208 @@
+"""
+Line-offset index for random access to the lines of large text files.
+
+Functionality:
+    - Scans a file once through `mmap` into a compact array of line start offsets.
+    - Caches the index per path, validated by the file's (mtime_ns, size).
+    - Updates the index in place after our own edits instead of rescanning the file.
+    - Reads and decodes only the byte range of the requested lines.
+
+Lines are delimited by `\\n`, a trailing `\\r` is stripped. Files in encodings that are
+not ASCII-compatible (UTF-16, UTF-32) are not indexed.
+
+Usage:
+    index = get_line_index(Path("big.log"))
+    lines = index.read_lines(1_000_000, 1_000_050)
+"""
+
+import os
+import mmap
+import codecs
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from src.tools.text.encoding import detect_encoding
+
+_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+_CACHE_SIZE = 64
+
+
+def _is_ascii_compatible(encoding: str) -> bool:
+    name = codecs.lookup(encoding).name
+    return not name.startswith(("utf-16", "utf-32"))
+
+
+def _typecode(size: int) -> str:
+    # 4-byte offsets halve the index size of files below 4 GB
+    return "I" if size < 2**32 and array("I").itemsize == 4 else "Q"
+
+
+class LineIndex:
+    """
+    The line start offsets of a file, followed by the file size.
+    """
+
+    def __init__(self, path: Path, key: Tuple[int, int], encoding: str, offsets: array):
+        self.path = path
+        self.key = key
+        self.encoding = encoding
+        self.offsets = offsets
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def build(cls, path: Path, encoding: str) -> "LineIndex":
+        """
+        Scan a file for its line offsets.
+
+        Args:
+            path (Path): The file.
+            encoding (str): Its encoding, which must be ASCII-compatible.
+
+        Returns:
+            LineIndex: The index.
+        """
+        stat = os.stat(path)
+        size = stat.st_size
+        offsets = array(_typecode(size), [0])
+        if size:
+            with open(path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                for block_start in range(0, size, _SCAN_BLOCK_SIZE):
+                    block = mm[block_start : block_start + _SCAN_BLOCK_SIZE]
+                    # Splitting in C and accumulating the part lengths avoids a Python
+                    # loop iteration per line
+                    parts = block.split(b"\n")
+                    starts = accumulate(
+                        (len(part) + 1 for part in parts[:-1]), initial=block_start
+                    )
+                    next(starts)
+                    offsets.extend(starts)
+            # A trailing newline already ended the last line
+            if offsets[-1] != size:
+                offsets.append(size)
+        return cls(path, (stat.st_mtime_ns, size), encoding, offsets)
+
+    def line_range(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """
+        Get the byte range of lines.
+
+        Args:
+            start_line (int): The 1-based first line.
+            end_line (int): The 1-based last line, inclusive.
+
+        Returns:
+            Tuple[int, int]: The start and end byte offsets.
+        """
+        return self.offsets[start_line - 1], self.offsets[end_line]
+
+    def read_lines(self, start_line: int, end_line: int) -> List[str]:
+        """
+        Read and decode lines, touching only their byte range.
+
+        Args:
+            start_line (int): The 1-based first line.
+            end_line (int): The 1-based last line, inclusive.
+
+        Returns:
+            List[str]: The lines without their line endings.
+        """
+        if start_line > end_line:
+            return []
+        start, end = self.line_range(start_line, end_line)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # The BOM is part of the first line only
+        encoding = "utf-8" if self.encoding == "utf-8-sig" and start else self.encoding
+        text = data.decode(encoding, errors="replace")
+        lines = text.split("\n")
+        if text.endswith("\n"):
+            lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    def replace_lines(
+        self,
+        start_line: int,
+        end_line: int,
+        new_line_lengths: Iterable[int],
+        key: Tuple[int, int],
+    ):
+        """
+        Update the index after lines were replaced, without rescanning the file.
+
+        Args:
+            start_line (int): The 1-based first replaced line.
+            end_line (int): The 1-based last replaced line, `start_line - 1` for an insertion.
+            new_line_lengths (Iterable[int]): The byte lengths of the new lines, line endings included.
+            key (Tuple[int, int]): The (mtime_ns, size) of the file after the edit.
+        """
+        start = self.offsets[start_line - 1]
+        new_offsets = array(
+            _typecode(key[1]), accumulate(new_line_lengths, initial=start)
+        )
+        delta = new_offsets[-1] - self.offsets[end_line]
+        suffix = self.offsets[end_line + 1 :]
+        if delta:
+            suffix = map(delta.__add__, suffix)
+
+        offsets = array(_typecode(key[1]), self.offsets[: start_line - 1])
+        offsets.extend(new_offsets)
+        offsets.extend(suffix)
+        self.offsets = offsets
+        self.key = key
+
+
+_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stat_key(path: Path) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_line_index(path: Path) -> Optional[LineIndex]:
+    """
+    Get the line index of a file, building it on the first use of each file version.
+
+    Args:
+        path (Path): The file.
+
+    Returns:
+        Optional[LineIndex]: The index, or None for encodings that are not ASCII-compatible.
+    """
+    key = _stat_key(path)
+    with _cache_lock:
+        index = _cache.get(str(path))
+        if index is not None and index.key == key:
+            _cache.move_to_end(str(path))
+            return index
+
+    encoding = detect_encoding(path)
+    if not _is_ascii_compatible(encoding):
+        return None
+    index = LineIndex.build(path, encoding)
+    with _cache_lock:
+        _cache[str(path)] = index
+        _cache.move_to_end(str(path))
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def forget_line_index(path: Path):
+    """
+    Drop the cached index of a file.
+
+    Args:
+        path (Path): The file.
+    """
+    with _cache_lock:
+        _cache.pop(str(path), None)
@@ -1,43 +1,51 @@
 from pathlib import Path
-from charset_normalizer import from_bytes
+from src.tools.text.encoding import decode_file
+from src.tools.text.line_index import get_line_index
 
 
 def read_raw_file(file_path: Path):
-    raw_data = file_path.read_bytes()
-    result = from_bytes(raw_data).best()
-    if result is None:
-        encoding = "utf-8"
-    else:
-        encoding = result.encoding
-    return raw_data.decode(encoding, errors="replace").expandtabs()
+    content, _ = decode_file(file_path)
+    return content.expandtabs()
+
+
+def _read_lines(file_path: Path, start_line: int, end_line: int):
+    """
+    Read a range of lines and the total line count. Only the requested byte range is
+    decoded when the file can be indexed.
+    """
+    index = get_line_index(file_path)
+    if index is None:
+        lines = read_raw_file(file_path).splitlines()
+        total = len(lines)
+        end_line = min(total, end_line) if end_line != -1 else total
+        return lines[start_line - 1 : end_line], total
+
+    total = index.line_count
+    end_line = min(total, end_line) if end_line != -1 else total
+    lines = index.read_lines(start_line, end_line)
+    return [line.expandtabs() for line in lines], total
 
 
 def read_file(
     file_path: Path, start_line: int = 1, end_line: int = -1, max_lines: int = 500
 ):
-    content = read_raw_file(file_path)
-
-    lines = content.splitlines()
     start_line = max(1, start_line)
-    end_line = min(len(lines), end_line) if end_line != -1 else len(lines)
-
-    if end_line - start_line + 1 > max_lines:
+    if end_line != -1 and end_line - start_line + 1 > max_lines:
         end_line = start_line + max_lines - 1
+    elif end_line == -1:
+        end_line = start_line + max_lines - 1
+    lines, total = _read_lines(file_path, start_line, end_line)
+    end_line = min(total, end_line)
 
-    range_content = ""
-    for i in range(start_line - 1, end_line):
-        range_content += f"{i + 1}: {lines[i]}\n"
-
+    parts = []
     if start_line > 1:
-        range_content = (
-            f"(From start line 1 to end line {start_line - 1} are omitted.)\n"
-            + range_content
-        )
-
-    if end_line < len(lines):
-        range_content += (
-            f"(From start line {end_line + 1} to end line {len(lines)} are omitted.)\n"
+        parts.append(f"(From start line 1 to end line {start_line - 1} are omitted.)\n")
+    parts.extend(f"{start_line + i}: {line}\n" for i, line in enumerate(lines))
+    if end_line < total:
+        parts.append(
+            f"(From start line {end_line + 1} to end line {total} are omitted.)\n"
         )
+    range_content = "".join(parts)
 
     return f"<file path={file_path}>\n{range_content}</file>"
 
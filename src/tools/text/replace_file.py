@@ -1,6 +1,7 @@
 from pathlib import Path
-from src.tools.text.read_file import read_raw_file
-from src.tools.text.write_file import write_file
+from src.tools.text.changes import file_lock
+from src.tools.text.insert_file import _line_count
+from src.tools.text.line_edit import LineEdit, apply_line_edits
 
 
 def replace_file(
@@ -9,32 +10,21 @@ def replace_file(
     end_line: int,
     new_content: str,
 ):
-    content = read_raw_file(file_path)
-    new_content = new_content.expandtabs() if new_content else ""
+    with file_lock(file_path):
+        line_count = _line_count(file_path)
+        start_line = max(1, start_line)
+        end_line = min(line_count, end_line) if end_line != -1 else line_count
 
-    lines = content.splitlines()
-    start_line = max(1, start_line)
-    end_line = min(len(lines), end_line) if end_line != -1 else len(lines)
-
-    pre_content = ""
-    post_content = ""
-    if start_line > 1:
-        pre_content = "\n".join(lines[: start_line - 1])
-    if end_line < len(lines):
-        post_content = "\n".join(lines[end_line:])
-
-    new_content = "\n".join(
-        [
-            pre_content,
-            new_content,
-            post_content,
-        ]
-    )
-    return write_file(
-        file_path,
-        content,
-        new_content,
-    )
+        return apply_line_edits(
+            file_path,
+            [
+                LineEdit(
+                    start_line=start_line,
+                    end_line=max(end_line, start_line - 1),
+                    new_content=new_content or "",
+                )
+            ],
+        )
 
 
 # def replace_file(
@@ -0,0 +1,525 @@
+"""
+Persistent trigram index for searching the files of a workspace.
+
+Functionality:
+    - Maps every trigram of the (ASCII-lowercased) file bytes to the ids of the files
+      containing it, so a query only scans the files holding all of its trigrams.
+    - Extracts the trigrams of many files in parallel on the shared process pool.
+    - Updates incrementally: changed files get a new id and their old id becomes a
+      tombstone, which compaction drops once tombstones dominate.
+    - Refreshes from file modification times at most every `refresh_interval` seconds,
+      edits made through our file tools are applied on the next search via
+      `notify_file_changed`.
+    - Persists under `.cache/search`, so a new session only re-reads changed files.
+
+Files that are ignored, binary or larger than 1 MB are not indexed.
+"""
+
+import os
+import re
+import atexit
+import time
+import pickle
+import fnmatch
+import hashlib
+import tempfile
+import threading
+import weakref
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from pydantic import BaseModel
+from src.tools.policy import get_process_pool
+from src.tools.text.changes import add_change_listener
+from src.tools.text.ignore import walk_files
+from src.utils.log import logger
+
+_INDEX_VERSION = 1
+_MAX_FILE_SIZE = 1024 * 1024
+_BINARY_SAMPLE_SIZE = 8192
+_PARALLEL_THRESHOLD = 64
+_BATCH_SIZE = 128
+_MAX_LINES_PER_FILE = 20
+_MAX_LINE_LENGTH = 200
+_SAVE_INTERVAL = 30.0
+
+_indexes: "weakref.WeakSet[SearchIndex]" = weakref.WeakSet()
+
+
+def _trigrams(data: bytes) -> Set[int]:
+    # zip and set run in C, only the distinct trigrams are converted in Python
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def extract_trigrams(
+    paths: List[str],
+) -> Tuple[List[Tuple[str, Optional[int], int, bool]], Dict[int, bytes]]:
+    """
+    Read a batch of files and build the postings of their trigrams. Runs in the worker
+    processes, so the parent only merges one posting list per trigram and batch.
+
+    Args:
+        paths (List[str]): The absolute paths of the files.
+
+    Returns:
+        Tuple[List[Tuple[str, Optional[int], int, bool]], Dict[int, bytes]]: The path,
+            mtime_ns, size and whether it is indexed for each file, and the array bytes of
+            the positions among the indexed files of the batch by trigram. The mtime is
+            None for unreadable files, binary or oversized files are not indexed.
+    """
+    entries = []
+    postings: Dict[int, array] = {}
+    indexed = 0
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            if stat.st_size > _MAX_FILE_SIZE:
+                entries.append((path, stat.st_mtime_ns, stat.st_size, False))
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            entries.append((path, None, 0, False))
+            continue
+        if b"\0" in data[:_BINARY_SAMPLE_SIZE]:
+            entries.append((path, stat.st_mtime_ns, stat.st_size, False))
+            continue
+        entries.append((path, stat.st_mtime_ns, stat.st_size, True))
+        for gram in _trigrams(data.lower()):
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array("I")
+            ids.append(indexed)
+        indexed += 1
+    return entries, {gram: ids.tobytes() for gram, ids in postings.items()}
+
+
+def _query_trigrams(literal: str, case_sensitive: bool) -> Set[int]:
+    data = literal.encode("utf-8").lower()
+    grams = set()
+    for i in range(len(data) - 2):
+        gram = data[i : i + 3]
+        # Only ASCII is lowercased in the index, other case variants are not comparable
+        if not case_sensitive and max(gram) >= 0x80:
+            continue
+        grams.add((gram[0] << 16) | (gram[1] << 8) | gram[2])
+    return grams
+
+
+def _literal_runs(parsed) -> List[str]:
+    runs = []
+    current = []
+    for op, argument in parsed:
+        if op is re._parser.LITERAL:
+            current.append(chr(argument))
+            continue
+        runs.append("".join(current))
+        current = []
+        # A group without repetition must match as a whole
+        if op is re._parser.SUBPATTERN:
+            runs += _literal_runs(argument[-1])
+    runs.append("".join(current))
+    return runs
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Extract literal strings that every match of a regular expression contains.
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        List[str]: The literal runs of at least 3 characters outside of repetitions and
+            alternations. Empty when nothing is certain.
+    """
+    try:
+        parsed = re._parser.parse(pattern)
+    except Exception:
+        return []
+    return [run for run in _literal_runs(parsed) if len(run) >= 3]
+
+
+class FileMatches(BaseModel):
+    """
+    The matches of a search in one file.
+
+    Attributes:
+        path (str): The absolute path of the file.
+        count (int): The number of matches.
+        lines (List[Tuple[int, str]]): The first matching lines and their 1-based numbers.
+        score (float): The rank of the file, higher first.
+    """
+
+    path: str
+    count: int
+    lines: List[Tuple[int, str]]
+    score: float = 0.0
+
+
+class SearchIndex:
+    """
+    A trigram index of the files under one root directory.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        cache_dir: str = os.path.join(".cache", "search"),
+        refresh_interval: float = 30.0,
+    ):
+        """
+        Initialize the index, loading its persisted state if any.
+
+        Args:
+            root (str): The directory to index.
+            cache_dir (str, optional): The directory holding the persisted indexes.
+            refresh_interval (float, optional): The seconds between scans of the workspace for changes.
+        """
+        self.root = os.path.abspath(root)
+        self.refresh_interval = refresh_interval
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(os.path.abspath(cache_dir), f"{digest}.pkl")
+
+        # Files by id, None for tombstones
+        self.files: List[Optional[Tuple[str, int, int]]] = []
+        self.ids: Dict[str, int] = {}
+        self.postings: Dict[int, array] = {}
+        # Binary, oversized and unreadable files, by relative path
+        self.skipped: Dict[str, Tuple[Optional[int], int]] = {}
+        self.tombstones = 0
+
+        self._dirty: Set[str] = set()
+        self._last_refresh = 0.0
+        self._last_save = 0.0
+        self._unsaved = False
+        self._lock = threading.RLock()
+        self._load()
+        _indexes.add(self)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if state.get("version") != _INDEX_VERSION or state.get("root") != self.root:
+            return
+        self.files = state["files"]
+        self.skipped = state["skipped"]
+        self.tombstones = state["tombstones"]
+        self.postings = {}
+        for gram, data in state["postings"].items():
+            ids = array("I")
+            ids.frombytes(data)
+            self.postings[gram] = ids
+        self.ids = {
+            entry[0]: file_id
+            for file_id, entry in enumerate(self.files)
+            if entry is not None
+        }
+
+    def save(self):
+        """
+        Persist the index atomically.
+        """
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._lock:
+            state = {
+                "version": _INDEX_VERSION,
+                "root": self.root,
+                "files": self.files,
+                "skipped": self.skipped,
+                "tombstones": self.tombstones,
+                "postings": {
+                    gram: ids.tobytes() for gram, ids in self.postings.items()
+                },
+            }
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.cache_path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._unsaved = False
+            self._last_save = time.monotonic()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _remove(self, relative: str):
+        file_id = self.ids.pop(relative, None)
+        if file_id is not None:
+            self.files[file_id] = None
+            self.tombstones += 1
+        self.skipped.pop(relative, None)
+
+    def _extract(self, relatives: List[str]):
+        paths = [os.path.join(self.root, relative) for relative in relatives]
+        if len(paths) < _PARALLEL_THRESHOLD:
+            return [extract_trigrams(paths)]
+        batches = [
+            paths[i : i + _BATCH_SIZE] for i in range(0, len(paths), _BATCH_SIZE)
+        ]
+        return get_process_pool().map(extract_trigrams, batches)
+
+    def _update(self, relatives: Iterable[str]):
+        relatives = list(relatives)
+        if not relatives:
+            return
+        for relative in relatives:
+            self._remove(relative)
+        for entries, postings in self._extract(relatives):
+            base = len(self.files)
+            for path, mtime, size, indexed in entries:
+                relative = self._relative(path)
+                if mtime is None:
+                    continue
+                if not indexed:
+                    self.skipped[relative] = (mtime, size)
+                    continue
+                self.ids[relative] = len(self.files)
+                self.files.append((relative, mtime, size))
+            for gram, data in postings.items():
+                ids = array("I")
+                ids.frombytes(data)
+                if base:
+                    ids = array("I", map(base.__add__, ids))
+                existing = self.postings.get(gram)
+                if existing is None:
+                    self.postings[gram] = ids
+                else:
+                    existing.extend(ids)
+        self._unsaved = True
+        if self.tombstones > 1000 and self.tombstones * 2 > len(self.files):
+            self._compact()
+
+    def _compact(self):
+        """
+        Renumber the live files and drop the tombstones from the postings.
+        """
+        mapping = {}
+        files = []
+        for file_id, entry in enumerate(self.files):
+            if entry is not None:
+                mapping[file_id] = len(files)
+                files.append(entry)
+        postings = {}
+        for gram, ids in self.postings.items():
+            live = array("I", (mapping[i] for i in ids if i in mapping))
+            if live:
+                postings[gram] = live
+        self.files = files
+        self.postings = postings
+        self.ids = {entry[0]: file_id for file_id, entry in enumerate(files)}
+        self.tombstones = 0
+
+    def refresh(self, force: bool = False):
+        """
+        Apply the changes since the previous refresh.
+
+        Files reported by `notify_file_changed` are always re-indexed. The workspace
+        is scanned for other changes when `refresh_interval` has passed or `force` is set.
+
+        Args:
+            force (bool, optional): Whether to scan the workspace regardless of the interval.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            changed = set()
+            now = time.monotonic()
+            if force or now - self._last_refresh >= self.refresh_interval:
+                on_disk = walk_files(self.root)
+                for relative in list(self.ids) + list(self.skipped):
+                    if relative not in on_disk:
+                        self._remove(relative)
+                for relative, stamp in on_disk.items():
+                    file_id = self.ids.get(relative)
+                    if file_id is not None:
+                        known = self.files[file_id][1:]
+                    else:
+                        known = self.skipped.get(relative)
+                    if known != stamp:
+                        changed.add(relative)
+                self._last_refresh = time.monotonic()
+            for path in dirty:
+                relative = self._relative(path)
+                if os.path.isfile(path):
+                    changed.add(relative)
+                else:
+                    self._remove(relative)
+            self._update(sorted(changed))
+            if self._unsaved and (
+                force or time.monotonic() - self._last_save >= _SAVE_INTERVAL
+            ):
+                self.save()
+
+    def notify(self, path: str):
+        """
+        Mark a file as changed, to be re-indexed on the next search.
+
+        Args:
+            path (str): The absolute path of the file.
+        """
+        with self._lock:
+            self._dirty.add(path)
+
+    def _candidates(self, literals: List[str], case_sensitive: bool) -> List[int]:
+        grams = set()
+        for literal in literals:
+            grams |= _query_trigrams(literal, case_sensitive)
+        if not grams:
+            return [i for i, entry in enumerate(self.files) if entry is not None]
+        postings = sorted(
+            (self.postings.get(gram, array("I")) for gram in grams), key=len
+        )
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(ids)
+        return sorted(i for i in candidates if self.files[i] is not None)
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        include: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> List[FileMatches]:
+        """
+        Search the indexed files.
+
+        Args:
+            query (str): The literal text or regular expression.
+            regex (bool, optional): Whether the query is a regular expression.
+            case_sensitive (bool, optional): Whether matching is case-sensitive.
+            include (str, optional): A glob the relative path or the name of a file must match.
+            path (str, optional): A directory under the root to restrict the search to.
+
+        Raises:
+            ValueError: If the regular expression is invalid.
+
+        Returns:
+            List[FileMatches]: The files with matches, best ranked first.
+        """
+        try:
+            pattern = re.compile(
+                query if regex else re.escape(query),
+                # Anchors match at every line, as in grep
+                re.MULTILINE | (0 if case_sensitive else re.IGNORECASE),
+            )
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression `{query}`: {e}")
+
+        self.refresh()
+        with self._lock:
+            literals = required_literals(query) if regex else [query]
+            candidates = [
+                self.files[i][0] for i in self._candidates(literals, case_sensitive)
+            ]
+
+        prefix = ""
+        if path:
+            prefix = self._relative(os.path.abspath(path))
+            prefix = "" if prefix == "." else prefix + "/"
+        needle = query.lower()
+        results = []
+        for relative in candidates:
+            if prefix and not relative.startswith(prefix):
+                continue
+            name = relative.rsplit("/", 1)[-1]
+            if include and not (
+                fnmatch.fnmatch(relative, include) or fnmatch.fnmatch(name, include)
+            ):
+                continue
+            matches = self._match_file(relative, pattern)
+            if matches is None:
+                continue
+            # Files named after the query first, then by match count, then shallow paths
+            matches.score = (
+                10.0 * (not regex and needle in name.lower())
+                + min(matches.count, 50)
+                - 0.1 * relative.count("/")
+            )
+            results.append(matches)
+        results.sort(key=lambda matches: (-matches.score, matches.path))
+        return results
+
+    def _match_file(self, relative: str, pattern: re.Pattern) -> Optional[FileMatches]:
+        full_path = os.path.join(self.root, relative)
+        try:
+            with open(full_path, "rb") as f:
+                content = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return None
+        count = 0
+        lines = []
+        line_number = 1
+        position = 0
+        last_line = 0
+        for match in pattern.finditer(content):
+            count += 1
+            if len(lines) >= _MAX_LINES_PER_FILE:
+                continue
+            line_number += content.count("\n", position, match.start())
+            position = match.start()
+            if line_number == last_line:
+                continue
+            last_line = line_number
+            start = content.rfind("\n", 0, match.start()) + 1
+            end = content.find("\n", match.start())
+            line = content[start : end if end != -1 else len(content)].rstrip("\r")
+            lines.append((line_number, line[:_MAX_LINE_LENGTH]))
+        if not count:
+            return None
+        return FileMatches(path=full_path, count=count, lines=lines)
+
+
+_search_indexes: Dict[str, SearchIndex] = {}
+_search_indexes_lock = threading.Lock()
+
+
+def get_search_index(root: str) -> SearchIndex:
+    """
+    Get the index of a directory, shared by all searches in this process.
+
+    Args:
+        root (str): The directory.
+
+    Returns:
+        SearchIndex: The index.
+    """
+    root = os.path.abspath(root)
+    with _search_indexes_lock:
+        index = _search_indexes.get(root)
+        if index is None:
+            index = _search_indexes[root] = SearchIndex(root)
+        return index
+
+
+def _on_file_changed(path: str):
+    for index in list(_indexes):
+        if path.startswith(index.root + os.sep):
+            index.notify(path)
+
+
+def save_search_indexes():
+    """
+    Persist the indexes with unsaved changes.
+    """
+    for index in list(_indexes):
+        if index._unsaved:
+            try:
+                index.save()
+            except OSError as e:
+                logger.warning(f"Saving the search index of {index.root} failed: {e}")
+
+
+add_change_listener(_on_file_changed)
+atexit.register(save_search_indexes)
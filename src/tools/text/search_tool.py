@@ -0,0 +1,113 @@
+import os
+from pydantic import BaseModel, Field
+from typing import Optional, override
+
+from src.tools.text.search_index import get_search_index
+from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy
+
+_CHARS_PER_TOKEN = 4
+
+
+class SearchArgs(BaseModel):
+    query: str = Field(description="The text or regular expression to search for.")
+    regex: bool = Field(
+        default=False, description="Whether `query` is a regular expression."
+    )
+    case_sensitive: bool = Field(
+        default=False, description="Whether the search is case-sensitive."
+    )
+    include: Optional[str] = Field(
+        default=None,
+        description="A glob the searched files must match, e.g. `*.py` or `src/**/*.ts`.",
+    )
+    path: Optional[str] = Field(
+        default=None,
+        description="Absolute path of the directory to search in. Defaults to the workspace.",
+    )
+    max_tokens: int = Field(
+        default=4000,
+        description="The token budget of the results. Lower-ranked files beyond it are omitted.",
+    )
+
+
+class SearchTool(Tool):
+    """
+    Searches the workspace through a persistent trigram index, instead of rescanning
+    every file like `grep -r`.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize the tool.
+
+        Args:
+            root (str, optional): The workspace directory to index. Defaults to the current directory.
+        """
+        super().__init__(
+            name="search",
+            description="Searches the files of the workspace for a text or regular expression. Returns the matching lines with their line numbers, grouped by file with the most relevant files first. Ignored files, e.g. by `.gitignore`, are not searched.",
+            parameters=SearchArgs,
+            execution_policy=ExecutionPolicy.THREAD,
+        )
+        self.root = os.path.abspath(root or os.getcwd())
+
+    def _index_root(self, path: Optional[str]) -> str:
+        if path:
+            path = os.path.abspath(path)
+            if path != self.root and not path.startswith(self.root + os.sep):
+                return path
+        return self.root
+
+    @override
+    def _run(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        include: Optional[str] = None,
+        path: Optional[str] = None,
+        max_tokens: int = 4000,
+    ) -> ToolResult:
+        if path and not os.path.isdir(path):
+            return ToolResult(error=f"Path {path} is not a directory.", success=False)
+        index = get_search_index(self._index_root(path))
+        try:
+            results = index.search(query, regex, case_sensitive, include, path)
+        except ValueError as e:
+            return ToolResult(error=str(e), success=False)
+
+        total = sum(matches.count for matches in results)
+        header = f"<search query={query!r} matches={total} files={len(results)}>"
+        lines = [header]
+        budget = max_tokens * _CHARS_PER_TOKEN - len(header)
+        shown = 0
+        for matches in results:
+            section = [f"{matches.path} ({matches.count} matches)"]
+            section += [f"  {number}: {line}" for number, line in matches.lines]
+            if matches.count > len(matches.lines):
+                section.append(f"  ({matches.count - len(matches.lines)} more matches)")
+            size = sum(len(line) + 1 for line in section)
+            if shown and size > budget:
+                break
+            lines += section
+            budget -= size
+            shown += 1
+        if shown < len(results):
+            lines.append(
+                f"({len(results) - shown} more files with matches are omitted to fit the token budget, narrow the search with `include` or `path`.)"
+            )
+        lines.append("</search>")
+        return ToolResult(output="\n".join(lines), success=True)
+
+
+if __name__ == "__main__":
+    from src.utils.loop import run_async_in_thread
+
+    search_tool = SearchTool()
+    print(run_async_in_thread(search_tool._execute, query="ToolResult"))
+    print(
+        run_async_in_thread(
+            search_tool._execute, query=r"def \w+_file\(", regex=True, include="*.py"
+        )
+    )
@@ -1,19 +1,238 @@
+import os
+import json
+import base64
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.tools.text.ignore import IgnoreRules
 
+_MAX_DIR_ENTRIES = 100
+_CACHE_SIZE = 32
 
-def view_directory(directory: Path):
+
+class DirectoryTree:
+    """
+    The rendered lines of a directory tree, with the modification times it was built from.
+    """
+
+    def __init__(self, lines: List[str], stamps: Dict[str, Optional[int]]):
+        self.lines = lines
+        self.stamps = stamps
+
+    def is_valid(self) -> bool:
+        for path, mtime in self.stamps.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                if mtime is not None:
+                    return False
+        return True
+
+
+def _stamp(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan(
+    path: str, relative: str, rules: IgnoreRules
+) -> Tuple[List[os.DirEntry], List[os.DirEntry], int]:
+    """
+    List the directories and files of a directory that are not ignored, sorted by name.
+    """
+    dirs, files, ignored = [], [], 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # Symlinked directories are listed but not followed, which avoids cycles
+            is_dir = entry.is_dir(follow_symlinks=False)
+            entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+            if rules.is_ignored(entry_relative, is_dir):
+                ignored += 1
+            elif is_dir:
+                dirs.append(entry)
+            else:
+                files.append(entry)
+    dirs.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+    return dirs, files, ignored
+
+
+def _summary(dirs: int, files: int, ignored: int) -> str:
+    summary = f"{files} files, {dirs} dirs"
+    if ignored:
+        summary += f", {ignored} ignored"
+    return summary
+
+
+def build_tree(directory: Path, max_depth: int = 3) -> DirectoryTree:
+    """
+    Walk a directory tree with `os.scandir`, skipping ignored paths.
+
+    Args:
+        directory (Path): The root of the tree.
+        max_depth (int, optional): The number of levels listed. Directories at the last
+            level are summarized by their entry counts.
+
+    Returns:
+        DirectoryTree: The rendered tree.
+    """
+    root = os.path.abspath(directory)
+    root_rules = IgnoreRules.for_directory(Path(root))
+    root_relative = os.path.relpath(root, root_rules.root).replace(os.sep, "/")
+    root_relative = "" if root_relative == "." else root_relative
+    lines = []
+    stamps = {}
+
+    def walk(path: str, relative: str, rules: IgnoreRules, depth: int, indent: str):
+        stamps[path] = _stamp(path)
+        try:
+            dirs, files, ignored = _scan(path, relative, rules)
+        except OSError as e:
+            lines.append(f"{indent}└─ (Listing failed: {e})")
+            return
+        entries = [(entry, True) for entry in dirs] + [
+            (entry, False) for entry in files
+        ]
+        shown = entries[:_MAX_DIR_ENTRIES]
+        for i, (entry, is_dir) in enumerate(shown):
+            last = i == len(shown) - 1 and len(entries) <= len(shown)
+            prefix = indent + ("└─ " if last else "├─ ")
+            if not is_dir:
+                lines.append(prefix + entry.name)
+                continue
+
+            entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+            entry_rules = rules.child(entry_relative)
+            # Editing a .gitignore does not change the modification time of its directory
+            gitignore = entry_rules.sources[-1]
+            stamps[gitignore] = _stamp(gitignore)
+            if depth >= max_depth:
+                stamps[entry.path] = _stamp(entry.path)
+                try:
+                    sub_dirs, sub_files, sub_ignored = _scan(
+                        entry.path, entry_relative, entry_rules
+                    )
+                    summary = _summary(len(sub_dirs), len(sub_files), sub_ignored)
+                except OSError:
+                    summary = "unreadable"
+                lines.append(f"{prefix}{entry.name}/ ({summary})")
+                continue
+
+            lines.append(f"{prefix}{entry.name}/")
+            walk(
+                entry.path,
+                entry_relative,
+                entry_rules,
+                depth + 1,
+                indent + ("   " if last else "│  "),
+            )
+        if len(entries) > len(shown):
+            lines.append(
+                f"{indent}└─ ... {len(entries) - len(shown)} more entries ({_summary(len(dirs), len(files), ignored)} in total)"
+            )
+
+    walk(root, root_relative, root_rules, 1, "")
+    for source in root_rules.sources:
+        stamps[source] = _stamp(source)
+    return DirectoryTree(lines, stamps)
+
+
+_cache: "OrderedDict[Tuple[str, int], DirectoryTree]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_tree(directory: Path, max_depth: int = 3) -> DirectoryTree:
+    """
+    Get the tree of a directory, rebuilding it only if a listed directory or a
+    `.gitignore` above it changed since it was built.
+
+    Args:
+        directory (Path): The root of the tree.
+        max_depth (int, optional): The number of levels listed.
+
+    Returns:
+        DirectoryTree: The rendered tree.
+    """
+    key = (os.path.abspath(directory), max_depth)
+    with _cache_lock:
+        tree = _cache.get(key)
+    if tree is not None and tree.is_valid():
+        with _cache_lock:
+            _cache.move_to_end(key)
+        return tree
+
+    tree = build_tree(directory, max_depth)
+    with _cache_lock:
+        _cache[key] = tree
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tree
+
+
+def tree_paths(directory: Path, max_depth: int = 3) -> List[str]:
+    """
+    Get the paths whose modification the tree of a directory depends on.
+
+    Args:
+        directory (Path): The root of the tree.
+        max_depth (int, optional): The number of levels listed.
+
+    Returns:
+        List[str]: The listed directories and the `.gitignore` files applied.
+    """
+    return list(get_tree(directory, max_depth).stamps)
+
+
+def encode_cursor(offset: int, max_depth: int) -> str:
+    data = json.dumps({"offset": offset, "max_depth": max_depth}).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(data)
+        return int(state["offset"]), int(state["max_depth"])
+    except Exception:
+        raise ValueError(f"Invalid cursor `{cursor}`.")
+
+
+def view_directory(
+    directory: Path,
+    max_depth: int = 3,
+    max_entries: int = 300,
+    cursor: Optional[str] = None,
+):
+    """
+    View a directory tree, one page of entries at a time.
+
+    Args:
+        directory (Path): The root of the tree.
+        max_depth (int, optional): The number of levels listed.
+        max_entries (int, optional): The number of lines per page.
+        cursor (str, optional): The cursor of the page to view, as returned with the previous page.
+
+    Returns:
+        str: The page of the tree.
+    """
     if not directory.is_dir():
         raise ValueError(f"Path {directory} is not a directory.")
 
-    result = ""
-    files = list(directory.iterdir())
+    offset = 0
+    if cursor:
+        offset, max_depth = decode_cursor(cursor)
+    tree = get_tree(directory, max_depth)
 
-    for i, file in enumerate(files):
-        prefix = "└─ " if i == len(files) - 1 else "├─ "
-        result += f"{prefix}{file.name}"
-        if file.is_dir():
-            result += "/"
-        result += "\n"
+    page = tree.lines[offset : offset + max_entries]
+    result = "".join(f"{line}\n" for line in page)
+    end = offset + len(page)
+    if end < len(tree.lines):
+        result += f"({len(tree.lines) - end} more entries, view them with the cursor `{encode_cursor(end, max_depth)}`.)\n"
 
     return f"<directory path={directory}>\n{result}</directory>"
 
@@ -1,15 +1,22 @@
+import os
+import glob
+import asyncio
 from pydantic import BaseModel, Field
-from typing import override
+from typing import List, Optional, Tuple, override
 from pathlib import Path
 
-from src.tools.text.view_dir import view_directory
+from src.tools.text.view_dir import decode_cursor, tree_paths, view_directory
 from src.tools.text.read_file import read_file
 from src.tools.base import Tool, ToolResult
+from src.tools.policy import ExecutionPolicy, run_with_policy
+from src.utils.util import num_tokens
 
+_MAX_GLOB_MATCHES = 100
 
-class ViewArgs(BaseModel):
+
+class ViewTarget(BaseModel):
     path: str = Field(
-        description="Absolute path to file or directory, e.g. `/repo/file.py` or `/repo`."
+        description="Absolute path or glob pattern, e.g. `/repo/file.py` or `/repo/src/**/*.py`."
     )
     start_line: int = Field(
         default=1,
@@ -21,28 +28,213 @@ class ViewArgs(BaseModel):
     )
 
 
+class ViewArgs(BaseModel):
+    path: Optional[str] = Field(
+        default=None,
+        description="Absolute path to file or directory, e.g. `/repo/file.py` or `/repo`.",
+    )
+    start_line: int = Field(
+        default=1,
+        description="The start line number to read from. 1 means the first line.",
+    )
+    end_line: int = Field(
+        default=-1,
+        description="The end line number to read to. -1 means the last line.",
+    )
+    paths: List[ViewTarget] = Field(
+        default_factory=list,
+        description="Several files, directories or glob patterns to view in one call, each with its own line range. Prefer this over consecutive calls when exploring.",
+    )
+    max_tokens: int = Field(
+        default=20000,
+        description="The token budget shared by everything viewed. Content beyond it is truncated or omitted.",
+    )
+    max_depth: int = Field(
+        default=3,
+        description="The number of levels listed when viewing a directory tree.",
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        description="The cursor returned with a partially listed directory tree, to view its next entries.",
+    )
+
+
+def _expand(target: ViewTarget) -> List[ViewTarget]:
+    if not glob.has_magic(target.path):
+        return [target]
+    matches = sorted(glob.glob(target.path, recursive=True))
+    return [target.model_copy(update={"path": match}) for match in matches]
+
+
+def _glob_directories(pattern: str) -> List[str]:
+    """
+    List the directories a glob pattern searches: the directories under its static
+    prefix, down to the depth of the pattern, or all of them after a `**`.
+    """
+    parts = pattern.split(os.sep)
+    static = 0
+    while static < len(parts) and not glob.has_magic(parts[static]):
+        static += 1
+    base = os.sep.join(parts[:static]) or (
+        os.sep if pattern.startswith(os.sep) else "."
+    )
+    magic = parts[static:]
+    max_depth = None if "**" in magic else len(magic) - 1
+
+    directories = []
+    for root, dirs, _ in os.walk(base):
+        directories.append(root)
+        depth = 0 if root == base else root[len(base) :].strip(os.sep).count(os.sep) + 1
+        if max_depth is not None and depth >= max_depth:
+            dirs.clear()
+    return directories
+
+
+def _view(
+    target: ViewTarget, max_depth: int, cursor: Optional[str]
+) -> Tuple[str, bool]:
+    path = Path(target.path)
+    try:
+        if path.is_dir():
+            return view_directory(path, max_depth, cursor=cursor), True
+        return read_file(path, target.start_line, target.end_line), True
+    except Exception as e:
+        return f"(Viewing {path} failed: {e})", False
+
+
+def _fit(section: str, budget: int) -> Optional[str]:
+    """
+    Truncate a section to a token budget, keeping whole lines.
+    """
+    tokens = num_tokens(section)
+    if tokens <= budget:
+        return section
+    lines = section.splitlines()
+    # Keep the closing tag of the file or directory
+    closing = lines.pop() if lines[-1].startswith("</") else None
+    keep = len(lines) * budget // tokens - 1
+    if keep <= 1:
+        return None
+    kept = lines[:keep]
+    kept.append(
+        f"(The remaining {len(lines) - keep} lines are omitted to fit the token budget, view them with a narrower range.)"
+    )
+    if closing:
+        kept.append(closing)
+    return "\n".join(kept)
+
+
 class ViewTool(Tool):
 
     def __init__(self):
         super().__init__(
             name="view",
-            description="Views the content of a file or directory tree. If the path is a directory, it will view the directory tree. If the path is a file, it will view the file content.",
+            description="Views the content of files or directory trees. If a path is a directory, it will view the directory tree. If a path is a file, it will view the file content. Several paths or glob patterns can be viewed at once through `paths`.",
             parameters=ViewArgs,
+            pure=True,
+            execution_policy=ExecutionPolicy.INLINE,
         )
 
+    @staticmethod
+    def _targets(
+        path: Optional[str],
+        start_line: int,
+        end_line: int,
+        paths: List[dict],
+    ) -> List[ViewTarget]:
+        targets = [ViewTarget(**target) for target in paths or []]
+        if path:
+            targets.insert(
+                0, ViewTarget(path=path, start_line=start_line, end_line=end_line)
+            )
+        return targets
+
+    @override
+    def get_cache_paths(
+        self,
+        path: Optional[str] = None,
+        start_line: int = 1,
+        end_line: int = -1,
+        paths: List[dict] = None,
+        max_depth: int = 3,
+        cursor: Optional[str] = None,
+        **kwargs,
+    ) -> List[str]:
+        cache_paths = []
+        for target in self._targets(path, start_line, end_line, paths):
+            if cursor:
+                _, max_depth = decode_cursor(cursor)
+            if glob.has_magic(target.path):
+                # New matches change the modification time of the directories searched
+                cache_paths += _glob_directories(target.path)
+                for match in glob.glob(target.path, recursive=True):
+                    if os.path.isdir(match):
+                        cache_paths += tree_paths(Path(match), max_depth)
+                    else:
+                        cache_paths.append(match)
+            elif os.path.isdir(target.path):
+                # A tree depends on every directory listed in it
+                cache_paths += tree_paths(Path(target.path), max_depth)
+            else:
+                cache_paths.append(target.path)
+        return cache_paths
+
     @override
     async def _execute(
-        self, path: str, start_line: int = 1, end_line: int = -1
+        self,
+        path: Optional[str] = None,
+        start_line: int = 1,
+        end_line: int = -1,
+        paths: List[dict] = None,
+        max_tokens: int = 20000,
+        max_depth: int = 3,
+        cursor: Optional[str] = None,
     ) -> ToolResult:
-        if Path(path).is_dir():
+        targets = self._targets(path, start_line, end_line, paths)
+        if not targets:
             return ToolResult(
-                output=view_directory(Path(path)),
-                success=True,
+                error="Either `path` or `paths` is required.", success=False
             )
-        return ToolResult(
-            output=read_file(Path(path), start_line, end_line),
-            success=True,
+
+        expanded = await asyncio.gather(
+            *[
+                run_with_policy(ExecutionPolicy.THREAD, _expand, target)
+                for target in targets
+            ]
         )
+        notes = []
+        views = []
+        for target, matches in zip(targets, expanded):
+            if not matches:
+                notes.append(f"(No path matches `{target.path}`.)")
+            elif len(matches) > _MAX_GLOB_MATCHES:
+                notes.append(
+                    f"(`{target.path}` matches {len(matches)} paths, only the first {_MAX_GLOB_MATCHES} are viewed.)"
+                )
+            views += matches[:_MAX_GLOB_MATCHES]
+
+        sections = await asyncio.gather(
+            *[
+                run_with_policy(ExecutionPolicy.THREAD, _view, view, max_depth, cursor)
+                for view in views
+            ]
+        )
+
+        output = []
+        budget = max_tokens
+        for i, (section, _) in enumerate(sections):
+            section = _fit(section, budget) if budget > 0 else None
+            if section is None:
+                omitted = ", ".join(view.path for view in views[i:])
+                output.append(f"(The token budget is exhausted, not viewed: {omitted})")
+                break
+            output.append(section)
+            budget -= num_tokens(section)
+
+        if not any(viewed for _, viewed in sections):
+            # Nothing could be viewed
+            return ToolResult(error="\n".join(output + notes), success=False)
+        return ToolResult(output="\n".join(output + notes), success=True)
 
 
 if __name__ == "__main__":
@@ -50,4 +242,21 @@ if __name__ == "__main__":
 
     view_tool = ViewTool()
     print(run_async_in_thread(view_tool._execute, path="."))
-    print(run_async_in_thread(view_tool._execute, path="src/tools/text/view_tool.py", start_line=1, end_line=10))
+    print(
+        run_async_in_thread(
+            view_tool._execute,
+            path="src/tools/text/view_tool.py",
+            start_line=1,
+            end_line=10,
+        )
+    )
+    print(
+        run_async_in_thread(
+            view_tool._execute,
+            paths=[
+                {"path": "src/tools/text/*_file.py", "end_line": 20},
+                {"path": "README.md"},
+            ],
+            max_tokens=4000,
+        )
+    )
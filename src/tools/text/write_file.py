@@ -1,17 +1,31 @@
-import difflib
 from pathlib import Path
+from src.tools.text.diff import unified_diff
+from src.tools.text.changes import file_lock, notify_file_changed
+from src.tools.text.encoding import detect_encoding, remember_encoding
+from src.utils.log import logger
 
 
-def write_file(file_path: Path, old_content: str, new_content: str):
+def write_file(
+    file_path: Path, old_content: str, new_content: str, encoding: str = None
+):
     new_content = new_content.expandtabs()
-    file_path.write_text(new_content, encoding="utf-8")
-    diff = difflib.unified_diff(
-        old_content.splitlines(),
-        new_content.splitlines(),
-        fromfile=str(file_path),
-        tofile=str(file_path),
+
+    with file_lock(file_path):
+        # Keep the encoding of existing files, new files are written as UTF-8
+        encoding = encoding or detect_encoding(file_path)
+        try:
+            new_content.encode(encoding)
+        except UnicodeEncodeError:
+            logger.warning(
+                f"The new content of {file_path} cannot be encoded as {encoding}, writing it as UTF-8."
+            )
+            encoding = "utf-8"
+        file_path.write_text(new_content, encoding=encoding)
+        remember_encoding(file_path, encoding)
+        notify_file_changed(str(file_path))
+    return unified_diff(
+        old_content.splitlines(), new_content.splitlines(), str(file_path)
     )
-    return "\n".join(list(diff))
 
 
 if __name__ == "__main__":
@@ -1,16 +1,212 @@
+import atexit
 import asyncio
+import threading
 import concurrent.futures
+from typing import Any, Awaitable, Coroutine, Optional
+
+
+class BackgroundLoop:
+    """
+    An event loop running forever in a daemon thread.
+
+    Loop-bound resources such as MCP sessions or HTTP connection pools created on
+    this loop stay usable across calls, from synchronous code as well as from
+    coroutines running on other loops.
+    """
+
+    def __init__(self, name: str = "contextify-loop"):
+        """
+        Initialize the background loop. The thread is started lazily.
+
+        Args:
+            name (str, optional): The name of the loop thread.
+        """
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _run_forever(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the loop, starting its thread if needed.
+
+        Returns:
+            asyncio.AbstractEventLoop: The background loop.
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                thread = threading.Thread(
+                    target=self._run_forever,
+                    args=(loop, ready),
+                    name=self._name,
+                    daemon=True,
+                )
+                thread.start()
+                ready.wait()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        """
+        Check whether the caller runs on the background loop thread.
+
+        Returns:
+            bool: True if called from the background loop thread.
+        """
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the background loop.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            concurrent.futures.Future: The future of the coroutine result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the background loop and block until it completes.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+            timeout (float, optional): Seconds to wait for the result.
+
+        Returns:
+            Any: The result of the coroutine.
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError(
+                "Cannot block on the background loop from its own thread; await instead."
+            )
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(self, coro: Coroutine) -> Any:
+        """
+        Await a coroutine on the background loop from any event loop.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            Any: The result of the coroutine.
+        """
+        if self.in_loop_thread():
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Cancel the pending tasks, stop the loop and join its thread.
+
+        The loop is restarted lazily on the next use.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the tasks and the thread.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+
+        async def _cancel_all():
+            tasks = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+_background_loop = BackgroundLoop()
+atexit.register(_background_loop.shutdown)
+
+
+def get_background_loop() -> BackgroundLoop:
+    """
+    Get the process-wide background loop.
+
+    Returns:
+        BackgroundLoop: The shared background loop.
+    """
+    return _background_loop
 
 
 def run_async_in_thread(async_func, *args, **kwargs):
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-
-    if loop and loop.is_running():
-        # If we are in a running loop, run in a separate thread
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            return executor.submit(asyncio.run, async_func(*args, **kwargs)).result()
-    else:
-        return asyncio.run(async_func(*args, **kwargs))
+    """
+    Run a coroutine function from synchronous code on the process-wide background loop.
+
+    Unlike `asyncio.run`, this works whether or not the caller runs an event loop, and
+    resources created by the coroutine stay bound to a loop that outlives the call.
+
+    Args:
+        async_func: The coroutine function to run.
+        *args: Positional arguments for the coroutine function.
+        **kwargs: Keyword arguments for the coroutine function.
+
+    Returns:
+        Any: The result of the coroutine.
+    """
+    return _background_loop.run(async_func(*args, **kwargs))
+
+
+async def run_on_background_loop(coro: Awaitable) -> Any:
+    """
+    Await a coroutine on the process-wide background loop from any event loop.
+
+    Args:
+        coro (Awaitable): The coroutine to run.
+
+    Returns:
+        Any: The result of the coroutine.
+    """
+    return await _background_loop.run_async(coro)
+
+
+if __name__ == "__main__":
+
+    async def loop_id():
+        await asyncio.sleep(0.01)
+        return id(asyncio.get_running_loop())
+
+    # Sync callers share the same loop across calls
+    print(run_async_in_thread(loop_id) == run_async_in_thread(loop_id))
+
+    async def main():
+        # Async callers on another loop are bridged to the background loop
+        background = await run_on_background_loop(loop_id())
+        print(background != id(asyncio.get_running_loop()))
+        print(run_async_in_thread(loop_id) == background)
+
+    asyncio.run(main())
+    get_background_loop().shutdown()
@@ -0,0 +1,178 @@
+"""
+Prometheus metrics for the agent, LLM and tool hot paths.
+
+Usage:
+    from src.utils.metrics import TOOL_SECONDS, start_metrics_server
+
+    start_metrics_server(port=9464)
+    with TOOL_SECONDS.labels(tool="view").time():
+        ...
+
+The metrics are registered on the default `prometheus_client` registry and are
+cheap to record even when no HTTP endpoint is exposed.
+"""
+
+import threading
+from prometheus_client import Counter, Histogram, start_http_server
+
+LLM_REQUEST_SECONDS = Histogram(
+    "contextify_llm_request_seconds",
+    "Latency of LLM provider requests.",
+    ["provider", "model"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 320),
+)
+LLM_TOKENS = Counter(
+    "contextify_llm_tokens",
+    "Tokens consumed by LLM provider requests.",
+    ["provider", "model", "kind"],
+)
+LLM_CACHE_REQUESTS = Counter(
+    "contextify_llm_cache_requests",
+    "Lookups in the on-disk LLM response cache.",
+    ["result"],
+)
+
+TOOL_SECONDS = Histogram(
+    "contextify_tool_seconds",
+    "Latency of tool executions.",
+    ["tool"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 180, 600),
+)
+TOOL_CALLS = Counter(
+    "contextify_tool_calls",
+    "Tool executions by status.",
+    ["tool", "status"],
+)
+TOOL_OUTPUT_BYTES = Histogram(
+    "contextify_tool_output_bytes",
+    "Size of tool outputs in bytes.",
+    ["tool"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+
+COMPACTIONS = Counter(
+    "contextify_compactions",
+    "Short-term memory compactions.",
+)
+COMPACTION_SECONDS = Histogram(
+    "contextify_compaction_seconds",
+    "Duration of short-term memory compactions.",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600),
+)
+
+BASH_COMMANDS = Counter(
+    "contextify_bash_commands",
+    "Shell commands by outcome.",
+    ["status"],
+)
+BASH_COMMAND_SECONDS = Histogram(
+    "contextify_bash_command_seconds",
+    "Wall time of shell commands.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 180, 600),
+)
+BASH_COMMAND_CPU_SECONDS = Histogram(
+    "contextify_bash_command_cpu_seconds",
+    "CPU time of shell commands.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 180, 600),
+)
+BASH_COMMAND_MAX_RSS_BYTES = Histogram(
+    "contextify_bash_command_max_rss_bytes",
+    "Sampled peak resident memory of shell commands.",
+    buckets=(2**20, 2**23, 2**25, 2**27, 2**29, 2**31, 2**33),
+)
+BASH_COMMAND_OUTPUT_BYTES = Histogram(
+    "contextify_bash_command_output_bytes",
+    "Combined stdout and stderr bytes of shell commands.",
+    buckets=(256, 1024, 16384, 262144, 1048576, 16777216, 268435456),
+)
+
+REACT_STEP_SECONDS = Histogram(
+    "contextify_react_step_seconds",
+    "Duration of the phases of a ReAct step.",
+    ["phase"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 180, 600),
+)
+
+
+def record_llm_response(provider: str, model: str, seconds: float, response):
+    """
+    Record the latency and token usage of an LLM provider response.
+
+    Args:
+        provider (str): The provider name, e.g. `anthropic`.
+        model (str): The model name.
+        seconds (float): The request latency in seconds.
+        response: The chat completion returned by the provider.
+    """
+    model = model or "unknown"
+    LLM_REQUEST_SECONDS.labels(provider=provider, model=model).observe(seconds)
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.labels(provider=provider, model=model, kind=kind).inc(value)
+
+
+def record_bash_command(result):
+    """
+    Record the outcome and resource usage of a shell command.
+
+    Args:
+        result: The CommandResult of the command.
+    """
+    if result.timed_out:
+        status = "timeout"
+    elif result.output_limit_exceeded:
+        status = "output_limit"
+    elif result.exit_code == 0:
+        status = "success"
+    else:
+        status = "failure"
+    BASH_COMMANDS.labels(status=status).inc()
+
+    usage = result.usage
+    BASH_COMMAND_SECONDS.observe(usage.wall_seconds)
+    BASH_COMMAND_OUTPUT_BYTES.observe(usage.output_bytes)
+    if usage.cpu_seconds is not None:
+        BASH_COMMAND_CPU_SECONDS.observe(usage.cpu_seconds)
+    if usage.max_rss_bytes is not None:
+        BASH_COMMAND_MAX_RSS_BYTES.observe(usage.max_rss_bytes)
+
+
+_server_lock = threading.Lock()
+_server_port = None
+
+
+def start_metrics_server(port: int = 9464, addr: str = "127.0.0.1") -> int:
+    """
+    Expose the metrics on a local HTTP endpoint. Repeated calls are no-ops.
+
+    Args:
+        port (int, optional): The port to listen on.
+        addr (str, optional): The address to bind. Defaults to localhost only.
+
+    Returns:
+        int: The port the endpoint is listening on.
+    """
+    global _server_port
+    with _server_lock:
+        if _server_port is None:
+            start_http_server(port, addr=addr)
+            _server_port = port
+        return _server_port
+
+
+if __name__ == "__main__":
+    import time
+    import urllib.request
+
+    port = start_metrics_server(port=9464)
+    with TOOL_SECONDS.labels(tool="demo").time():
+        time.sleep(0.01)
+    TOOL_CALLS.labels(tool="demo", status="success").inc()
+
+    body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+    print("\n".join(line for line in body.splitlines() if "contextify_tool" in line))
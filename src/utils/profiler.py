@@ -0,0 +1,269 @@
+"""
+Per-step timeline profiler for ReAct runs.
+
+Functionality:
+    - Records a timeline of the phases of every ReAct step (token counting, history
+      logging, request build, model wait, response parse, tool executions, compaction).
+    - Exports the timeline to Chrome trace-event JSON (chrome://tracing, Perfetto) and
+      to the collapsed-stack format consumed by flamegraph.pl and speedscope.
+    - Optionally captures a `cProfile` profile and `tracemalloc` statistics per step.
+
+Usage:
+    profiler = StepProfiler(cprofile_steps=True)
+    await ReAct(agent).solve(profiler=profiler)
+    profiler.save_chrome_trace(".cache/profile/trace.json")
+    profiler.save_collapsed(".cache/profile/stacks.txt")
+
+Instrumented code calls `profile_phase(name)`, which is a no-op unless a profiler
+is active in the current context.
+"""
+
+import os
+import json
+import time
+import cProfile
+import tracemalloc
+import contextlib
+import contextvars
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+_current_profiler: contextvars.ContextVar[Optional["StepProfiler"]] = (
+    contextvars.ContextVar("contextify_profiler", default=None)
+)
+_phase_stack: contextvars.ContextVar[tuple] = contextvars.ContextVar(
+    "contextify_profiler_stack", default=()
+)
+
+
+class StepProfiler:
+    """
+    Records the phases of ReAct steps as a timeline of nested events.
+    """
+
+    def __init__(
+        self,
+        cprofile_steps: Union[bool, Iterable[int]] = False,
+        tracemalloc_steps: Union[bool, Iterable[int]] = False,
+        output_dir: str = os.path.join(".cache", "profile"),
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            cprofile_steps (bool | Iterable[int], optional): Steps to capture with `cProfile`,
+                True for every step. Profiles are written to `output_dir/step_{n}.prof`.
+            tracemalloc_steps (bool | Iterable[int], optional): Steps to capture with `tracemalloc`,
+                True for every step. The peak and top allocations are attached to the step event.
+            output_dir (str, optional): The directory for the `cProfile` dumps.
+        """
+        self._cprofile_steps = self._normalize_steps(cprofile_steps)
+        self._tracemalloc_steps = self._normalize_steps(tracemalloc_steps)
+        self.output_dir = output_dir
+        self.events: List[Dict] = []
+        self._origin = time.perf_counter_ns()
+        self._step = 0
+
+    @staticmethod
+    def _normalize_steps(steps) -> Union[bool, Set[int]]:
+        if isinstance(steps, bool):
+            return steps
+        return set(steps)
+
+    @staticmethod
+    def _enabled(steps: Union[bool, Set[int]], step: int) -> bool:
+        return steps is True or (isinstance(steps, set) and step in steps)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Make this profiler the target of `profile_phase` in the current context.
+        """
+        token = _current_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _current_profiler.reset(token)
+
+    @contextlib.contextmanager
+    def step(self, step: int):
+        """
+        Record a ReAct step, capturing `cProfile` and `tracemalloc` data if toggled for it.
+
+        Args:
+            step (int): The 1-based step number.
+        """
+        self._step = step
+        profile = None
+        if self._enabled(self._cprofile_steps, step):
+            profile = cProfile.Profile()
+        trace_memory = self._enabled(self._tracemalloc_steps, step)
+        # Stop tracing after the step only if it was started here, so that later steps
+        # do not pay for it
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if trace_memory:
+            tracemalloc.reset_peak()
+
+        args = {}
+        with self.phase(f"step {step}", args=args):
+            if profile:
+                profile.enable()
+            try:
+                yield
+            finally:
+                if profile:
+                    profile.disable()
+                    os.makedirs(self.output_dir, exist_ok=True)
+                    path = os.path.join(self.output_dir, f"step_{step}.prof")
+                    profile.dump_stats(path)
+                    args["cprofile"] = path
+                if trace_memory:
+                    args["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                    stats = tracemalloc.take_snapshot().statistics("lineno")[:10]
+                    args["tracemalloc_top"] = [str(stat) for stat in stats]
+                if started_tracing:
+                    tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, args: Optional[Dict] = None):
+        """
+        Record a phase nested in the phases open in the current context.
+
+        Args:
+            name (str): The name of the phase.
+            args (Dict, optional): Extra data attached to the event. It may be filled in
+                until the phase ends.
+        """
+        stack = _phase_stack.get() + (name,)
+        token = _phase_stack.set(stack)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            _phase_stack.reset(token)
+            self.events.append(
+                {
+                    "name": name,
+                    "stack": stack,
+                    "step": self._step,
+                    "start_ns": start - self._origin,
+                    "duration_ns": end - start,
+                    "args": args or {},
+                }
+            )
+
+    def to_chrome_trace(self) -> Dict:
+        """
+        Convert the timeline to the Chrome trace-event format.
+
+        Returns:
+            Dict: The trace-event document.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": event["name"],
+                "cat": event["stack"][0],
+                "ph": "X",
+                "ts": event["start_ns"] / 1000,
+                "dur": event["duration_ns"] / 1000,
+                "pid": pid,
+                "tid": 1,
+                "args": {"step": event["step"], **event["args"]},
+            }
+            for event in sorted(self.events, key=lambda e: e["start_ns"])
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_collapsed(self) -> str:
+        """
+        Convert the timeline to collapsed stacks weighted by self time in microseconds.
+
+        Step names are folded into a single `step` frame so that the stacks of all
+        steps aggregate into one flamegraph.
+
+        Returns:
+            str: One `frame;frame;frame weight` line per distinct stack.
+        """
+        totals: Dict[tuple, int] = defaultdict(int)
+        children: Dict[tuple, int] = defaultdict(int)
+        for event in self.events:
+            stack = tuple(
+                "step" if frame.startswith("step ") else frame
+                for frame in event["stack"]
+            )
+            totals[stack] += event["duration_ns"]
+            if len(stack) > 1:
+                children[stack[:-1]] += event["duration_ns"]
+
+        lines = []
+        for stack, total in sorted(totals.items()):
+            self_us = max(0, total - children[stack]) // 1000
+            if self_us:
+                lines.append(f"{';'.join(stack)} {self_us}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the total seconds spent in each phase name across all steps.
+
+        Returns:
+            Dict[str, float]: The seconds per phase, longest first.
+        """
+        totals: Dict[str, int] = defaultdict(int)
+        for event in self.events:
+            name = "step" if event["name"].startswith("step ") else event["name"]
+            totals[name] += event["duration_ns"]
+        return {
+            name: total / 1e9
+            for name, total in sorted(totals.items(), key=lambda item: -item[1])
+        }
+
+    def save_chrome_trace(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def save_collapsed(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_collapsed())
+
+
+def profile_phase(name: str):
+    """
+    Record a phase on the profiler active in the current context, if any.
+
+    Args:
+        name (str): The name of the phase.
+
+    Returns:
+        ContextManager: The phase context, or a no-op context without an active profiler.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+if __name__ == "__main__":
+    profiler = StepProfiler(tracemalloc_steps=[2])
+    with profiler.activate():
+        for step in (1, 2):
+            with profiler.step(step):
+                with profile_phase("count_tokens"):
+                    time.sleep(0.01)
+                with profile_phase("invoke"):
+                    with profile_phase("model_wait"):
+                        time.sleep(0.02)
+                    with profile_phase("tool:view"):
+                        data = [bytes(1024) for _ in range(100)]
+
+    print(profiler.to_collapsed())
+    print(json.dumps(profiler.summary(), indent=4))
+    print(json.dumps(profiler.to_chrome_trace()["traceEvents"][0], indent=4))
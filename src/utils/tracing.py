@@ -0,0 +1,132 @@
+"""
+OpenTelemetry tracing for ReAct runs, LLM calls and tool executions.
+
+Usage:
+    from src.utils.tracing import setup_tracing, tracer
+
+    setup_tracing(exporter="file", path=".cache/trace/spans.jsonl")
+    with tracer.start_as_current_span("react.solve"):
+        ...
+
+Until `setup_tracing` is called the OpenTelemetry API hands out no-op spans, so
+the instrumentation costs next to nothing when tracing is disabled.
+"""
+
+import os
+import threading
+from typing import Optional, Sequence
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+tracer = trace.get_tracer("contextify")
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Span exporter appending one JSON document per finished span to a file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(span.to_json(indent=None) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        return None
+
+
+def record_llm_span(span: trace.Span, provider: str, model: str, response):
+    """
+    Attach the provider, model and token usage of an LLM response to a span.
+
+    Args:
+        span (trace.Span): The span of the provider request.
+        provider (str): The provider name, e.g. `anthropic`.
+        model (str): The model name.
+        response: The chat completion returned by the provider.
+    """
+    span.set_attribute("llm.provider", provider)
+    span.set_attribute("llm.model", model or "unknown")
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span.set_attribute("llm.prompt_tokens", usage.prompt_tokens or 0)
+        span.set_attribute("llm.completion_tokens", usage.completion_tokens or 0)
+
+
+_provider: Optional[TracerProvider] = None
+_exporter: Optional[SpanExporter] = None
+
+
+def setup_tracing(
+    exporter: str = "file",
+    path: str = os.path.join(".cache", "trace", "spans.jsonl"),
+) -> SpanExporter:
+    """
+    Install a tracer provider exporting the spans offline. Repeated calls are no-ops.
+
+    Args:
+        exporter (str, optional): One of `file`, `console` or `memory`.
+        path (str, optional): The output file of the `file` exporter.
+
+    Returns:
+        SpanExporter: The exporter receiving the spans. The `memory` exporter can be
+        inspected with `get_finished_spans()`.
+    """
+    global _provider, _exporter
+    if _provider is not None:
+        return _exporter
+
+    if exporter == "file":
+        span_exporter = FileSpanExporter(path)
+        processor = BatchSpanProcessor(span_exporter)
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+        processor = BatchSpanProcessor(span_exporter)
+    elif exporter == "memory":
+        span_exporter = InMemorySpanExporter()
+        processor = SimpleSpanProcessor(span_exporter)
+    else:
+        raise ValueError(f"Unknown span exporter `{exporter}`.")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "contextify"}))
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    _provider, _exporter = provider, span_exporter
+    return span_exporter
+
+
+def shutdown_tracing():
+    """
+    Flush the pending spans and shut down the tracer provider.
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+if __name__ == "__main__":
+    span_exporter = setup_tracing(exporter="memory")
+
+    with tracer.start_as_current_span("react.solve"):
+        with tracer.start_as_current_span("tool.execute") as span:
+            span.set_attribute("tool.name", "view")
+
+    for span in span_exporter.get_finished_spans():
+        print(span.name, span.parent.span_id if span.parent else None, span.attributes)
@@ -0,0 +1,34 @@
+import asyncio
+
+from src.tools.bash.bash_terminal import BashTerminal
+from src.tools.bash.resources import ResourceLimits
+
+
+def _run(tmp_path, command: str, limits: ResourceLimits):
+    async def run():
+        terminal = BashTerminal(output_dir=str(tmp_path), limits=limits)
+        try:
+            return await terminal.run(command)
+        finally:
+            await terminal.stop()
+
+    return asyncio.run(run())
+
+
+def test_output_limit_keeps_the_first_bytes(tmp_path):
+    result = _run(
+        tmp_path,
+        "printf 'x%.0s' $(seq 3000); sleep 5",
+        ResourceLimits(output_bytes=1000),
+    )
+    assert result.output_limit_exceeded
+    assert result.output == "x" * 1000
+
+
+def test_output_within_the_limit_is_complete(tmp_path):
+    result = _run(
+        tmp_path, "printf 'x%.0s' $(seq 1000)", ResourceLimits(output_bytes=1000)
+    )
+    assert not result.output_limit_exceeded
+    assert result.exit_code == 0
+    assert result.output == "x" * 1000
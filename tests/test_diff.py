@@ -0,0 +1,28 @@
+from src.tools.text.diff import diff_opcodes
+
+
+def _changed(opcodes):
+    removed = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal")
+    added = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal")
+    return removed, added
+
+
+def test_scattered_edits_beyond_max_edits_are_diffed_piecewise():
+    a = [f"line {i}" for i in range(2000)]
+    b = list(a)
+    for i in range(0, 2000, 10):
+        b[i] = f"changed {i}"
+    opcodes = diff_opcodes(a, b, max_edits=50)
+    assert _changed(opcodes) == (200, 200)
+    assert sum(1 for opcode in opcodes if opcode[0] == "replace") == 200
+
+
+def test_opcodes_rebuild_the_new_lines():
+    a = ["x", "a", "x", "b", "x", "c", "x"]
+    b = ["a", "x", "y", "c", "x", "x", "d"]
+    for max_edits in (1, 2, 1000):
+        rebuilt = []
+        for tag, i1, i2, j1, j2 in diff_opcodes(a, b, max_edits):
+            assert tag != "equal" or a[i1:i2] == b[j1:j2]
+            rebuilt += b[j1:j2]
+        assert rebuilt == b
@@ -0,0 +1,74 @@
+import codecs
+from pathlib import Path
+
+import pytest
+
+from src.tools.text.line_edit import LineEdit, apply_line_edits
+from src.tools.text.line_index import get_line_index
+
+
+def _edit(path: Path, data: bytes, *edits) -> bytes:
+    path.write_bytes(data)
+    apply_line_edits(
+        path,
+        [
+            LineEdit(start_line=start, end_line=end, new_content=content)
+            for start, end, content in edits
+        ],
+    )
+    result = path.read_bytes()
+    index = get_line_index(path)
+    assert index is None or index.offsets[-1] == len(result)
+    return result
+
+
+@pytest.mark.parametrize(
+    "data, edits, expected",
+    [
+        (b"a\nb\nc", [(3, 3, "C\n"), (4, 3, "D\n")], b"a\nb\nC\nD"),
+        (b"a\nb\nc", [(4, 3, "D\n"), (4, 3, "E\n")], b"a\nb\nc\nD\nE"),
+        (b"a\nb\nc", [(2, 3, "X\nY")], b"a\nX\nY"),
+        (b"a\nb\nc", [(3, 3, "")], b"a\nb"),
+        (b"a\nb\nc", [(1, 3, "")], b""),
+        (b"a\nb\nc", [(1, 0, "Z\n"), (2, 2, "B"), (4, 3, "D")], b"Z\na\nB\nc\nD"),
+        (b"a\r\nb\r\nc", [(3, 3, "C"), (4, 3, "D\n")], b"a\r\nb\r\nC\r\nD"),
+        (b"a\nb\nc\n", [(3, 3, "C\n"), (4, 3, "D\n")], b"a\nb\nC\nD\n"),
+    ],
+)
+def test_edits_at_end_of_file(tmp_path, data, edits, expected):
+    assert _edit(tmp_path / "file.txt", data, *edits) == expected
+
+
+def test_edit_after_edit_at_end_of_file(tmp_path):
+    path = tmp_path / "file.txt"
+    _edit(path, b"a\nb\nc", (3, 3, "C"))
+    apply_line_edits(path, [LineEdit(start_line=4, end_line=3, new_content="D")])
+    assert path.read_bytes() == b"a\nb\nC\nD"
+
+
+@pytest.mark.parametrize(
+    "data, edits, expected",
+    [
+        (b"a\nb\n", [(1, 0, "X\n")], b"X\na\nb\n"),
+        (b"a\nb\n", [(1, 1, "X\n"), (3, 2, "Z")], b"X\nb\nZ\n"),
+        (b"a\nb", [(1, 0, "X\n"), (3, 2, "Z")], b"X\na\nb\nZ"),
+        (b"", [(1, 0, "X\n")], b"X\n"),
+    ],
+)
+def test_edits_keep_a_single_bom(tmp_path, data, edits, expected):
+    bom = codecs.BOM_UTF8
+    assert _edit(tmp_path / "file.txt", bom + data, *edits) == bom + expected
+
+
+def test_parallel_appends_are_not_lost(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.tools.text.insert_file import insert_file
+
+    path = tmp_path / "file.txt"
+    path.write_text("start\n")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: insert_file(path, f"line {i}\n"), range(50)))
+    lines = path.read_text().splitlines()
+    assert lines[0] == "start"
+    assert sorted(lines[1:]) == sorted(f"line {i}" for i in range(50))
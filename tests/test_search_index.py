@@ -0,0 +1,15 @@
+from src.tools.text.search_index import SearchIndex
+
+
+def test_regex_anchors_match_every_line(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "shapes.py").write_text(
+        "import math\n\nclass Circle:\n    pass\n\nclass Square:\n    pass\n"
+    )
+    index = SearchIndex(str(root), cache_dir=str(tmp_path / "cache"))
+    results = index.search(r"^class \w+", regex=True)
+    assert [(matches.path, matches.count) for matches in results] == [
+        (str(root / "shapes.py"), 2)
+    ]
+    assert index.search(r"pass$", regex=True)[0].count == 2
@@ -0,0 +1,27 @@
+from src.tools.cache import fingerprint
+from src.tools.text.view_tool import ViewTool
+
+
+def _cache_paths(**args):
+    return ViewTool().get_cache_paths(**args)
+
+
+def test_recursive_glob_sees_files_in_new_directories(tmp_path):
+    (tmp_path / "src" / "package").mkdir(parents=True)
+    (tmp_path / "src" / "main.py").write_text("")
+    args = {"paths": [{"path": str(tmp_path / "src" / "**" / "*.py")}]}
+    # Memoized results are revalidated against the paths listed when they were cached
+    paths = _cache_paths(**args)
+    before = fingerprint(paths)
+    (tmp_path / "src" / "package" / "sub").mkdir()
+    (tmp_path / "src" / "package" / "sub" / "module.py").write_text("")
+    assert fingerprint(paths) != before
+
+
+def test_directories_matched_by_a_glob_are_fingerprinted_as_trees(tmp_path):
+    (tmp_path / "src" / "package").mkdir(parents=True)
+    args = {"paths": [{"path": str(tmp_path / "s*")}]}
+    paths = _cache_paths(**args)
+    before = fingerprint(paths)
+    (tmp_path / "src" / "package" / "module.py").write_text("")
+    assert fingerprint(paths) != before